@@ -0,0 +1,121 @@
+"""
+Compares the json codecs on payloads shaped like mattermost responses.
+
+	python benchmarks/json_codec.py [--number 200]
+
+Codecs which are not installed are skipped.
+"""
+
+import argparse
+import timeit
+
+from mattermostdriver.codec import CODECS, get_codec
+from mattermostdriver.events import Event
+
+
+def user(index):
+	return {
+		'id': 'user{index:022d}'.format(index=index),
+		'create_at': 1600000000000 + index,
+		'update_at': 1600000000000 + index,
+		'delete_at': 0,
+		'username': 'user.{index}'.format(index=index),
+		'auth_data': '',
+		'auth_service': '',
+		'email': 'user.{index}@example.com'.format(index=index),
+		'nickname': '',
+		'first_name': 'First {index}'.format(index=index),
+		'last_name': 'Last {index}'.format(index=index),
+		'position': '',
+		'roles': 'system_user',
+		'locale': 'en',
+		'notify_props': {
+			'channel': 'true', 'comments': 'never', 'desktop': 'mention',
+			'desktop_sound': 'true', 'email': 'true', 'first_name': 'false',
+			'mention_keys': '', 'push': 'mention', 'push_status': 'away',
+		},
+		'timezone': {'automaticTimezone': '', 'manualTimezone': '', 'useAutomaticTimezone': 'true'},
+	}
+
+
+def post(index):
+	return {
+		'id': 'post{index:022d}'.format(index=index),
+		'create_at': 1600000000000 + index,
+		'update_at': 1600000000000 + index,
+		'edit_at': 0,
+		'delete_at': 0,
+		'is_pinned': False,
+		'user_id': 'user{index:022d}'.format(index=index % 50),
+		'channel_id': 'channel0000000000000000001',
+		'root_id': '',
+		'parent_id': '',
+		'original_id': '',
+		'message': 'Message number {index} with some text, émoji :tada: and a link https://example.com'.format(
+			index=index),
+		'type': '',
+		'props': {},
+		'hashtags': '',
+		'pending_post_id': '',
+		'reply_count': 0,
+		'metadata': {},
+	}
+
+
+def payloads():
+	posts = [post(index) for index in range(200)]
+	return {
+		'users page (200)': [user(index) for index in range(200)],
+		'post list (200)': {
+			'order': [p['id'] for p in posts],
+			'posts': {p['id']: p for p in posts},
+			'next_post_id': '',
+			'prev_post_id': '',
+		},
+	}
+
+
+def posted_event(codec):
+	return codec.dumps({
+		'event': 'posted',
+		'data': {
+			'channel_display_name': 'Town Square',
+			'channel_name': 'town-square',
+			'channel_type': 'O',
+			'post': codec.dumps(post(1)),
+			'sender_name': '@user.1',
+			'team_id': 'team00000000000000000000001',
+		},
+		'broadcast': {'channel_id': 'channel0000000000000000001'},
+		'seq': 3,
+	})
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compares the json codecs.')
+	parser.add_argument('--number', type=int, default=200, help='iterations per measurement')
+	args = parser.parse_args()
+
+	codecs = [codec for codec in (create() for create in CODECS.values()) if codec is not None]
+	baseline = get_codec('json')
+	print('{:<20} {:<8} {:>12} {:>12} {:>8}'.format('payload', 'codec', 'decode (us)', 'encode (us)', 'speedup'))
+	for name, payload in payloads().items():
+		encoded = baseline.dumps(payload).encode('utf8')
+		timings = {}
+		for codec in codecs:
+			decode = timeit.timeit(lambda: codec.loads(encoded), number=args.number) / args.number
+			encode = timeit.timeit(lambda: codec.dumps(payload), number=args.number) / args.number
+			timings[codec.name] = (decode, encode)
+		for codec_name, (decode, encode) in timings.items():
+			print('{:<20} {:<8} {:>12.1f} {:>12.1f} {:>7.1f}x'.format(
+				name, codec_name, decode * 1e6, encode * 1e6, timings['json'][0] / decode))
+
+	for codec in codecs:
+		message = posted_event(codec)
+		number = args.number * 50
+		seconds = timeit.timeit(lambda: Event.parse(message, codec).post, number=number) / number
+		print('{:<20} {:<8} {:>12.1f}'.format('posted event', codec.name, seconds * 1e6))
+
+
+if __name__ == '__main__':
+	main()
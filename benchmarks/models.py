@@ -0,0 +1,98 @@
+"""
+Compares the memory and time of keeping users, channels and posts as dicts and as models.
+
+	python benchmarks/models.py [--count 20000]
+
+The responses are decoded from JSON like the client does, then kept alive
+while the memory they hold is measured with tracemalloc.
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from mattermostdriver.codec import get_codec
+from mattermostdriver.models import to_models
+
+from json_codec import user, post
+
+
+def channel(index):
+	return {
+		'id': 'channel{index:019d}'.format(index=index),
+		'create_at': 1600000000000 + index,
+		'update_at': 1600000000000 + index,
+		'delete_at': 0,
+		'team_id': 'team00000000000000000000001',
+		'type': 'O',
+		'display_name': 'Channel {index}'.format(index=index),
+		'name': 'channel-{index}'.format(index=index),
+		'header': '',
+		'purpose': 'The purpose of channel {index}'.format(index=index),
+		'last_post_at': 1600000000000 + index,
+		'total_msg_count': index,
+		'extra_update_at': 0,
+		'creator_id': 'user{index:022d}'.format(index=index % 50),
+		'scheme_id': None,
+		'props': None,
+		'group_constrained': None,
+		'shared': None,
+		'total_msg_count_root': index,
+		'policy_id': None,
+		'last_root_post_at': 1600000000000 + index,
+	}
+
+
+def payloads(count):
+	posts = [post(index) for index in range(count)]
+	for index, item in enumerate(posts):
+		item['metadata'] = {'embeds': [{'type': 'opengraph', 'url': 'https://example.com/{index}'.format(index=index)}]}
+	return {
+		'users': ('/users', [user(index) for index in range(count)]),
+		'channels': ('/channels', [channel(index) for index in range(count)]),
+		'posts': ('/channels/channel0000000000000000001/posts', {
+			'order': [item['id'] for item in posts],
+			'posts': {item['id']: item for item in posts},
+			'next_post_id': '',
+			'prev_post_id': '',
+		}),
+	}
+
+
+def measure(function):
+	"""
+	:return: The bytes the result of `function` holds and the seconds it took.
+		Tracing slows it down, so it is timed in a second run.
+	"""
+	gc.collect()
+	tracemalloc.start()
+	result = function()
+	gc.collect()
+	held = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	del result
+	gc.collect()
+	started = time.perf_counter()
+	function()
+	return held, time.perf_counter() - started
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compares dicts and models.')
+	parser.add_argument('--count', type=int, default=20000, help='entities of every kind')
+	args = parser.parse_args()
+
+	codec = get_codec('json')
+	print('{:<10} {:<7} {:>12} {:>12} {:>10}'.format('entities', 'as', 'memory (MiB)', 'decode (ms)', 'saved'))
+	for name, (endpoint, payload) in payloads(args.count).items():
+		encoded = codec.dumps(payload).encode('utf8')
+		dicts_held, dicts_seconds = measure(lambda: codec.loads(encoded))
+		models_held, models_seconds = measure(lambda: to_models(endpoint, codec.loads(encoded), codec))
+		print('{:<10} {:<7} {:>12.1f} {:>12.1f}'.format(name, 'dicts', dicts_held / 2 ** 20, dicts_seconds * 1e3))
+		print('{:<10} {:<7} {:>12.1f} {:>12.1f} {:>9.0f}%'.format(
+			name, 'models', models_held / 2 ** 20, models_seconds * 1e3, (1 - models_held / dicts_held) * 100))
+
+
+if __name__ == '__main__':
+	main()
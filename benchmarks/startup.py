@@ -0,0 +1,71 @@
+"""
+Measures what a short-lived process pays to start using the driver.
+
+	python benchmarks/startup.py [--runs 10]
+
+Reports the time to import the package and create a Driver in a fresh interpreter,
+and the objects and memory allocated for every Driver and endpoint used.
+"""
+
+import argparse
+import gc
+import statistics
+import subprocess
+import sys
+import tracemalloc
+
+IMPORT = '''
+import time
+started = time.perf_counter()
+from mattermostdriver import Driver
+imported = time.perf_counter()
+driver = Driver({'url': 'localhost'})
+driver.users
+print(imported - started, time.perf_counter() - imported)
+'''
+
+
+def startup_times(runs):
+	imports, drivers = [], []
+	for _ in range(runs):
+		output = subprocess.check_output([sys.executable, '-c', IMPORT])
+		imported, created = output.split()
+		imports.append(float(imported))
+		drivers.append(float(created))
+	return statistics.median(imports), statistics.median(drivers)
+
+
+def per_driver(count, endpoints):
+	from mattermostdriver import Driver
+	Driver({'url': 'localhost'}).users  # import everything used before measuring
+	gc.collect()
+	objects = len(gc.get_objects())
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	drivers = [Driver({'url': 'localhost'}) for _ in range(count)]
+	for driver in drivers:
+		for endpoint in endpoints:
+			getattr(driver, endpoint)
+	allocated = tracemalloc.get_traced_memory()[0] - before
+	tracemalloc.stop()
+	gc.collect()
+	return (len(gc.get_objects()) - objects) / count, allocated / count
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Measures the startup cost of the driver.')
+	parser.add_argument('--runs', type=int, default=10, help='fresh interpreters to start')
+	parser.add_argument('--drivers', type=int, default=1000, help='drivers created to measure their size')
+	args = parser.parse_args()
+
+	imported, created = startup_times(args.runs)
+	print('{:<40} {:>10.1f} ms'.format('import mattermostdriver.Driver', imported * 1000))
+	print('{:<40} {:>10.2f} ms'.format('Driver() and first endpoint', created * 1000))
+	for endpoints in ((), ('users',), ('users', 'posts', 'channels', 'teams')):
+		objects, allocated = per_driver(args.drivers, endpoints)
+		print('{:<40} {:>6.0f} objects {:>8.0f} bytes'.format(
+			'per Driver, endpoints used: {}'.format(len(endpoints)), objects, allocated))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,445 @@
+"""
+Benchmarks the driver against the fake server, to track regressions across releases.
+
+	python benchmarks/suite.py [--quick] [--only rest_sync,websocket] [--json results.json] [--compare baseline.json]
+
+Measures the requests per second and the p50/p99 latency of `Client.make_request`
+sent one after the other, from threads and from tasks, the websocket events
+dispatched per second by `Websocket._wait_for_message`, the memory used while
+walking paged posts and transferring files, and the startup time of the package.
+
+The fake server runs in another process, so it does not compete with
+the measured client for the GIL or show up in its memory.
+With --json the results are written as JSON, --compare prints the change
+of every number against the results of an earlier run.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from mattermostdriver import AsyncDriver, Driver, EventRouter
+from mattermostdriver.codec import STDLIB
+from mattermostdriver.dispatch import EventDispatcher
+from mattermostdriver.fakeserver import FakeMattermost
+from mattermostdriver.version import full_version
+from mattermostdriver.websocket import Websocket
+
+from json_codec import post
+from startup import per_driver, startup_times
+
+
+def percentile(values, fraction):
+	values = sorted(values)
+	return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def _latencies(latencies, seconds):
+	return {
+		'requests': len(latencies),
+		'seconds': seconds,
+		'rps': len(latencies) / seconds,
+		'p50_ms': percentile(latencies, 0.5) * 1000,
+		'p99_ms': percentile(latencies, 0.99) * 1000,
+	}
+
+
+def _serve(connection, posts, latency):
+	"""
+	Runs the fake server in its own process, answering the commands sent over `connection`.
+	"""
+	server = FakeMattermost(latency=latency).start()
+	team = server.add_team('bench')
+	channel = server.add_channel(team['id'], 'bench')
+	# The posts sent as websocket events do not change the channel walked
+	events = server.add_channel(team['id'], 'events')
+	for index in range(posts):
+		server.add_post(channel['id'], 'Post number {index}'.format(index=index))
+	connection.send({'port': server.port, 'token': server.token, 'channel_id': channel['id']})
+	while True:
+		command, argument = connection.recv()
+		if command == 'stop':
+			break
+		if command == 'posts':
+			for index in range(argument):
+				server.add_post(events['id'], 'Event number {index}'.format(index=index))
+			connection.send('done')
+	server.stop()
+
+
+class ServerProcess:
+	def __init__(self, posts=0, latency=0):
+		context = multiprocessing.get_context('spawn')
+		self.connection, child = context.Pipe()
+		self.process = context.Process(target=_serve, args=(child, posts, latency), daemon=True)
+
+	def __enter__(self):
+		self.process.start()
+		info = self.connection.recv()
+		self.channel_id = info['channel_id']
+		self.options = {
+			'url': '127.0.0.1',
+			'port': info['port'],
+			'scheme': 'http',
+			'token': info['token'],
+			'rate_limit': False,
+		}
+		return self
+
+	def __exit__(self, *exc_info):
+		self.connection.send(('stop', None))
+		self.process.join(10)
+
+	def send_posts(self, count):
+		self.connection.send(('posts', count))
+		return self.connection.recv()
+
+
+def rest_sync(server, args):
+	driver = Driver(server.options)
+	driver.login()
+	latencies = []
+	started = time.perf_counter()
+	for _ in range(args.requests):
+		sent = time.perf_counter()
+		driver.client.make_request('get', '/users/me')
+		latencies.append(time.perf_counter() - sent)
+	result = _latencies(latencies, time.perf_counter() - started)
+	driver.client.close()
+	return result
+
+
+def rest_threaded(server, args):
+	driver = Driver(dict(server.options, pool_maxsize=args.concurrency))
+	driver.login()
+
+	def request(_):
+		sent = time.perf_counter()
+		driver.client.make_request('get', '/users/me')
+		return time.perf_counter() - sent
+
+	started = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+		latencies = list(executor.map(request, range(args.requests)))
+	result = _latencies(latencies, time.perf_counter() - started)
+	result['threads'] = args.concurrency
+	driver.client.close()
+	return result
+
+
+def rest_async(server, args):
+	async def run():
+		driver = AsyncDriver(dict(server.options, pool_maxsize=args.concurrency))
+		await driver.login()
+		semaphore = asyncio.Semaphore(args.concurrency)
+
+		async def request():
+			async with semaphore:
+				sent = time.perf_counter()
+				await driver.client.make_request('get', '/users/me')
+				return time.perf_counter() - sent
+
+		started = time.perf_counter()
+		latencies = await asyncio.gather(*(request() for _ in range(args.requests)))
+		result = _latencies(latencies, time.perf_counter() - started)
+		result['tasks'] = args.concurrency
+		await driver.client.close()
+		return result
+
+	return asyncio.run(run())
+
+
+class _Replay:
+	"""
+	A websocket receiving prepared messages as fast as they are read.
+	"""
+
+	class Done(Exception):
+		pass
+
+	def __init__(self, messages):
+		self._messages = iter(messages)
+
+	async def recv(self):
+		for message in self._messages:
+			return message
+		raise self.Done()
+
+
+def _messages(count):
+	"""
+	:return: posted and typing events taking turns, over 20 channels
+	"""
+	messages = []
+	encoded_post = STDLIB.dumps(post(1))
+	for index in range(count):
+		channel_id = 'channel{index:019d}'.format(index=index % 20)
+		if index % 2:
+			event = {'event': 'typing', 'data': {'parent_id': '', 'user_id': 'user1'}}
+		else:
+			event = {'event': 'posted', 'data': {'post': encoded_post, 'channel_type': 'O', 'sender_name': '@user'}}
+		event['broadcast'] = {'channel_id': channel_id, 'team_id': '', 'user_id': '', 'omit_users': None}
+		event['seq'] = index
+		messages.append(STDLIB.dumps(event))
+	return messages
+
+
+def websocket_dispatch(server, args):
+	"""
+	Events dispatched per second by `Websocket._wait_for_message`,
+	to a plain handler, to an EventRouter only handling posts and to 4 worker tasks.
+	"""
+	messages = _messages(args.events)
+
+	async def dispatch(variant):
+		websocket = Websocket(Driver({'url': 'localhost'}).options, '')
+		handled = []
+
+		async def raw_handler(message):
+			handled.append(message)
+
+		async def deliver(event):
+			await raw_handler(event.raw)
+
+		router = EventRouter()
+
+		@router.on('posted')
+		async def on_post(event):
+			handled.append(event.post['id'])
+
+		dispatcher = None
+		handler = deliver
+		if variant == 'router':
+			handler = router
+			websocket._wants = router.wants
+		elif variant == 'workers':
+			dispatcher = EventDispatcher(deliver, workers=4)
+			dispatcher.start()
+			handler = dispatcher.put
+
+		started = time.perf_counter()
+		try:
+			await websocket._wait_for_message(_Replay(messages), handler)
+		except _Replay.Done:
+			pass
+		if dispatcher is not None:
+			while dispatcher.stats['handled'] < len(messages):
+				await asyncio.sleep(0)
+			await dispatcher.stop()
+		return len(messages) / (time.perf_counter() - started), len(handled)
+
+	result = {'events': len(messages)}
+	for variant in ('handler', 'router', 'workers'):
+		rate, _ = asyncio.run(dispatch(variant))
+		result[variant + '_events_per_s'] = rate
+	return result
+
+
+def websocket_end_to_end(server, args):
+	"""
+	Posts created on the server per second, until their posted events were handled by the client.
+	"""
+	async def run():
+		driver = AsyncDriver(server.options)
+		await driver.login()
+		router = EventRouter()
+		connected = asyncio.Event()
+		received = asyncio.Event()
+		count = [0]
+
+		@router.on('hello')
+		async def on_hello(event):
+			connected.set()
+
+		@router.on('posted')
+		async def on_post(event):
+			count[0] += 1
+			if count[0] == args.events:
+				received.set()
+
+		task = asyncio.ensure_future(driver.init_websocket(router))
+		await asyncio.wait_for(connected.wait(), 10)
+		loop = asyncio.get_event_loop()
+		started = time.perf_counter()
+		await loop.run_in_executor(None, server.send_posts, args.events)
+		await asyncio.wait_for(received.wait(), 60)
+		seconds = time.perf_counter() - started
+		task.cancel()
+		await asyncio.gather(task, return_exceptions=True)
+		await driver.client.close()
+		return {'events': args.events, 'seconds': seconds, 'events_per_s': args.events / seconds}
+
+	return asyncio.run(run())
+
+
+def _peak(function):
+	"""
+	:return: The result of the function and the peak of memory allocated while running it, in KiB
+	"""
+	tracemalloc.start()
+	try:
+		result = function()
+		peak = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+	return result, peak / 1024
+
+
+def memory_pagination(server, args):
+	driver = Driver(server.options)
+	driver.login()
+
+	def walk():
+		return sum(1 for _ in driver.posts.iter_posts_for_channel(server.channel_id, per_page=args.per_page))
+
+	def history():
+		return sum(1 for _ in driver.posts.iter_channel_history(server.channel_id, per_page=args.per_page))
+
+	def whole():
+		posts = []
+		page = 0
+		while True:
+			post_list = driver.posts.get_posts_for_channel(
+				server.channel_id, params={'page': page, 'per_page': args.per_page})
+			if not post_list['order']:
+				return len(posts)
+			posts.extend(post_list['posts'].values())
+			page += 1
+
+	walked, walk_peak = _peak(walk)
+	_, history_peak = _peak(history)
+	_, whole_peak = _peak(whole)
+	driver.client.close()
+	return {
+		'posts': walked,
+		'per_page': args.per_page,
+		'iter_posts_peak_kib': walk_peak,
+		'iter_channel_history_peak_kib': history_peak,
+		'all_pages_in_memory_peak_kib': whole_peak,
+	}
+
+
+def memory_file_transfer(server, args):
+	driver = Driver(server.options)
+	driver.login()
+	size = args.file_size * 1024 * 1024
+	with tempfile.TemporaryDirectory() as directory:
+		source = os.path.join(directory, 'upload.bin')
+		with open(source, 'wb') as fileobj:
+			fileobj.write(os.urandom(size))
+
+		def upload():
+			with open(source, 'rb') as fileobj:
+				return driver.files.upload_file_stream(server.channel_id, {'files': ('upload.bin', fileobj)})
+
+		started = time.perf_counter()
+		uploaded, upload_peak = _peak(upload)
+		upload_seconds = time.perf_counter() - started
+		file_id = uploaded['file_infos'][0]['id']
+
+		started = time.perf_counter()
+		_, save_peak = _peak(lambda: driver.files.save_file(file_id, os.path.join(directory, 'download.bin')))
+		save_seconds = time.perf_counter() - started
+		_, get_peak = _peak(lambda: len(driver.files.get_file(file_id).content))
+	driver.client.close()
+	return {
+		'size_kib': size / 1024,
+		'upload_file_stream_peak_kib': upload_peak,
+		'upload_mib_per_s': args.file_size / upload_seconds,
+		'save_file_peak_kib': save_peak,
+		'download_mib_per_s': args.file_size / save_seconds,
+		'get_file_peak_kib': get_peak,
+	}
+
+
+def startup(server, args):
+	imported, created = startup_times(args.runs)
+	objects, allocated = per_driver(200, ('users', 'posts', 'channels', 'teams'))
+	return {
+		'import_ms': imported * 1000,
+		'driver_ms': created * 1000,
+		'objects_per_driver': objects,
+		'bytes_per_driver': allocated,
+	}
+
+
+BENCHMARKS = {
+	'rest_sync': rest_sync,
+	'rest_threaded': rest_threaded,
+	'rest_async': rest_async,
+	'websocket_dispatch': websocket_dispatch,
+	'websocket_end_to_end': websocket_end_to_end,
+	'memory_pagination': memory_pagination,
+	'memory_file_transfer': memory_file_transfer,
+	'startup': startup,
+}
+
+
+def compare(results, baseline):
+	print()
+	print('{:<50} {:>14} {:>14} {:>8}'.format('compared to baseline', 'before', 'after', 'change'))
+	for name, values in results.items():
+		for key, value in values.items():
+			before = baseline.get('results', {}).get(name, {}).get(key)
+			if not isinstance(value, (int, float)) or not isinstance(before, (int, float)) or not before:
+				continue
+			print('{:<50} {:>14.2f} {:>14.2f} {:>+7.1f}%'.format(
+				name + '.' + key, before, value, (value - before) / before * 100))
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Benchmarks the driver against the fake server.')
+	parser.add_argument('--only', help='comma separated benchmarks to run, of ' + ', '.join(BENCHMARKS))
+	parser.add_argument('--quick', action='store_true', help='smaller runs, e.g. for CI')
+	parser.add_argument('--requests', type=int, default=2000, help='requests per REST benchmark')
+	parser.add_argument('--concurrency', type=int, default=8, help='threads or tasks sending requests')
+	parser.add_argument('--events', type=int, default=20000, help='websocket events dispatched')
+	parser.add_argument('--posts', type=int, default=2000, help='posts in the channel walked')
+	parser.add_argument('--per-page', type=int, default=200, help='posts per page')
+	parser.add_argument('--file-size', type=int, default=16, help='MiB uploaded and downloaded')
+	parser.add_argument('--latency', type=float, default=0, help='seconds the server delays every request')
+	parser.add_argument('--runs', type=int, default=5, help='fresh interpreters started to measure the import')
+	parser.add_argument('--json', help='write the results to this file')
+	parser.add_argument('--compare', help='results of an earlier run to compare with')
+	args = parser.parse_args()
+	if args.quick:
+		args.requests, args.events, args.posts, args.file_size, args.runs = 200, 2000, 400, 2, 2
+
+	names = args.only.split(',') if args.only else list(BENCHMARKS)
+	unknown = set(names) - set(BENCHMARKS)
+	if unknown:
+		parser.error('unknown benchmarks: ' + ', '.join(sorted(unknown)))
+
+	results = {}
+	with ServerProcess(args.posts, args.latency) as server:
+		for name in names:
+			results[name] = BENCHMARKS[name](server, args)
+			for key, value in results[name].items():
+				print('{:<50} {:>14.2f}'.format(name + '.' + key, value))
+
+	if args.json:
+		with open(args.json, 'w') as fileobj:
+			json.dump({
+				'mattermostdriver': full_version,
+				'python': platform.python_version(),
+				'implementation': platform.python_implementation(),
+				'platform': platform.platform(),
+				'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+				'arguments': vars(args),
+				'results': results,
+			}, fileobj, indent=2, sort_keys=True)
+	if args.compare:
+		with open(args.compare) as fileobj:
+			compare(results, json.load(fileobj))
+
+
+if __name__ == '__main__':
+	main()
@@ -12,8 +12,8 @@ root_dir = os.path.abspath(os.path.dirname(__file__))
 
 py_version = sys.version_info[:2]
 
-if py_version < (3, 4):
-	raise Exception("python-mattermost-driver requires Python >= 3.4.")
+if py_version < (3, 6):
+	raise Exception("python-mattermost-driver requires Python >= 3.6.")
 
 readme_file = os.path.join(root_dir, 'README.rst')
 with open(readme_file, encoding='utf-8') as f:
@@ -39,8 +39,6 @@ setup(
 		'Intended Audience :: Developers',
 		'Programming Language :: Python',
 		'Programming Language :: Python :: 3',
-		'Programming Language :: Python :: 3.4',
-		'Programming Language :: Python :: 3.5',
 		'Programming Language :: Python :: 3.6',
 		'Programming Language :: Python :: 3.7',
 	],
@@ -50,4 +48,9 @@ setup(
 		'websockets>=6',
 		'requests>=2.19'
 	],
+	extras_require={
+		'async': ['httpx>=0.20'],
+		'orjson': ['orjson'],
+		'brotli': ['brotli'],
+	},
 )
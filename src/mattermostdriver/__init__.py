@@ -1,4 +1,35 @@
+import importlib
+import sys
+
 __all__ = ['driver', 'client', 'websocket']
-from .driver import Driver
-from .client import Client
-from .websocket import Websocket
+
+# name -> submodule of the classes importable from the package,
+# their submodule is imported on first use
+_LAZY = {
+	'Driver': 'driver',
+	'AsyncDriver': 'driver',
+	'Client': 'client',
+	'AsyncClient': 'client',
+	'Websocket': 'websocket',
+	'Event': 'events',
+	'EventRouter': 'events',
+	'DriverPool': 'pool',
+}
+
+
+def __getattr__(name):
+	if name not in _LAZY:
+		raise AttributeError('module {module!r} has no attribute {name!r}'.format(module=__name__, name=name))
+	value = getattr(importlib.import_module('.' + _LAZY[name], __name__), name)
+	globals()[name] = value
+	return value
+
+
+def __dir__():
+	return sorted(list(globals()) + list(_LAZY))
+
+
+if sys.version_info < (3, 7):
+	# Module __getattr__ (PEP 562) is not supported, import everything
+	for _name in _LAZY:
+		__getattr__(_name)
@@ -0,0 +1,166 @@
+"""
+Merging single lookups into requests to the bulk endpoints, e.g. ``/users/ids``.
+
+Lookups made within a short window are collected into one batch.
+The batch is fetched with one request and every caller gets its own item back.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from .exceptions import ResourceNotFound
+
+log = logging.getLogger('mattermostdriver.batching')
+log.setLevel(logging.INFO)
+
+
+def _not_found(key):
+	return ResourceNotFound('{key} was not returned by the bulk request'.format(key=key))
+
+
+def _resolve(futures, items, key_of):
+	found = {key_of(item): item for item in items or ()}
+	for key, future in futures.items():
+		if future.done():
+			continue
+		if key in found:
+			future.set_result(found[key])
+		else:
+			future.set_exception(_not_found(key))
+
+
+def _fail(futures, error):
+	"""
+	Passes an error to the callers still waiting, e.g. if `key_of` failed on an item.
+	"""
+	for future in futures.values():
+		if not future.done():
+			future.set_exception(error)
+
+
+class BatchLoader:
+	"""
+	Collects the keys passed to :meth:`load` by any thread for `window` seconds
+	(or until `max_batch` keys are collected) and fetches them with one call
+	of `batch_function`.
+	"""
+
+	def __init__(self, batch_function, key_of, window=0.002, max_batch=100):
+		"""
+		:param batch_function: Fetches the items for a list of keys, e.g. `Users.get_users_by_ids`
+		:param key_of: Returns the key of an item returned by `batch_function`
+		:param window: Seconds to wait for more keys before fetching a batch
+		:param max_batch: Maximum number of keys fetched at once
+		"""
+		self.batch_function = batch_function
+		self.key_of = key_of
+		self.window = window
+		self.max_batch = max_batch
+		self._lock = threading.Lock()
+		self._batch = None
+		self._batches = 0
+		self._loads = 0
+
+	@property
+	def stats(self):
+		"""
+		:return: A dict with the number of `loads` and the `batches` fetched for them
+		"""
+		with self._lock:
+			return {'loads': self._loads, 'batches': self._batches}
+
+	def load(self, key):
+		"""
+		:return: The item for `key`, once its batch has been fetched
+		:raises ResourceNotFound: If the server did not return an item for `key`
+		"""
+		with self._lock:
+			self._loads += 1
+			batch = self._batch
+			leader = batch is None
+			if leader:
+				batch = self._batch = {}
+			future = batch.get(key)
+			if future is None:
+				future = batch[key] = Future()
+			full = len(batch) >= self.max_batch
+			if full:
+				self._batch = None
+
+		if full:
+			self._dispatch(batch)
+		elif leader:
+			time.sleep(self.window)
+			with self._lock:
+				detached = self._batch is batch
+				if detached:
+					self._batch = None
+			if detached:
+				self._dispatch(batch)
+		return future.result()
+
+	def _dispatch(self, batch):
+		with self._lock:
+			self._batches += 1
+		log.debug('Fetching a batch of %s', len(batch))
+		try:
+			items = self.batch_function(list(batch))
+			_resolve(batch, items, self.key_of)
+		except Exception as e:
+			_fail(batch, e)
+
+
+class AsyncBatchLoader:
+	"""
+	Same as :class:`BatchLoader` for tasks of one event loop.
+	With a `window` of 0, the keys loaded during one iteration of the event loop are batched.
+	"""
+
+	def __init__(self, batch_function, key_of, window=0.002, max_batch=100):
+		self.batch_function = batch_function
+		self.key_of = key_of
+		self.window = window
+		self.max_batch = max_batch
+		self._batch = None
+		self._timer = None
+		# The dispatching tasks, referenced until done so they are not garbage collected
+		self._tasks = set()
+		self._batches = 0
+		self._loads = 0
+
+	@property
+	def stats(self):
+		return {'loads': self._loads, 'batches': self._batches}
+
+	async def load(self, key):
+		loop = asyncio.get_event_loop()
+		self._loads += 1
+		if self._batch is None:
+			self._batch = {}
+			self._timer = loop.call_later(self.window, self._flush)
+		future = self._batch.get(key)
+		if future is None:
+			future = self._batch[key] = loop.create_future()
+		if len(self._batch) >= self.max_batch:
+			self._timer.cancel()
+			self._flush()
+		return await asyncio.shield(future)
+
+	def _flush(self):
+		batch, self._batch = self._batch, None
+		if batch:
+			self._batches += 1
+			log.debug('Fetching a batch of %s', len(batch))
+			task = asyncio.ensure_future(self._dispatch(batch))
+			self._tasks.add(task)
+			task.add_done_callback(self._tasks.discard)
+
+	async def _dispatch(self, batch):
+		try:
+			items = await self.batch_function(list(batch))
+			_resolve(batch, items, self.key_of)
+		except Exception as e:
+			_fail(batch, e)
@@ -0,0 +1,78 @@
+"""
+Runs one endpoint function for many arguments concurrently.
+"""
+
+import asyncio
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+log = logging.getLogger('mattermostdriver.bulk')
+log.setLevel(logging.INFO)
+
+BulkResult = namedtuple('BulkResult', ['arguments', 'result', 'error'])
+BulkResult.__doc__ = """
+The outcome of one call of a bulk run.
+`error` holds the exception raised by the call, `result` is None then.
+"""
+
+
+def _as_arguments(arguments):
+	if isinstance(arguments, tuple):
+		return arguments
+	return (arguments,)
+
+
+def run_bulk(function, arguments, workers=8, progress=None):
+	"""
+	Calls `function` once for every item of `arguments` on a pool of `workers` threads.
+	A failing call does not stop the others.
+
+	:param function: The function to call, e.g. `driver.channels.add_user`
+	:param arguments: Iterable of argument tuples, a single argument does not need to be a tuple
+	:param workers: Number of calls running at the same time
+	:param progress: Called with the number of finished and total calls after every call
+	:return: A list of :class:`BulkResult`, in the order of `arguments`
+	"""
+	arguments = [_as_arguments(args) for args in arguments]
+	results = [None] * len(arguments)
+	with ThreadPoolExecutor(max_workers=workers) as executor:
+		futures = {
+			executor.submit(function, *args): index
+			for index, args in enumerate(arguments)
+		}
+		for done, future in enumerate(as_completed(futures), 1):
+			index = futures[future]
+			try:
+				results[index] = BulkResult(arguments[index], future.result(), None)
+			except Exception as e:
+				log.debug('Bulk call %s failed: %s', index, e)
+				results[index] = BulkResult(arguments[index], None, e)
+			if progress:
+				progress(done, len(arguments))
+	return results
+
+
+async def arun_bulk(function, arguments, workers=8, progress=None):
+	"""
+	Same as :func:`run_bulk` for coroutine functions, with at most
+	`workers` calls awaited at the same time.
+	"""
+	arguments = [_as_arguments(args) for args in arguments]
+	semaphore = asyncio.Semaphore(workers)
+	done = 0
+
+	async def call(args):
+		nonlocal done
+		async with semaphore:
+			try:
+				result = BulkResult(args, await function(*args), None)
+			except Exception as e:
+				log.debug('Bulk call with %s failed: %s', args, e)
+				result = BulkResult(args, None, e)
+		done += 1
+		if progress:
+			progress(done, len(arguments))
+		return result
+
+	return list(await asyncio.gather(*(call(args) for args in arguments)))
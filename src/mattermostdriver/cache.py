@@ -0,0 +1,207 @@
+"""
+A bounded cache for users, channels and teams, invalidated by websocket events.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from .codec import STDLIB
+
+log = logging.getLogger('mattermostdriver.cache')
+log.setLevel(logging.INFO)
+
+MISSING = object()
+
+# websocket event -> (kind of entity, key in the event data holding the entity or its id)
+INVALIDATING_EVENTS = {
+	'user_updated': ('user', 'user'),
+	'user_role_updated': ('user', 'user_id'),
+	'user_activation_status_change': ('user', 'user_id'),
+	'channel_updated': ('channel', 'channel'),
+	'channel_converted': ('channel', 'channel_id'),
+	'channel_deleted': ('channel', 'channel_id'),
+	'channel_restored': ('channel', 'channel_id'),
+	'update_team': ('team', 'team'),
+	'delete_team': ('team', 'team'),
+	'restore_team': ('team', 'team'),
+}
+
+
+def _entity_id(data, key, codec=STDLIB):
+	value = data.get(key)
+	if isinstance(value, str) and value.startswith('{'):
+		try:
+			value = codec.loads(value)
+		except ValueError:
+			return None
+	if isinstance(value, dict):
+		return value.get('id')
+	return value
+
+
+class EntityCache:
+	"""
+	A thread safe LRU cache where every entry expires after `ttl` seconds.
+
+	Entries are stored per kind of entity (user, channel, team) and lookup,
+	e.g. by id, by username or by name. All lookups of one entity are
+	dropped together when it is invalidated.
+	"""
+
+	def __init__(self, maxsize=1024, ttl=60, codec=STDLIB):
+		"""
+		:param maxsize: Maximum number of cached lookups
+		:param ttl: Seconds after which an entry is fetched again, None to keep entries until evicted
+		:param codec: The :class:`~mattermostdriver.codec.JSONCodec` decoding the entities in websocket events
+		"""
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self.codec = codec
+		self._lock = threading.Lock()
+		self._entries = OrderedDict()
+		self._keys_by_entity = {}
+		self._hits = 0
+		self._misses = 0
+		self._evictions = 0
+		self._invalidations = 0
+
+	@property
+	def stats(self):
+		"""
+		:return: A dict with the number of `hits`, `misses`, `evictions`, `invalidations`,
+			the current `size` and the `hit_ratio`
+		"""
+		with self._lock:
+			lookups = self._hits + self._misses
+			return {
+				'hits': self._hits,
+				'misses': self._misses,
+				'evictions': self._evictions,
+				'invalidations': self._invalidations,
+				'size': len(self._entries),
+				'hit_ratio': self._hits / lookups if lookups else 0.0,
+			}
+
+	def get(self, key):
+		"""
+		:param key: A tuple of the kind of entity, the lookup and its value, e.g. ``('user', 'username', 'john')``
+		:return: The cached entity, or :data:`MISSING`
+		"""
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+				self._entries.move_to_end(key)
+				self._hits += 1
+				return entry[0]
+			if entry is not None:
+				self._remove(key)
+			self._misses += 1
+			return MISSING
+
+	def put(self, key, value):
+		"""
+		Caches an entity returned by the server for `key`.
+		"""
+		entity_id = value.get('id') if isinstance(value, Mapping) else None
+		if entity_id is None:
+			return
+		entity = (key[0], entity_id)
+		expires = time.monotonic() + self.ttl if self.ttl is not None else None
+		with self._lock:
+			self._remove(key)
+			self._entries[key] = (value, expires, entity)
+			self._keys_by_entity.setdefault(entity, set()).add(key)
+			while len(self._entries) > self.maxsize:
+				self._remove(next(iter(self._entries)))
+				self._evictions += 1
+
+	def _remove(self, key):
+		entry = self._entries.pop(key, None)
+		if entry is None:
+			return
+		keys = self._keys_by_entity.get(entry[2])
+		if keys is not None:
+			keys.discard(key)
+			if not keys:
+				del self._keys_by_entity[entry[2]]
+
+	def invalidate(self, kind, entity_id):
+		"""
+		Drops every cached lookup of an entity.
+
+		:param kind: 'user', 'channel' or 'team'
+		:param entity_id: The id of the entity
+		"""
+		with self._lock:
+			keys = self._keys_by_entity.pop((kind, entity_id), ())
+			for key in keys:
+				self._entries.pop(key, None)
+			if keys:
+				self._invalidations += 1
+				log.debug('Invalidated %s %s', kind, entity_id)
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self._keys_by_entity.clear()
+
+	def handle_event(self, event):
+		"""
+		Invalidates the entity changed by a websocket event.
+
+		:param event: The parsed websocket event
+		"""
+		invalidates = INVALIDATING_EVENTS.get(event.get('event'))
+		if invalidates is None:
+			return
+		kind, data_key = invalidates
+		entity_id = _entity_id(event.get('data') or {}, data_key, self.codec)
+		if entity_id is None:
+			entity_id = (event.get('broadcast') or {}).get(kind + '_id')
+		if entity_id:
+			self.invalidate(kind, entity_id)
+
+
+def cached(cache, key, function, *args, **kwargs):
+	"""
+	Returns the entity cached for `key`, or calls `function` and caches its result.
+	"""
+	value = cache.get(key)
+	if value is MISSING:
+		value = function(*args, **kwargs)
+		cache.put(key, value)
+	return value
+
+
+async def acached(cache, key, function, *args, **kwargs):
+	"""
+	Same as :func:`cached` for coroutine functions.
+	"""
+	value = cache.get(key)
+	if value is MISSING:
+		value = await function(*args, **kwargs)
+		cache.put(key, value)
+	return value
+
+
+def invalidating(cache, entity, function, *args, **kwargs):
+	"""
+	Calls `function` changing an entity, and drops its cached lookups once it succeeded.
+
+	:param entity: A tuple of the kind of entity and its id, e.g. ``('channel', channel_id)``
+	"""
+	result = function(*args, **kwargs)
+	cache.invalidate(*entity)
+	return result
+
+
+async def ainvalidating(cache, entity, function, *args, **kwargs):
+	"""
+	Same as :func:`invalidating` for coroutine functions.
+	"""
+	result = await function(*args, **kwargs)
+	cache.invalidate(*entity)
+	return result
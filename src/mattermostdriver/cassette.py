@@ -0,0 +1,505 @@
+"""
+Recording requests and websocket sessions to a cassette file, to replay them without a server.
+
+A cassette records every response with its headers, body and timing, and the messages
+received over websockets. Replaying it answers the same requests from the file,
+at full speed or with the timing of the recording, so handlers can be benchmarked
+against real traffic and slow responses reproduced offline.
+
+The file has one JSON object per line, compressed if its name ends with ``.gz``.
+Authorization headers, cookies, passwords and tokens in request bodies and created
+access tokens are redacted, the messages sent over websockets (including the
+authentication challenge) are not recorded.
+"""
+
+import asyncio
+import base64
+import collections
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import weakref
+import time
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+log = logging.getLogger('mattermostdriver.cassette')
+log.setLevel(logging.INFO)
+
+RECORD = 'record'
+REPLAY = 'replay'
+MODES = (RECORD, REPLAY)
+
+# Headers whose values are not written to the cassette
+REDACTED_HEADERS = ('authorization', 'cookie', 'set-cookie', 'token')
+# Fields of JSON request bodies whose values are not written to the cassette,
+# e.g. of /users/login or /users/{id}/tokens
+REDACTED_FIELDS = ('password', 'current_password', 'new_password', 'token', 'mfa_token')
+# Paths of responses holding a secret in their `token` field, the created access tokens
+_TOKEN_RESPONSES = re.compile(r'/users/[^/]+/tokens$')
+# The body of a response is stored decoded, so these do not apply when replaying it
+_DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+# The cassettes in use by path, so clients recording to the same file share it
+_CASSETTES = weakref.WeakValueDictionary()
+_CASSETTES_LOCK = threading.Lock()
+
+
+class RecordingNotFound(LookupError):
+	"""
+	Raised when replaying a request which is not in the cassette.
+	"""
+
+
+def _open(path, mode):
+	if path.endswith('.gz'):
+		return gzip.open(path, mode + 't', encoding='utf8')
+	return open(path, mode, encoding='utf8')
+
+
+def _encode(data, name):
+	"""
+	:return: A dict with `data` as text in `name`, or base64 encoded in `name64` if it is binary
+	"""
+	if data is None:
+		return {}
+	if isinstance(data, str):
+		return {name: data}
+	try:
+		return {name: data.decode('utf8')}
+	except UnicodeDecodeError:
+		return {name + '64': base64.b64encode(data).decode('ascii')}
+
+
+def _decode(record, name):
+	if name in record:
+		return record[name].encode('utf8')
+	if name + '64' in record:
+		return base64.b64decode(record[name + '64'])
+	return None
+
+
+def _headers(headers, drop=()):
+	return {
+		name: 'REDACTED' if name.lower() in REDACTED_HEADERS else value
+		for name, value in headers.items() if name.lower() not in drop
+	}
+
+
+def _redact(body, fields):
+	"""
+	:return: A JSON body with the values of `fields` replaced, in objects and lists of objects,
+		or the body as it is if it is not JSON
+	"""
+	if not body:
+		return body
+	try:
+		data = json.loads(body)
+	except (ValueError, UnicodeDecodeError):
+		return body
+	items = data if isinstance(data, list) else [data]
+	redacted = False
+	for item in items:
+		if not isinstance(item, dict):
+			continue
+		for field in fields:
+			if field in item:
+				item[field] = 'REDACTED'
+				redacted = True
+	if not redacted:
+		return body
+	return json.dumps(data).encode('utf8')
+
+
+def _redact_request(body):
+	if isinstance(body, str):
+		body = body.encode('utf8')
+	return _redact(body, REDACTED_FIELDS)
+
+
+def _redact_response(url, body):
+	if _TOKEN_RESPONSES.search(urlsplit(url).path.rstrip('/')):
+		return _redact(body, ('token',))
+	return body
+
+
+def _key(method, url, byte_range=None, body=None, match_body=False):
+	"""
+	Requests are matched by method, path, query and range, independent of the server
+	they were sent to and of the order of the query parameters.
+	"""
+	parts = urlsplit(url)
+	query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+	key = (method.upper(), parts.path, query, byte_range)
+	if match_body:
+		key += (hashlib.sha1(body).hexdigest() if body is not None else None,)
+	return key
+
+
+def _connection_closed():
+	from websockets.exceptions import ConnectionClosed
+	try:
+		return ConnectionClosed(None, None)
+	except TypeError:
+		# websockets before 10 takes the close code and reason
+		return ConnectionClosed(1000, '')
+
+
+class Cassette:
+	"""
+	Records the responses to the requests of a client and the messages of its websockets
+	to a file, or replays them from there.
+
+	Set the `cassette` option of the driver to its path, and `cassette_mode` to 'record'
+	or 'replay'. Recording starts a new file. When replaying, a request recorded several
+	times gets the recorded responses in turn. A request which was not recorded raises
+	:class:`RecordingNotFound`, and the websocket returns after the recorded sessions.
+	"""
+
+	def __init__(self, path, mode=REPLAY, timing=0, match_body=False):
+		"""
+		:param path: The file to record to or replay from
+		:param mode: 'record' or 'replay'
+		:param timing: Share of the recorded response times and websocket message
+			intervals to wait when replaying, 0 for full speed and 1 for the original timing
+		:param match_body: Match requests by their body as well, e.g. for searches
+		"""
+		if mode not in MODES:
+			raise ValueError('Unknown cassette mode {mode}, use one of {modes}'.format(
+				mode=mode,
+				modes=', '.join(MODES)
+			))
+		self.path = path
+		self.mode = mode
+		self.timing = timing
+		self.match_body = match_body
+		self._lock = threading.Lock()
+		self._started = time.monotonic()
+		self._file = None
+		self._opened = False
+		self._responses = {}
+		self._positions = {}
+		self._sessions = collections.deque()
+		self._websockets = 0
+		self._stats = {'recorded': 0, 'replayed': 0, 'missed': 0, 'websocket_sessions': 0}
+		if mode == REPLAY:
+			self._load()
+
+	@property
+	def recording(self):
+		return self.mode == RECORD
+
+	@property
+	def stats(self):
+		"""
+		:return: The responses `recorded`, `replayed` and `missed` because they were not recorded,
+			and the `websocket_sessions` recorded or replayed
+		"""
+		with self._lock:
+			return dict(self._stats)
+
+	def close(self):
+		"""
+		Closes the file recorded to. Recording again appends to it.
+		"""
+		with self._lock:
+			if self._file is not None:
+				self._file.close()
+				self._file = None
+
+	def _write(self, record):
+		record['at'] = round(time.monotonic() - self._started, 6)
+		line = json.dumps(record, separators=(',', ':')) + '\n'
+		with self._lock:
+			if self._file is None:
+				# The first write starts a new recording
+				self._file = _open(self.path, 'a' if self._opened else 'w')
+				self._opened = True
+			self._file.write(line)
+			self._file.flush()
+
+	def _load(self):
+		sessions = collections.OrderedDict()
+		with _open(self.path, 'r') as fileobj:
+			for line in fileobj:
+				if not line.strip():
+					continue
+				record = json.loads(line)
+				if record['type'] == 'http':
+					key = _key(
+						record['method'], record['url'], record.get('range'),
+						_decode(record, 'request_body'), self.match_body
+					)
+					self._responses.setdefault(key, []).append(record)
+				elif record['type'] == 'websocket':
+					sessions[record['session']] = collections.deque()
+				elif record['type'] == 'message':
+					sessions[record['session']].append(record)
+		self._sessions.extend(sessions.values())
+
+	# Requests
+
+	def _record(self, method, url, request_headers, request_body, status, reason, headers, body, elapsed):
+		record = {
+			'type': 'http',
+			'method': method.upper(),
+			'url': url,
+			'range': request_headers.get('Range'),
+			'request_headers': _headers(request_headers),
+			'status': status,
+			'reason': reason,
+			'headers': _headers(headers, _DROPPED_HEADERS),
+			'elapsed': round(elapsed, 6),
+		}
+		record.update(_encode(_redact_request(request_body), 'request_body'))
+		record.update(_encode(_redact_response(url, body), 'body'))
+		self._write(record)
+		with self._lock:
+			self._stats['recorded'] += 1
+
+	def _find(self, method, url, headers, body):
+		"""
+		:return: The next recorded response to the request
+		:raises RecordingNotFound: If the request was not recorded
+		"""
+		# Matched against the recorded body, which has its credentials redacted
+		body = _redact_request(body) if isinstance(body, bytes) else None
+		key = _key(method, url, headers.get('Range'), body, self.match_body)
+		with self._lock:
+			records = self._responses.get(key)
+			if not records:
+				self._stats['missed'] += 1
+				raise RecordingNotFound('{method} {url} is not in the cassette {path}'.format(
+					method=method.upper(), url=url, path=self.path))
+			position = self._positions.get(key, 0)
+			self._positions[key] = position + 1
+			self._stats['replayed'] += 1
+			return records[position % len(records)]
+
+	def _response_of(self, record):
+		body = _decode(record, 'body') or b''
+		headers = dict(record['headers'])
+		headers['Content-Length'] = str(len(body))
+		return headers, body
+
+	def adapter(self, adapter):
+		"""
+		:param adapter: The adapter of a :class:`requests.Session` sending the requests when recording
+		:return: The adapter recording or replaying the requests of the session
+		"""
+		if self.recording:
+			return _RecordingAdapter(self, adapter)
+		return _ReplayAdapter(self)
+
+	def async_transport(self, httpx, transport=None):
+		"""
+		:param httpx: The httpx module
+		:param transport: The transport sending the requests when recording
+		:return: The transport of a :class:`httpx.AsyncClient` recording or replaying its requests
+		"""
+		return _AsyncTransport(self, httpx, transport)
+
+	# Websockets
+
+	def record_websocket(self, url, websocket):
+		"""
+		:return: The websocket, recording the messages received
+		"""
+		with self._lock:
+			self._websockets += 1
+			session = self._websockets
+			self._stats['websocket_sessions'] += 1
+		self._write({'type': 'websocket', 'session': session, 'url': url.split('?', 1)[0]})
+		return _RecordingWebsocket(self, session, websocket)
+
+	def replay_websocket(self):
+		"""
+		:return: A websocket receiving the messages of the next recorded session,
+			or None if all were replayed
+		"""
+		with self._lock:
+			if not self._sessions:
+				return None
+			self._stats['websocket_sessions'] += 1
+			return _ReplayWebsocket(self._sessions.popleft(), self.timing)
+
+
+def get_cassette(cassette, mode=REPLAY, timing=0):
+	"""
+	:param cassette: The path of the cassette, or a :class:`Cassette`
+	:return: The :class:`Cassette`, the same for every client using the same path, mode and timing
+	"""
+	if isinstance(cassette, Cassette):
+		return cassette
+	key = (os.path.abspath(cassette), mode, timing)
+	with _CASSETTES_LOCK:
+		found = _CASSETTES.get(key)
+		if found is None:
+			found = _CASSETTES[key] = Cassette(cassette, mode, timing)
+		return found
+
+
+class _RecordingAdapter(BaseAdapter):
+	def __init__(self, cassette, adapter):
+		super().__init__()
+		self.cassette = cassette
+		self.adapter = adapter
+
+	def send(self, request, **kwargs):
+		started = time.monotonic()
+		response = self.adapter.send(request, **kwargs)
+		# Reads the body, a streamed response is passed on from memory then
+		body = response.content
+		self.cassette._record(
+			request.method, request.url, request.headers,
+			request.body if isinstance(request.body, (bytes, str)) else None,
+			response.status_code, response.reason, response.headers, body,
+			time.monotonic() - started
+		)
+		return response
+
+	def close(self):
+		self.adapter.close()
+
+
+class _ReplayAdapter(BaseAdapter):
+	def __init__(self, cassette):
+		super().__init__()
+		self.cassette = cassette
+
+	def send(self, request, **kwargs):
+		body = request.body.encode('utf8') if isinstance(request.body, str) else request.body
+		record = self.cassette._find(request.method, request.url, request.headers, body)
+		if self.cassette.timing:
+			time.sleep(record['elapsed'] * self.cassette.timing)
+		headers, content = self.cassette._response_of(record)
+		response = requests.Response()
+		response.status_code = record['status']
+		response.reason = record.get('reason') or ''
+		response.headers = CaseInsensitiveDict(headers)
+		response.encoding = get_encoding_from_headers(response.headers)
+		response._content = content
+		response._content_consumed = True
+		response.url = request.url
+		response.request = request
+		response.connection = self
+		return response
+
+	def close(self):
+		pass
+
+
+class _AsyncTransport:
+	"""
+	A transport of httpx 0.20 or later, recording the responses of another transport or replaying them.
+	"""
+
+	def __init__(self, cassette, httpx, transport=None):
+		self.cassette = cassette
+		self.httpx = httpx
+		self.transport = transport
+
+	def _request_body(self, request):
+		try:
+			return request.content
+		except self.httpx.RequestNotRead:
+			# A streamed upload
+			return None
+
+	async def handle_async_request(self, request):
+		if self.cassette.recording:
+			return await self._record(request)
+		record = self.cassette._find(request.method, str(request.url), request.headers, self._request_body(request))
+		if self.cassette.timing:
+			await asyncio.sleep(record['elapsed'] * self.cassette.timing)
+		headers, content = self.cassette._response_of(record)
+		return self.httpx.Response(record['status'], headers=headers, content=content, request=request)
+
+	async def _record(self, request):
+		started = time.monotonic()
+		response = await self.transport.handle_async_request(request)
+		try:
+			body = await response.aread()
+		finally:
+			await response.aclose()
+		self.cassette._record(
+			request.method, str(request.url), request.headers, self._request_body(request),
+			response.status_code, response.reason_phrase, response.headers, body,
+			time.monotonic() - started
+		)
+		headers = [(name, value) for name, value in response.headers.multi_items() if name.lower() not in _DROPPED_HEADERS]
+		return self.httpx.Response(
+			response.status_code, headers=headers, content=body,
+			request=request, extensions=response.extensions
+		)
+
+	async def aclose(self):
+		if self.transport is not None:
+			await self.transport.aclose()
+
+
+class _RecordingWebsocket:
+	"""
+	Passes everything on to the websocket, recording the messages received.
+	"""
+
+	def __init__(self, cassette, session, websocket):
+		self._cassette = cassette
+		self._session = session
+		self._websocket = websocket
+
+	async def recv(self):
+		message = await self._websocket.recv()
+		record = {'type': 'message', 'session': self._session}
+		record.update(_encode(message, 'data') if isinstance(message, bytes) else {'data': message})
+		self._cassette._write(record)
+		return message
+
+	def __getattr__(self, name):
+		return getattr(self._websocket, name)
+
+
+class _ReplayWebsocket:
+	"""
+	Receives the messages of a recorded session, then closes.
+	"""
+
+	def __init__(self, messages, timing):
+		self._messages = messages
+		self._timing = timing
+		self._started = None
+		self._first = None
+
+	async def recv(self):
+		if not self._messages:
+			raise _connection_closed()
+		record = self._messages.popleft()
+		if self._timing:
+			now = time.monotonic()
+			if self._started is None:
+				self._started, self._first = now, record['at']
+			delay = (record['at'] - self._first) * self._timing - (now - self._started)
+			if delay > 0:
+				await asyncio.sleep(delay)
+		return record['data'] if 'data' in record else _decode(record, 'data')
+
+	async def send(self, message):
+		pass
+
+	async def ping(self, data=None):
+		pass
+
+	async def pong(self, data=b''):
+		pass
+
+	async def close(self, code=1000, reason=''):
+		self._messages.clear()
@@ -3,8 +3,18 @@ Client for the driver, which holds information about the logged in user
 and actually makes the requests to the mattermost server
 """
 
+import asyncio
+import importlib
 import logging
+import threading
+import time
+from collections.abc import Mapping
+from urllib.parse import urlsplit
+
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
 
 from .exceptions import (
 	InvalidOrMissingParameters,
@@ -13,26 +23,39 @@ from .exceptions import (
 	ResourceNotFound,
 	MethodNotAllowed,
 	ContentTooLarge,
+	TooManyRequests,
 	FeatureDisabled
 )
+from .batching import BatchLoader, AsyncBatchLoader
+from .cache import EntityCache
+from .codec import get_codec
+from .compression import accept_encoding
+from .metrics import Metrics, RequestInfo, endpoint_template
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .singleflight import SingleFlight, AsyncSingleFlight, request_key
 
 log = logging.getLogger('mattermostdriver.websocket')
 log.setLevel(logging.INFO)
 
 
-class Client:
+class BaseClient:
+	"""
+	Holds the information about the logged in user and everything
+	needed to build a request, independent of the http library used.
+	"""
+
+	batch_loader_cls = BatchLoader
+
 	def __init__(self, options):
-		self._url = '{scheme:s}://{url:s}:{port:d}{basepath:s}'.format(
-			scheme=options['scheme'],
-			url=options['url'],
-			port=options['port'],
-			basepath=options['basepath']
-		)
+		self._url = self._make_url(options, options['basepath'])
 		self._scheme = options['scheme']
 		self._basepath = options['basepath']
 		self._port = options['port']
 		self._verify = options['verify']
 		self._auth = options['auth']
+		self._codec = get_codec(options.get('json_codec', 'json'))
+		self._accept_encoding = accept_encoding(options.get('compression', True))
 		if options['debug']:
 			self.activate_verbose_logging()
 
@@ -41,6 +64,72 @@ class Client:
 		self._cookies = None
 		self._userid = ''
 		self._username = ''
+		self._rate_limiter = None
+		if options.get('rate_limit', True):
+			self._rate_limiter = RateLimiter(
+				options.get('rate_limit_per_second'),
+				options.get('rate_limit_burst')
+			)
+		self._retry_policy = None
+		if options.get('retries', 3):
+			self._retry_policy = RetryPolicy(
+				retries=options.get('retries', 3),
+				backoff=options.get('retry_backoff', 0.5),
+				backoff_max=options.get('retry_backoff_max', 30),
+				jitter=options.get('retry_jitter', True),
+				retry_post=options.get('retry_post', False)
+			)
+		self._batch_loaders = {}
+		self._batch_loaders_lock = threading.Lock()
+		self._cache = None
+		if options.get('cache', False):
+			self._cache = EntityCache(options.get('cache_size', 1024), options.get('cache_ttl', 60), self._codec)
+		self._upload_cache = None
+		if options.get('upload_cache', False):
+			self._upload_cache = EntityCache(options.get('upload_cache_size', 256), options.get('upload_cache_ttl', 3600))
+		self._http_cache = None
+		if options.get('http_cache', False):
+			self._http_cache = self._create_http_cache(options)
+		self._cassette = None
+		if options.get('cassette'):
+			self._cassette = self._create_cassette(options)
+		self._hooks = {'before_request': [], 'after_response': [], 'on_error': []}
+		self._metrics = Metrics() if options.get('metrics', True) else None
+		self._to_models = self._models_converter(options)
+
+	@staticmethod
+	def _make_url(options, basepath):
+		return '{scheme:s}://{url:s}:{port:d}{basepath:s}'.format(
+			scheme=options['scheme'],
+			url=options['url'],
+			port=options['port'],
+			basepath=basepath
+		)
+
+	@staticmethod
+	def _create_http_cache(options):
+		from .httpcache import create_http_cache
+		return create_http_cache(
+			options['http_cache'],
+			directory=options.get('http_cache_dir'),
+			maxsize=options.get('http_cache_size')
+		)
+
+	@staticmethod
+	def _models_converter(options):
+		if not options.get('models', False):
+			return None
+		from .models import to_models
+		return to_models
+
+	@staticmethod
+	def _create_cassette(options):
+		from .cassette import get_cassette
+		return get_cassette(
+			options['cassette'],
+			mode=options.get('cassette_mode', 'replay'),
+			timing=options.get('cassette_timing', 0)
+		)
 
 	@staticmethod
 	def activate_verbose_logging(level=logging.DEBUG):
@@ -85,6 +174,159 @@ class Client:
 	def url(self):
 		return self._url
 
+	@property
+	def rate_limiter(self):
+		"""
+		The :class:`~mattermostdriver.ratelimit.RateLimiter` pacing the requests.
+		Assign the limiter of another client to share it between clients.
+
+		:return: The rate limiter, or None if rate limiting is disabled
+		"""
+		return self._rate_limiter
+
+	@rate_limiter.setter
+	def rate_limiter(self, rate_limiter):
+		self._rate_limiter = rate_limiter
+
+	@property
+	def retry_policy(self):
+		"""
+		The :class:`~mattermostdriver.retry.RetryPolicy` deciding which failed requests are sent again.
+		Its `stats` count the retries made.
+
+		:return: The retry policy, or None if retrying is disabled
+		"""
+		return self._retry_policy
+
+	@retry_policy.setter
+	def retry_policy(self, retry_policy):
+		self._retry_policy = retry_policy
+
+	@property
+	def cache(self):
+		"""
+		The :class:`~mattermostdriver.cache.EntityCache` serving the getters of
+		users, channels and teams. Its `stats` count hits and misses.
+
+		:return: The cache, or None if caching is disabled
+		"""
+		return self._cache
+
+	@property
+	def upload_cache(self):
+		"""
+		The :class:`~mattermostdriver.cache.EntityCache` remembering the file infos of uploaded files
+		by channel, filename and content hash, to skip uploading them again.
+
+		:return: The cache, or None if disabled
+		"""
+		return self._upload_cache
+
+	@property
+	def http_cache(self):
+		"""
+		The :class:`~mattermostdriver.httpcache.HTTPCache` keeping the responses with an ETag,
+		to answer GET requests from it when the server responds with 304 Not Modified.
+		Its `stats` count the hits and the bytes saved.
+
+		:return: The http cache, or None if disabled
+		"""
+		return self._http_cache
+
+	@property
+	def single_flight(self):
+		"""
+		Coalesces identical GET requests in flight at the same time into one.
+		Its `stats` count the requests made and shared.
+
+		:return: The :class:`~mattermostdriver.singleflight.SingleFlight`, or None if disabled
+		"""
+		return self._single_flight
+
+	@property
+	def cassette(self):
+		"""
+		The :class:`~mattermostdriver.cassette.Cassette` recording the responses
+		to the requests and the websocket messages, or replaying them instead of sending requests.
+
+		:return: The cassette, or None if disabled
+		"""
+		return self._cassette
+
+	@property
+	def hooks(self):
+		"""
+		Lists of functions called around every request sent, including retries:
+
+		- ``before_request(request)`` before it is sent
+		- ``after_response(request, response)`` when a response arrived, also for error status codes
+		- ``on_error(request, error)`` when it failed without a response, e.g. on a timeout
+
+		`request` is a :class:`~mattermostdriver.metrics.RequestInfo`.
+		Exceptions raised by a hook are not caught.
+
+		:return: The dict of the lists by name
+		"""
+		return self._hooks
+
+	@property
+	def metrics(self):
+		"""
+		The :class:`~mattermostdriver.metrics.Metrics` counting the requests
+		and their latency per method, endpoint and status code.
+
+		:return: The metrics, or None if disabled
+		"""
+		return self._metrics
+
+	@property
+	def codec(self):
+		"""
+		:return: The :class:`~mattermostdriver.codec.JSONCodec` encoding and decoding JSON
+		"""
+		return self._codec
+
+	def parse_json(self, response):
+		"""
+		Decodes the body of a response with the json codec.
+
+		:raises ValueError: If the body is not valid JSON
+		"""
+		return self._codec.loads(response.content)
+
+	def as_models(self, endpoint, result):
+		"""
+		Converts the users, channels, teams, posts, reactions and file infos returned
+		by an endpoint to :mod:`~mattermostdriver.models`, if the `models` option is set.
+
+		:param endpoint: The endpoint requested
+		:param result: The decoded response
+		"""
+		if self._to_models is None or not isinstance(result, (dict, list)):
+			return result
+		return self._to_models(endpoint, result, self._codec)
+
+	def batch_loader(self, name, batch_function, key_of):
+		"""
+		Returns the batch loader with the given name, creating it on first use.
+		Every endpoint instance of this client shares the same loaders.
+
+		:param name: Name of the loader, e.g. 'users_by_ids'
+		:param batch_function: Fetches the items for a list of keys
+		:param key_of: Returns the key of an item returned by `batch_function`
+		:return: Instance of :class:`~mattermostdriver.batching.BatchLoader`
+		"""
+		with self._batch_loaders_lock:
+			loader = self._batch_loaders.get(name)
+			if loader is None:
+				loader = self._batch_loaders[name] = self.batch_loader_cls(
+					batch_function,
+					key_of,
+					window=self._options.get('batch_window', 0.002),
+					max_batch=self._options.get('batch_size', 100)
+				)
+			return loader
+
 	@property
 	def cookies(self):
 		"""
@@ -113,7 +355,7 @@ class Client:
 			return {}
 		return {"Authorization": "Bearer {token:s}".format(token=self._token)}
 
-	def make_request(self, method, endpoint, options=None, params=None, data=None, files=None, basepath=None):
+	def _build_request(self, endpoint, options, params, data, basepath):
 		if options is None:
 			options = {}
 		if params is None:
@@ -121,82 +363,499 @@ class Client:
 		if data is None:
 			data = {}
 		if basepath:
-			url = '{scheme:s}://{url:s}:{port:d}{basepath:s}'.format(
-				scheme=self._options['scheme'],
-				url=self._options['url'],
-				port=self._options['port'],
-				basepath=basepath
-			)
+			url = self._make_url(self._options, basepath)
 		else:
 			url = self.url
+		return url + endpoint, options, params, data
+
+	def _encode_body(self, options, data, files, headers=None):
+		"""
+		Encodes `options` as json body with the json codec, unless form data or files are sent.
+		`data` which is not a dict is sent as body as it is, e.g. a
+		:class:`~mattermostdriver.uploads.MultipartEncoder`.
+
+		:param headers: Additional headers of the request
+		:return: The body or None, and the headers of the request
+		"""
+		headers = dict(self.auth_header() or {}, **(headers or {}))
+		if files or (data and isinstance(data, dict)):
+			return None, headers
+		if data:
+			return data, headers
+		headers['Content-Type'] = 'application/json'
+		if isinstance(options, Mapping) and not isinstance(options, dict):
+			# A model returned by the server, sent back e.g. to update it
+			options = dict(options)
+		return self._codec.dumps(options).encode('utf8'), headers
+
+	def _cached_entry(self, method, url, params, headers, stream):
+		"""
+		:return: The key of a GET request in the http cache and the entry to revalidate or None,
+			or None and None if the request is not cached
+		"""
+		# Streamed downloads and requests with own headers, e.g. a Range, are not cached
+		if self._http_cache is None or method != 'get' or stream or headers:
+			return None, None
+		key = self._http_cache.key(url, params, self.auth_header())
+		return key, self._http_cache.get(key)
+
+	def _start_request(self, method, url):
+		path = urlsplit(url).path
+		if path.startswith(self._basepath):
+			path = path[len(self._basepath):]
+		request = RequestInfo(method.upper(), url, endpoint_template(path), time.monotonic())
+		for hook in self._hooks['before_request']:
+			hook(request)
+		return request
+
+	def _finish_request(self, request, response):
+		if self._metrics is not None:
+			self._metrics.record_response(request, response.status_code)
+		for hook in self._hooks['after_response']:
+			hook(request, response)
+
+	def _fail_request(self, request, error):
+		if self._metrics is not None:
+			self._metrics.record_error(request, error)
+		for hook in self._hooks['on_error']:
+			hook(request, error)
+
+	def count_transfer(self, response, decoded):
+		"""
+		Counts the bytes of a response body as received and after decompression in the metrics.
+		Done for every response read by the client, streamed responses are counted by their reader.
+
+		:param decoded: Bytes of the decoded body read
+		"""
+		if self._metrics is None:
+			return
+		wire = self._wire_size(response)
+		self._metrics.record_transfer(
+			response.headers.get('Content-Encoding', 'identity'),
+			decoded if wire is None else wire,
+			decoded
+		)
+
+	def _wire_size(self, response):
+		"""
+		:return: The bytes of the body received so far, or None if unknown
+		"""
+		raise NotImplementedError
+
+	def _rate_limit_delay(self):
+		if self._rate_limiter is None:
+			return 0
+		return self._rate_limiter.reserve()
+
+	def _update_rate_limit(self, response):
+		if self._rate_limiter is None:
+			return
+		self._rate_limiter.update(response.headers)
+		if response.status_code == 429:
+			retry_after = response.headers.get('Retry-After') or response.headers.get('X-RateLimit-Reset')
+			try:
+				retry_after = float(retry_after)
+			except (TypeError, ValueError):
+				retry_after = 1
+			self._rate_limiter.retry_after(retry_after)
+
+	def _should_retry(self, method, attempt, once, status_code=None, error=None):
+		# Uploaded files and streamed bodies can not be rewound, so these requests are never sent twice
+		if self._retry_policy is None or once:
+			return False
+		return self._retry_policy.should_retry(method, attempt, status_code=status_code, error=error)
+
+	def _error_message(self, response):
+		try:
+			data = self.parse_json(response)
+			message = data.get('message', data)
+		except ValueError:
+			log.debug('Could not convert response to json')
+			message = response.text
+		log.error(message)
+		return message
+
+	@staticmethod
+	def _raise_for_status_code(status_code, message):
+		"""
+		Raises the exception matching a mattermost error status code.
+		Returns if there is no specific exception for the status code.
+		"""
+		if status_code == 400:
+			raise InvalidOrMissingParameters(message)
+		elif status_code == 401:
+			raise NoAccessTokenProvided(message)
+		elif status_code == 403:
+			raise NotEnoughPermissions(message)
+		elif status_code == 404:
+			raise ResourceNotFound(message)
+		elif status_code == 405:
+			raise MethodNotAllowed(message)
+		elif status_code == 413:
+			raise ContentTooLarge(message)
+		elif status_code == 429:
+			raise TooManyRequests(message)
+		elif status_code == 501:
+			raise FeatureDisabled(message)
+
+	def _parse_get_response(self, response):
+		if response.headers.get('Content-Type') != 'application/json':
+			log.debug('Response is not application/json, returning raw response')
+			return response
+
+		try:
+			return self.parse_json(response)
+		except ValueError:
+			log.debug('Could not convert response to json, returning raw response')
+			return response
+
+
+class Client(BaseClient):
+	def __init__(self, options):
+		super().__init__(options)
+		self._session = None
+		self._owns_session = True
+		self._session_lock = threading.Lock()
+		self._single_flight = SingleFlight() if options.get('coalesce_requests', True) else None
+
+	def _create_session(self):
+		session = requests.Session()
+		adapter = HTTPAdapter(
+			pool_connections=self._options.get('pool_connections', 10),
+			pool_maxsize=self._options.get('pool_maxsize', 10),
+			pool_block=self._options.get('pool_block', False)
+		)
+		if self._cassette is not None:
+			adapter = self._cassette.adapter(adapter)
+		session.mount('http://', adapter)
+		session.mount('https://', adapter)
+		if not self._options.get('keepalive', True):
+			session.headers['Connection'] = 'close'
+		session.headers['Accept-Encoding'] = self._accept_encoding
+		return session
+
+	@property
+	def session(self):
+		"""
+		The pooled session all requests of this client are sent through.
+		It is created on first use and shared by every endpoint.
+
+		A session assigned here can be shared with other clients,
+		e.g. of the same server. It is not closed by :meth:`close`.
+
+		:return: The :class:`requests.Session` of this client
+		"""
+		if self._session is None:
+			with self._session_lock:
+				if self._session is None:
+					self._session = self._create_session()
+		return self._session
+
+	@session.setter
+	def session(self, session):
+		with self._session_lock:
+			self._session = session
+			self._owns_session = False
+
+	def close(self):
+		"""
+		Closes the pooled session and all its connections.
+		A new session will be created if the client is used again.
+		"""
+		with self._session_lock:
+			if not self._owns_session:
+				return
+			session, self._session = self._session, None
+		if session is not None:
+			session.close()
+
+	def _send(self, method, url, options, params, data, files, headers=None, stream=False):
+		delay = self._rate_limit_delay()
+		if delay:
+			time.sleep(delay)
+		body, headers = self._encode_body(options, data, files, headers)
+		request = self._start_request(method, url)
+		try:
+			response = self.session.request(
+					method,
+					url,
+					headers=headers,
+					auth=self._auth() if self._auth else None,
+					verify=self._verify,
+					params=params,
+					data=body if body is not None else data,
+					files=files,
+					timeout=self.request_timeout,
+					stream=stream
+				)
+		except Exception as e:
+			self._fail_request(request, e)
+			raise
+		self._finish_request(request, response)
+		if not stream:
+			self.count_transfer(response, len(response.content))
+		self._update_rate_limit(response)
+		return response
+
+	def make_request(
+			self, method, endpoint, options=None, params=None, data=None, files=None, basepath=None,
+			headers=None, stream=False):
+		"""
+		:param headers: Additional headers of the request, e.g. a Range
+		:param stream: Return before the body is read, to read it with ``response.iter_content()``.
+			The response has to be closed then.
+		"""
+		url, options, params, data = self._build_request(endpoint, options, params, data, basepath)
 		method = method.lower()
-		request = requests.get
-		if method == 'post':
-			request = requests.post
-		elif method == 'put':
-			request = requests.put
-		elif method == 'delete':
-			request = requests.delete
-
-		response = request(
-				url + endpoint,
-				headers=self.auth_header(),
-				auth = self._auth(),
-				verify=self._verify,
-				json=options,
+		once = files or not isinstance(data, dict)
+		key, entry = self._cached_entry(method, url, params, headers, stream)
+		if entry is not None:
+			headers = {'If-None-Match': entry.etag}
+
+		attempt = 0
+		while True:
+			try:
+				response = self._send(method, url, options, params, data, files, headers, stream)
+			except (requests.ConnectionError, requests.Timeout) as e:
+				if not self._should_retry(method, attempt, once, error=e):
+					raise
+				time.sleep(self._retry_policy.delay(attempt))
+			else:
+				if not self._should_retry(method, attempt, once, status_code=response.status_code):
+					break
+				response.close()
+				time.sleep(self._retry_policy.delay(attempt, response.headers.get('Retry-After')))
+			attempt += 1
+
+		if key is not None:
+			response = self._revalidated(key, entry, response)
+
+		try:
+			response.raise_for_status()
+		except requests.HTTPError as e:
+			message = self._error_message(e.response)
+			self._raise_for_status_code(e.response.status_code, message)
+			raise
+
+		log.debug(response)
+		return response
+
+	def _wire_size(self, response):
+		# The urllib3 response counts the bytes read before decoding them
+		tell = getattr(response.raw, 'tell', None)
+		return tell() if tell is not None else None
+
+	def _revalidated(self, key, entry, response):
+		cached = self._http_cache.revalidated(
+			key, entry, response.status_code, response.headers, lambda: response.content)
+		if cached is None:
+			return response
+		response.close()
+		not_modified, response = response, requests.Response()
+		response.status_code = 200
+		response.reason = 'OK'
+		response.headers = CaseInsensitiveDict(cached.headers)
+		response.encoding = get_encoding_from_headers(response.headers)
+		response._content = cached.body
+		response.url = not_modified.url
+		response.request = not_modified.request
+		response.elapsed = not_modified.elapsed
+		return response
+
+	def get(self, endpoint, options=None, params=None):
+		if self._single_flight is None:
+			response = self.make_request('get', endpoint, options=options, params=params)
+		else:
+			# Only the response is shared, every caller decodes a result of its own it may modify
+			response = self._single_flight.do(
+				request_key(endpoint, options, params),
+				self.make_request, 'get', endpoint, options=options, params=params
+			)
+		return self.as_models(endpoint, self._parse_get_response(response))
+
+	def post(self, endpoint, options=None, params=None, data=None, files=None, headers=None):
+		response = self.make_request(
+			'post', endpoint, options=options, params=params, data=data, files=files, headers=headers)
+		return self.as_models(endpoint, self.parse_json(response))
+
+	def put(self, endpoint, options=None, params=None, data=None):
+		response = self.make_request('put', endpoint, options=options, params=params, data=data)
+		return self.as_models(endpoint, self.parse_json(response))
+
+	def delete(self, endpoint, options=None, params=None, data=None):
+		response = self.make_request('delete', endpoint, options=options, params=params, data=data)
+		return self.parse_json(response)
+
+
+class AsyncClient(BaseClient):
+	"""
+	Makes the requests without blocking the event loop.
+	Needs the optional dependency `httpx` (``pip install mattermostdriver[async]``).
+
+	The `auth` option has to be a :class:`httpx.Auth` class here.
+	"""
+
+	batch_loader_cls = AsyncBatchLoader
+
+	def __init__(self, options):
+		try:
+			# Imported here, so only users of the AsyncClient pay for importing it
+			self._httpx = importlib.import_module('httpx')
+		except ImportError:
+			raise ImportError('AsyncClient requires httpx, install it with `pip install mattermostdriver[async]`')
+		super().__init__(options)
+		self._session = None
+		self._owns_session = True
+		self._single_flight = AsyncSingleFlight() if options.get('coalesce_requests', True) else None
+
+	def _create_session(self):
+		pool_maxsize = self._options.get('pool_maxsize', 10)
+		limits = self._httpx.Limits(
+			max_connections=pool_maxsize if self._options.get('pool_block', False) else None,
+			max_keepalive_connections=pool_maxsize if self._options.get('keepalive', True) else 0
+		)
+		headers = {'Accept-Encoding': self._accept_encoding}
+		if self._cassette is None:
+			return self._httpx.AsyncClient(verify=self._verify, limits=limits, headers=headers)
+		transport = None
+		if self._cassette.recording:
+			transport = self._httpx.AsyncHTTPTransport(verify=self._verify, limits=limits)
+		return self._httpx.AsyncClient(
+			transport=self._cassette.async_transport(self._httpx, transport), headers=headers)
+
+	@property
+	def session(self):
+		"""
+		The pooled session all requests of this client are sent through.
+		It is created on first use and shared by every endpoint.
+
+		A session assigned here can be shared with other clients,
+		e.g. of the same server. It is not closed by :meth:`close`.
+
+		:return: The :class:`httpx.AsyncClient` of this client
+		"""
+		if self._session is None:
+			self._session = self._create_session()
+		return self._session
+
+	@session.setter
+	def session(self, session):
+		self._session = session
+		self._owns_session = False
+
+	async def close(self):
+		"""
+		Closes the pooled session and all its connections.
+		A new session will be created if the client is used again.
+		"""
+		if not self._owns_session:
+			return
+		session, self._session = self._session, None
+		if session is not None:
+			await session.aclose()
+
+	async def _send(self, method, url, options, params, data, files, headers=None, stream=False):
+		delay = self._rate_limit_delay()
+		if delay:
+			await asyncio.sleep(delay)
+		body, headers = self._encode_body(options, data, files, headers)
+		if hasattr(body, '__aiter__'):
+			# httpx would send a body which can be iterated both ways synchronously
+			body = body.__aiter__()
+		request = self.session.build_request(
+				method,
+				url,
+				headers=headers,
+				content=body,
 				params=params,
-				data=data,
+				data=None if body is not None else data or None,
 				files=files,
 				timeout=self.request_timeout
 			)
+		info = self._start_request(method, url)
 		try:
-			response.raise_for_status()
-		except requests.HTTPError as e:
+			response = await self.session.send(request, auth=self._auth() if self._auth else None, stream=stream)
+		except Exception as e:
+			self._fail_request(info, e)
+			raise
+		self._finish_request(info, response)
+		if not stream:
+			self.count_transfer(response, len(response.content))
+		self._update_rate_limit(response)
+		return response
+
+	async def make_request(
+			self, method, endpoint, options=None, params=None, data=None, files=None, basepath=None,
+			headers=None, stream=False):
+		"""
+		:param headers: Additional headers of the request, e.g. a Range
+		:param stream: Return before the body is read, to read it with ``response.aiter_bytes()``.
+			The response has to be closed with ``await response.aclose()`` then.
+		"""
+		url, options, params, data = self._build_request(endpoint, options, params, data, basepath)
+		method = method.lower()
+		once = files or not isinstance(data, dict)
+		key, entry = self._cached_entry(method, url, params, headers, stream)
+		if entry is not None:
+			headers = {'If-None-Match': entry.etag}
+
+		attempt = 0
+		while True:
 			try:
-				data = e.response.json()
-				message = data.get('message', data)
-			except ValueError:
-				log.debug('Could not convert response to json')
-				message = response.text
-			log.error(message)
-			if e.response.status_code == 400:
-				raise InvalidOrMissingParameters(message)
-			elif e.response.status_code == 401:
-				raise NoAccessTokenProvided(message)
-			elif e.response.status_code == 403:
-				raise NotEnoughPermissions(message)
-			elif e.response.status_code == 404:
-				raise ResourceNotFound(message)
-			elif e.response.status_code == 405:
-				raise MethodNotAllowed(message)
-			elif e.response.status_code == 413:
-				raise ContentTooLarge(message)
-			elif e.response.status_code == 501:
-				raise FeatureDisabled(message)
+				response = await self._send(method, url, options, params, data, files, headers, stream)
+			except self._httpx.TransportError as e:
+				if not self._should_retry(method, attempt, once, error=e):
+					raise
+				await asyncio.sleep(self._retry_policy.delay(attempt))
 			else:
-				raise
+				if not self._should_retry(method, attempt, once, status_code=response.status_code):
+					break
+				await response.aclose()
+				await asyncio.sleep(self._retry_policy.delay(attempt, response.headers.get('Retry-After')))
+			attempt += 1
+
+		if key is not None:
+			response = self._revalidated(key, entry, response)
+
+		if response.is_error:
+			if stream:
+				await response.aread()
+			message = self._error_message(response)
+			self._raise_for_status_code(response.status_code, message)
+			response.raise_for_status()
 
 		log.debug(response)
 		return response
 
-	def get(self, endpoint, options=None, params=None):
-		response = self.make_request('get', endpoint, options=options, params=params)
-
-		if response.headers['Content-Type'] != 'application/json':
-			log.debug('Response is not application/json, returning raw response')
+	def _revalidated(self, key, entry, response):
+		cached = self._http_cache.revalidated(
+			key, entry, response.status_code, response.headers, lambda: response.content)
+		if cached is None:
 			return response
+		return self._httpx.Response(200, headers=cached.headers, content=cached.body, request=response.request)
 
-		try:
-			return response.json()
-		except ValueError:
-			log.debug('Could not convert response to json, returning raw response')
-			return response
+	def _wire_size(self, response):
+		return response.num_bytes_downloaded
+
+	async def get(self, endpoint, options=None, params=None):
+		if self._single_flight is None:
+			response = await self.make_request('get', endpoint, options=options, params=params)
+		else:
+			response = await self._single_flight.do(
+				request_key(endpoint, options, params),
+				self.make_request, 'get', endpoint, options=options, params=params
+			)
+		return self.as_models(endpoint, self._parse_get_response(response))
 
-	def post(self, endpoint, options=None, params=None, data=None, files=None):
-		return self.make_request('post', endpoint, options=options, params=params, data=data, files=files).json()
+	async def post(self, endpoint, options=None, params=None, data=None, files=None, headers=None):
+		response = await self.make_request(
+			'post', endpoint, options=options, params=params, data=data, files=files, headers=headers)
+		return self.as_models(endpoint, self.parse_json(response))
 
-	def put(self, endpoint, options=None, params=None, data=None):
-		return self.make_request('put', endpoint, options=options, params=params, data=data).json()
+	async def put(self, endpoint, options=None, params=None, data=None):
+		response = await self.make_request('put', endpoint, options=options, params=params, data=data)
+		return self.as_models(endpoint, self.parse_json(response))
 
-	def delete(self, endpoint, options=None, params=None, data=None):
-		return self.make_request('delete', endpoint, options=options, params=params, data=data).json()
+	async def delete(self, endpoint, options=None, params=None, data=None):
+		response = await self.make_request('delete', endpoint, options=options, params=params, data=data)
+		return self.parse_json(response)
@@ -0,0 +1,95 @@
+"""
+The JSON codec encoding request bodies and decoding responses and websocket messages.
+
+The standard library is always available, accelerated libraries like
+`orjson` or `ujson` are used if installed and chosen with the `json_codec` option.
+"""
+
+import importlib
+import json
+
+
+def _import(name):
+	# The libraries are only imported when they are chosen
+	try:
+		return importlib.import_module(name)
+	except ImportError:
+		return None
+
+
+class JSONCodec:
+	"""
+	Encodes to and decodes from JSON with the functions of a JSON library.
+	"""
+
+	def __init__(self, name, dumps, loads):
+		"""
+		:param name: Name of the codec
+		:param dumps: Function encoding an object to a JSON string
+		:param loads: Function decoding a JSON string or bytes
+		"""
+		self.name = name
+		self.dumps = dumps
+		self.loads = loads
+
+	def __repr__(self):
+		return '<JSONCodec {name}>'.format(name=self.name)
+
+
+def _stdlib():
+	return STDLIB
+
+
+def _orjson():
+	orjson = _import('orjson')
+	if orjson is None:
+		return None
+
+	def dumps(obj):
+		return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf8')
+
+	return JSONCodec('orjson', dumps, orjson.loads)
+
+
+def _ujson():
+	ujson = _import('ujson')
+	if ujson is None:
+		return None
+	return JSONCodec('ujson', ujson.dumps, ujson.loads)
+
+
+STDLIB = JSONCodec('json', json.dumps, json.loads)
+
+# The codecs by name, fastest first
+CODECS = {
+	'orjson': _orjson,
+	'ujson': _ujson,
+	'json': _stdlib,
+}
+
+
+def get_codec(codec='json'):
+	"""
+	:param codec: 'json', 'orjson', 'ujson', 'auto' for the fastest installed library,
+		or an object with `dumps` and `loads` functions
+	:return: The :class:`JSONCodec`
+	:raises ImportError: If the chosen library is not installed
+	"""
+	if codec is None:
+		return STDLIB
+	if not isinstance(codec, str):
+		return codec
+	if codec == 'auto':
+		for create in CODECS.values():
+			found = create()
+			if found is not None:
+				return found
+	if codec not in CODECS:
+		raise ValueError('Unknown json codec {codec}, use one of auto, {codecs}'.format(
+			codec=codec,
+			codecs=', '.join(CODECS)
+		))
+	found = CODECS[codec]()
+	if found is None:
+		raise ImportError('The json codec {codec} is not installed'.format(codec=codec))
+	return found
@@ -0,0 +1,66 @@
+"""
+Negotiating compressed responses and websocket messages.
+
+Responses are decompressed while they are read, also when streamed,
+by `requests` (urllib3) and `httpx`. Brotli is offered if the `brotli`
+or `brotlicffi` library is installed (``pip install mattermostdriver[brotli]``).
+"""
+
+import importlib.util
+
+# The encodings the http libraries can decode, preferred first
+ENCODINGS = ('br', 'gzip', 'deflate')
+
+
+def _installed(name):
+	return importlib.util.find_spec(name) is not None
+
+
+def supported_encodings():
+	"""
+	:return: The encodings which can be decoded with the installed libraries, preferred first
+	"""
+	brotli = _installed('brotli') or _installed('brotlicffi')
+	return tuple(encoding for encoding in ENCODINGS if encoding != 'br' or brotli)
+
+
+def accept_encoding(compression=True):
+	"""
+	:param compression: True to offer every supported encoding, False for uncompressed responses,
+		or an encoding or list of encodings, e.g. 'gzip'
+	:return: The value of the Accept-Encoding header
+	:raises ImportError: If brotli is asked for but not installed
+	"""
+	if compression is True:
+		return ', '.join(supported_encodings())
+	if not compression:
+		return 'identity'
+	if isinstance(compression, str):
+		compression = [encoding.strip() for encoding in compression.split(',')]
+	supported = supported_encodings()
+	for encoding in compression:
+		if encoding not in ENCODINGS:
+			raise ValueError('Unknown compression {encoding}, use one of {encodings}'.format(
+				encoding=encoding,
+				encodings=', '.join(ENCODINGS)
+			))
+		if encoding not in supported:
+			raise ImportError('Decoding {encoding} needs the brotli library, install it with '
+				'`pip install mattermostdriver[brotli]`'.format(encoding=encoding))
+	return ', '.join(compression)
+
+
+def websocket_compression(compression=True):
+	"""
+	:param compression: True for the permessage-deflate extension with the defaults of `websockets`,
+		False to disable it, or a dict of arguments of
+		:class:`websockets.extensions.permessage_deflate.ClientPerMessageDeflateFactory`,
+		e.g. ``{'client_max_window_bits': 15, 'compress_settings': {'memLevel': 8}}``
+	:return: The keyword arguments of :func:`websockets.connect`
+	"""
+	if compression is True:
+		return {'compression': 'deflate'}
+	if not compression:
+		return {'compression': None}
+	from websockets.extensions.permessage_deflate import ClientPerMessageDeflateFactory
+	return {'compression': None, 'extensions': [ClientPerMessageDeflateFactory(**compression)]}
@@ -0,0 +1,178 @@
+"""
+Decouples receiving websocket events from handling them.
+
+Received events are put into bounded queues and handled by worker tasks,
+so a slow event_handler does not stop the websocket from being read.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+log = logging.getLogger('mattermostdriver.dispatch')
+log.setLevel(logging.INFO)
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+COALESCE = 'coalesce'
+POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+
+def coalesce_key(event):
+	"""
+	Events with the same key replace each other in the queue with the `coalesce` policy.
+	Posts are never coalesced.
+
+	:return: The type of the event, with the channel and user it is about
+	"""
+	if event.get('event') in ('posted', 'post_edited', 'post_deleted'):
+		return None
+	data = event.get('data') or {}
+	broadcast = event.get('broadcast') or {}
+	return (
+		event.get('event'),
+		broadcast.get('channel_id') or data.get('channel_id'),
+		data.get('user_id') or broadcast.get('user_id'),
+	)
+
+
+def channel_of(event):
+	data = event.get('data') or {}
+	broadcast = event.get('broadcast') or {}
+	return broadcast.get('channel_id') or data.get('channel_id') or ''
+
+
+class _EventQueue:
+	def __init__(self, maxsize, policy):
+		self.maxsize = maxsize
+		self.policy = policy
+		self._entries = deque()
+		self._by_key = {}
+		self._changed = asyncio.Condition()
+		self.dropped = 0
+		self.coalesced = 0
+
+	def __len__(self):
+		return len(self._entries)
+
+	async def put(self, event, key=None):
+		async with self._changed:
+			if key is not None and key in self._by_key:
+				self._by_key[key][1] = event
+				self.coalesced += 1
+				return
+			if len(self._entries) >= self.maxsize:
+				if self.policy == DROP_OLDEST:
+					self._forget(self._entries.popleft())
+					self.dropped += 1
+				else:
+					await self._changed.wait_for(lambda: len(self._entries) < self.maxsize)
+			entry = [key, event]
+			self._entries.append(entry)
+			if key is not None:
+				self._by_key[key] = entry
+			self._changed.notify_all()
+
+	async def get(self):
+		async with self._changed:
+			await self._changed.wait_for(lambda: self._entries)
+			entry = self._entries.popleft()
+			self._forget(entry)
+			self._changed.notify_all()
+			return entry[1]
+
+	def _forget(self, entry):
+		if entry[0] is not None and self._by_key.get(entry[0]) is entry:
+			del self._by_key[entry[0]]
+
+
+class EventDispatcher:
+	"""
+	Passes websocket events to an event_handler from `workers` concurrent tasks.
+
+	With `ordered`, every channel is handled by the same worker, so the events
+	of one channel stay in order while different channels are handled in parallel.
+
+	When the queue of a worker holds `queue_size` events, the `policy` decides:
+		- ``block`` stops reading the websocket until there is space again
+		- ``drop_oldest`` drops the oldest queued event
+		- ``coalesce`` replaces a queued event of the same type, channel and user
+		  (e.g. typing or status events) at any time, and blocks otherwise
+	"""
+
+	def __init__(self, event_handler, workers=4, queue_size=1000, policy=BLOCK, ordered=True):
+		if policy not in POLICIES:
+			raise ValueError('Unknown event queue policy {policy}, use one of {policies}'.format(
+				policy=policy,
+				policies=', '.join(POLICIES)
+			))
+		self.event_handler = event_handler
+		self.workers = max(1, workers)
+		self.ordered = ordered
+		self.policy = policy
+		queues = self.workers if ordered else 1
+		self._queues = [_EventQueue(queue_size, policy) for _ in range(queues)]
+		self._tasks = []
+		self._handled = 0
+		self._errors = 0
+		self._max_depth = 0
+		self._latency_total = 0.0
+		self._latency_max = 0.0
+
+	@property
+	def stats(self):
+		"""
+		:return: A dict with the current and maximum queue `depth`, the events `handled`,
+			`dropped` and `coalesced`, the `errors` raised by the event_handler
+			and its average and maximum latency in seconds
+		"""
+		return {
+			'depth': sum(len(queue) for queue in self._queues),
+			'max_depth': self._max_depth,
+			'handled': self._handled,
+			'dropped': sum(queue.dropped for queue in self._queues),
+			'coalesced': sum(queue.coalesced for queue in self._queues),
+			'errors': self._errors,
+			'latency_avg': self._latency_total / self._handled if self._handled else 0.0,
+			'latency_max': self._latency_max,
+		}
+
+	def start(self):
+		if self._tasks:
+			return
+		for index in range(self.workers):
+			queue = self._queues[index % len(self._queues)]
+			self._tasks.append(asyncio.ensure_future(self._work(queue)))
+
+	async def stop(self):
+		for task in self._tasks:
+			task.cancel()
+		await asyncio.gather(*self._tasks, return_exceptions=True)
+		self._tasks = []
+
+	async def put(self, event):
+		"""
+		Queues a parsed :class:`~mattermostdriver.events.Event`.
+		Can be used as the event_handler of the websocket.
+		"""
+		queue = self._queues[0]
+		if self.ordered:
+			queue = self._queues[hash(channel_of(event)) % len(self._queues)]
+		key = coalesce_key(event) if self.policy == COALESCE and event else None
+		await queue.put(event, key)
+		self._max_depth = max(self._max_depth, len(queue))
+
+	async def _work(self, queue):
+		while True:
+			event = await queue.get()
+			started = time.monotonic()
+			try:
+				await self.event_handler(event)
+			except Exception:
+				self._errors += 1
+				log.exception('Error in the websocket event handler')
+			latency = time.monotonic() - started
+			self._handled += 1
+			self._latency_total += latency
+			self._latency_max = max(self._latency_max, latency)
@@ -0,0 +1,293 @@
+"""
+Streaming downloads, passed on in chunks instead of being read into memory.
+
+Ranges of a file are requested with the HTTP Range header, to resume
+an interrupted download or to download segments of a large file in parallel.
+Compressed responses are decompressed while streaming them, but ranges are
+requested uncompressed, as their offsets would count the compressed bytes.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger('mattermostdriver.downloads')
+log.setLevel(logging.INFO)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _range_header(offset, end):
+	if not offset and end is None:
+		return None
+	return {
+		'Range': 'bytes={offset}-{end}'.format(offset=offset, end='' if end is None else end),
+		'Accept-Encoding': 'identity',
+	}
+
+
+def _total_size(response, offset):
+	"""
+	:return: The size of the whole file, if the response tells it
+	"""
+	content_range = response.headers.get('Content-Range', '')
+	if '/' in content_range:
+		total = content_range.rsplit('/', 1)[1]
+		if total.isdigit():
+			return int(total)
+	if response.headers.get('Content-Encoding', 'identity') != 'identity':
+		# The length of the compressed body, not of the file
+		return None
+	length = response.headers.get('Content-Length', '')
+	if response.status_code == 200 and length.isdigit():
+		return int(length)
+	if length.isdigit():
+		return offset + int(length)
+	return None
+
+
+class _Window:
+	"""
+	Cuts the requested range out of the chunks of a response.
+	Needed if the server ignores the Range header and sends the whole file.
+	"""
+
+	def __init__(self, response, offset, end):
+		ranged = response.status_code == 206
+		self.skip = 0 if ranged else offset
+		self.remaining = None if ranged or end is None else end + 1 - offset
+
+	@property
+	def done(self):
+		return self.remaining is not None and self.remaining <= 0
+
+	def cut(self, chunk):
+		if self.skip:
+			skipped = min(self.skip, len(chunk))
+			self.skip -= skipped
+			chunk = chunk[skipped:]
+		if self.remaining is not None:
+			chunk = chunk[:self.remaining]
+			self.remaining -= len(chunk)
+		return chunk
+
+
+def _range_not_satisfiable(error):
+	"""
+	A resumed download fails with 416 if the file was already downloaded completely.
+	"""
+	response = getattr(error, 'response', None)
+	return response is not None and response.status_code == 416
+
+
+def _segments(total, segments):
+	size = -(-total // segments)
+	return [(start, min(start + size, total) - 1) for start in range(0, total, size)]
+
+
+@contextlib.contextmanager
+def _open(destination, resume):
+	"""
+	:return: The file object to write to and the offset to continue the download at
+	"""
+	if not isinstance(destination, (str, bytes, os.PathLike)):
+		yield destination, destination.tell() if resume else 0
+		return
+	if resume and os.path.exists(destination):
+		fileobj = open(destination, 'r+b')
+		fileobj.seek(0, os.SEEK_END)
+	else:
+		fileobj = open(destination, 'wb')
+	with fileobj:
+		yield fileobj, fileobj.tell()
+
+
+class _Writer:
+	"""
+	Writes the chunks of one or more segments to their position in the file.
+	"""
+
+	def __init__(self, fileobj, written, total, progress):
+		self.fileobj = fileobj
+		self.written = written
+		self.total = total
+		self.progress = progress
+		self._lock = threading.Lock()
+
+	def write(self, chunk, position=None):
+		with self._lock:
+			if position is not None:
+				self.fileobj.seek(position)
+			self.fileobj.write(chunk)
+			self.written += len(chunk)
+			if self.progress is not None:
+				self.progress(self.written, self.total)
+
+
+def _open_range(client, endpoint, offset=0, end=None):
+	return client.make_request('get', endpoint, headers=_range_header(offset, end), stream=True)
+
+
+def _iter_response(client, response, offset, end, chunk_size):
+	window = _Window(response, offset, end)
+	decoded = 0
+	try:
+		for chunk in response.iter_content(chunk_size):
+			decoded += len(chunk)
+			chunk = window.cut(chunk)
+			if chunk:
+				yield chunk
+			if window.done:
+				break
+	finally:
+		client.count_transfer(response, decoded)
+		response.close()
+
+
+def iter_download(client, endpoint, offset=0, end=None, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""
+	Downloads the body of a GET request, yielding it in chunks.
+
+	:param client: The :class:`~mattermostdriver.Client` making the request
+	:param endpoint: The endpoint to download, e.g. ``/files/<file_id>``
+	:param offset: The first byte to download, e.g. to resume a download
+	:param end: The last byte to download, None for the end of the file
+	:param chunk_size: Maximum size of the chunks in bytes
+	"""
+	response = _open_range(client, endpoint, offset, end)
+	yield from _iter_response(client, response, offset, end, chunk_size)
+
+
+def download(client, endpoint, destination, chunk_size=DEFAULT_CHUNK_SIZE, resume=False, segments=1, progress=None):
+	"""
+	Downloads the body of a GET request into a file.
+
+	:param client: The :class:`~mattermostdriver.Client` making the request
+	:param endpoint: The endpoint to download, e.g. ``/files/<file_id>``
+	:param destination: A path, or a file object opened in binary mode
+	:param chunk_size: Maximum size of the chunks in bytes
+	:param resume: Continue at the end of the file, or at the position of the file object,
+		instead of downloading it from the start
+	:param segments: Number of ranges of the file downloaded in parallel.
+		Needs a seekable destination and a server supporting ranges, else the file is downloaded at once
+	:param progress: Called with the bytes written so far and the size of the file (or None)
+	:return: The size of the file in bytes
+	"""
+	with _open(destination, resume) as (fileobj, offset):
+		response = None
+		if segments > 1 and not offset:
+			response = _open_range(client, endpoint, 0, 0)
+			total = _total_size(response, 0)
+			if response.status_code == 206:
+				response.close()
+				response = None
+				if total:
+					writer = _Writer(fileobj, 0, total, progress)
+					with ThreadPoolExecutor(max_workers=segments) as executor:
+						futures = [
+							executor.submit(_download_segment, client, endpoint, writer, start, end, chunk_size)
+							for start, end in _segments(total, segments)
+						]
+						for future in futures:
+							future.result()
+					return writer.written
+			else:
+				log.debug('The server does not support ranges, downloading %s at once', endpoint)
+
+		if response is None:
+			try:
+				response = _open_range(client, endpoint, offset)
+			except Exception as e:
+				if offset and _range_not_satisfiable(e):
+					return offset
+				raise
+			total = _total_size(response, offset)
+
+		writer = _Writer(fileobj, offset, total, progress)
+		for chunk in _iter_response(client, response, offset, None, chunk_size):
+			writer.write(chunk)
+		return writer.written
+
+
+def _download_segment(client, endpoint, writer, start, end, chunk_size):
+	position = start
+	for chunk in iter_download(client, endpoint, start, end, chunk_size):
+		writer.write(chunk, position)
+		position += len(chunk)
+
+
+async def _aopen_range(client, endpoint, offset=0, end=None):
+	return await client.make_request('get', endpoint, headers=_range_header(offset, end), stream=True)
+
+
+async def _aiter_response(client, response, offset, end, chunk_size):
+	window = _Window(response, offset, end)
+	decoded = 0
+	try:
+		async for chunk in response.aiter_bytes(chunk_size):
+			decoded += len(chunk)
+			chunk = window.cut(chunk)
+			if chunk:
+				yield chunk
+			if window.done:
+				break
+	finally:
+		client.count_transfer(response, decoded)
+		await response.aclose()
+
+
+async def aiter_download(client, endpoint, offset=0, end=None, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""
+	Same as :func:`iter_download` for the :class:`~mattermostdriver.AsyncClient`, as async generator.
+	"""
+	response = await _aopen_range(client, endpoint, offset, end)
+	async for chunk in _aiter_response(client, response, offset, end, chunk_size):
+		yield chunk
+
+
+async def adownload(client, endpoint, destination, chunk_size=DEFAULT_CHUNK_SIZE, resume=False, segments=1, progress=None):
+	"""
+	Same as :func:`download` for the :class:`~mattermostdriver.AsyncClient`.
+	The segments are downloaded by concurrent tasks.
+	"""
+	with _open(destination, resume) as (fileobj, offset):
+		response = None
+		if segments > 1 and not offset:
+			response = await _aopen_range(client, endpoint, 0, 0)
+			total = _total_size(response, 0)
+			if response.status_code == 206:
+				await response.aclose()
+				response = None
+				if total:
+					writer = _Writer(fileobj, 0, total, progress)
+					await asyncio.gather(*(
+						_adownload_segment(client, endpoint, writer, start, end, chunk_size)
+						for start, end in _segments(total, segments)
+					))
+					return writer.written
+			else:
+				log.debug('The server does not support ranges, downloading %s at once', endpoint)
+
+		if response is None:
+			try:
+				response = await _aopen_range(client, endpoint, offset)
+			except Exception as e:
+				if offset and _range_not_satisfiable(e):
+					return offset
+				raise
+			total = _total_size(response, offset)
+
+		writer = _Writer(fileobj, offset, total, progress)
+		async for chunk in _aiter_response(client, response, offset, None, chunk_size):
+			writer.write(chunk)
+		return writer.written
+
+
+async def _adownload_segment(client, endpoint, writer, start, end, chunk_size):
+	position = start
+	async for chunk in aiter_download(client, endpoint, start, end, chunk_size):
+		writer.write(chunk, position)
+		position += len(chunk)
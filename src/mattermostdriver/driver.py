@@ -1,39 +1,45 @@
 import asyncio
+import functools
+import importlib
 import logging
 import warnings
 
-from .client import Client
-from .websocket import Websocket
-from .endpoints.brand import Brand
-from .endpoints.channels import Channels
-from .endpoints.cluster import Cluster
-from .endpoints.commands import Commands
-from .endpoints.compliance import Compliance
-from .endpoints.files import Files
-from .endpoints.ldap import LDAP
-from .endpoints.oauth import OAuth
-from .endpoints.posts import Posts
-from .endpoints.preferences import Preferences
-from .endpoints.reactions import Reactions
-from .endpoints.saml import SAML
-from .endpoints.system import System
-from .endpoints.teams import Teams
-from .endpoints.users import Users
-from .endpoints.webhooks import Webhooks
-from .endpoints.elasticsearch import Elasticsearch
-from .endpoints.emoji import Emoji
-from .endpoints.data_retention import DataRetention
-from .endpoints.roles import Roles
-from .endpoints.status import Status
+from .client import Client, AsyncClient
+from .bulk import run_bulk, arun_bulk
 
 log = logging.getLogger('mattermostdriver.api')
 log.setLevel(logging.INFO)
 
-
-class Driver:
+# name -> module in .endpoints and class of every endpoint, imported on first use
+ENDPOINTS = {
+	'users': ('users', 'Users'),
+	'teams': ('teams', 'Teams'),
+	'channels': ('channels', 'Channels'),
+	'posts': ('posts', 'Posts'),
+	'files': ('files', 'Files'),
+	'preferences': ('preferences', 'Preferences'),
+	'status': ('status', 'Status'),
+	'emoji': ('emoji', 'Emoji'),
+	'reactions': ('reactions', 'Reactions'),
+	'system': ('system', 'System'),
+	'webhooks': ('webhooks', 'Webhooks'),
+	'commands': ('commands', 'Commands'),
+	'compliance': ('compliance', 'Compliance'),
+	'cluster': ('cluster', 'Cluster'),
+	'brand': ('brand', 'Brand'),
+	'oauth': ('oauth', 'OAuth'),
+	'roles': ('roles', 'Roles'),
+	'saml': ('saml', 'SAML'),
+	'ldap': ('ldap', 'LDAP'),
+	'elasticsearch': ('elasticsearch', 'Elasticsearch'),
+	'data_retention': ('data_retention', 'DataRetention'),
+}
+
+
+class BaseDriver:
 	"""
-	Contains the client, api and provides you with functions for
-	login, logout and initializing a websocket connection.
+	Contains the client, options and the api endpoints shared
+	by :class:`Driver` and :class:`AsyncDriver`.
 	"""
 
 	default_options = {
@@ -49,6 +55,45 @@ class Driver:
 		'token': None,
 		'mfa_token': None,
 		'auth': None,
+		'pool_connections': 10,
+		'pool_maxsize': 10,
+		'pool_block': False,
+		'keepalive': True,
+		'compression': True,
+		'rate_limit': True,
+		'rate_limit_per_second': None,
+		'rate_limit_burst': None,
+		'retries': 3,
+		'retry_backoff': 0.5,
+		'retry_backoff_max': 30,
+		'retry_jitter': True,
+		'retry_post': False,
+		'coalesce_requests': True,
+		'batch_window': 0.002,
+		'batch_size': 100,
+		'cache': False,
+		'cache_size': 1024,
+		'cache_ttl': 60,
+		'upload_cache': False,
+		'upload_cache_size': 256,
+		'upload_cache_ttl': 3600,
+		'http_cache': False,
+		'http_cache_dir': None,
+		'http_cache_size': None,
+		'websocket_reconnect': True,
+		'websocket_reconnect_delay': 1,
+		'websocket_reconnect_delay_max': 60,
+		'websocket_compression': True,
+		'event_workers': 0,
+		'event_queue_size': 1000,
+		'event_queue_policy': 'block',
+		'event_ordered': True,
+		'json_codec': 'json',
+		'metrics': True,
+		'models': False,
+		'cassette': None,
+		'cassette_mode': 'replay',
+		'cassette_timing': 0,
 		'debug': False
 	}
 	"""
@@ -70,16 +115,56 @@ class Driver:
 		- request_timeout (None)
 		- mfa_token (None)
 		- auth (None)
+		- pool_connections (10) - number of hosts to keep connection pools for
+		- pool_maxsize (10) - maximum number of connections kept alive per host
+		- pool_block (False) - block instead of opening extra connections when the pool is full
+		- keepalive (True) - reuse connections between requests
+		- compression (True) - accept compressed responses, False for uncompressed, or the encodings, e.g. 'gzip' or ['br', 'gzip']
+		- rate_limit (True) - pace requests following the X-RateLimit headers of the server
+		- rate_limit_per_second (None) - requests per second before the server sent its limit
+		- rate_limit_burst (None) - requests allowed at once before the server sent its limit
+		- retries (3) - how often a request failing with a connection error, 429, 502, 503 or 504 is retried
+		- retry_backoff (0.5) - seconds to wait before the first retry, doubled for every further retry
+		- retry_backoff_max (30) - maximum seconds to wait between two retries
+		- retry_jitter (True) - wait a random time up to the backoff
+		- retry_post (False) - retry POST requests, too. Only do this if your POST requests are idempotent
+		- coalesce_requests (True) - share one request between identical GET requests running at the same time, every caller gets its own result
+		- batch_window (0.002) - seconds to collect lookups like `Users.load_user` before fetching them at once
+		- batch_size (100) - maximum number of lookups fetched at once
+		- cache (False) - cache users, channels and teams fetched by id or name
+		- cache_size (1024) - maximum number of cached lookups
+		- cache_ttl (60) - seconds until a cached entry is fetched again
+		- upload_cache (False) - reuse uploaded files not attached to a post yet instead of uploading them again
+		- upload_cache_size (256) - maximum number of remembered uploads
+		- upload_cache_ttl (3600) - seconds an upload is remembered
+		- http_cache (False) - keep GET responses with an ETag and revalidate them, 'memory', 'disk' or a storage object
+		- http_cache_dir (None) - directory of the 'disk' http cache
+		- http_cache_size (None) - maximum bytes of cached responses, 64 MiB in memory and 256 MiB on disk if None
+		- websocket_reconnect (True) - connect the websocket again when the connection is lost
+		- websocket_reconnect_delay (1) - seconds to wait before the first reconnect, doubled for every failed attempt
+		- websocket_reconnect_delay_max (60) - maximum seconds to wait between two reconnects
+		- websocket_compression (True) - compress websocket messages with permessage-deflate, False to disable, or a dict of its parameters
+		- event_workers (0) - number of tasks handling websocket events concurrently, 0 handles them while reading
+		- event_queue_size (1000) - maximum number of events queued per worker
+		- event_queue_policy ('block') - what to do with a full queue, 'block', 'drop_oldest' or 'coalesce'
+		- event_ordered (True) - handle the events of one channel in order, by one worker
+		- json_codec ('json') - json library to use, 'json', 'orjson', 'ujson', 'auto' or an object with dumps and loads
+		- metrics (True) - count the requests and their latency in `client.metrics`
+		- models (False) - return users, channels, teams, posts, reactions and file infos as compact read-only models instead of dicts
+		- cassette (None) - path of a file to record the responses and websocket messages to, or to replay them from
+		- cassette_mode ('replay') - 'record' or 'replay'
+		- cassette_timing (0) - share of the recorded response times to wait when replaying, 0 for full speed
 		- debug (False)
 
 	Should not be changed
 		- basepath ('/api/v4') - unlikely this would do any good
 	"""
 
-	def __init__(self, options=default_options, client_cls=Client):
+	def __init__(self, options=None, client_cls=Client):
 		"""
 		:param options: A dict with the values from `default_options`
 		:type options: dict
+		:param client_cls: The class of the client making the requests
 		"""
 		if options is None:
 			options = self.default_options
@@ -90,88 +175,17 @@ class Driver:
 			log.setLevel(logging.DEBUG)
 			log.warning('Careful!!\nSetting debug to True, will reveal your password in the log output if you do driver.login()!\nThis is NOT for production!')
 		self.client = client_cls(self.options)
-		self._api = {
-			'users': Users(self.client),
-			'teams': Teams(self.client),
-			'channels': Channels(self.client),
-			'posts': Posts(self.client),
-			'files': Files(self.client),
-			'preferences': Preferences(self.client),
-			'status': Status(self.client),
-			'emoji': Emoji(self.client),
-			'reactions': Reactions(self.client),
-			'system': System(self.client),
-			'webhooks': Webhooks(self.client),
-			'commands': Commands(self.client),
-			'compliance': Compliance(self.client),
-			'cluster': Cluster(self.client),
-			'brand': Brand(self.client),
-			'oauth': OAuth(self.client),
-			'roles': Roles(self.client),
-			'saml': SAML(self.client),
-			'ldap': LDAP(self.client),
-			'elasticsearch': Elasticsearch(self.client),
-			'data_retention': DataRetention(self.client),
-		}
+		self._endpoints = {}
 		self.websocket = None
 
-	def init_websocket(self, event_handler, websocket_cls=Websocket):
-		"""
-		Will initialize the websocket connection to the mattermost server.
-
-		This should be run after login(), because the websocket needs to make
-		an authentification.
-
-		See https://api.mattermost.com/v4/#tag/WebSocket for which
-		websocket events mattermost sends.
-
-		Example of a really simple event_handler function
-
-		.. code:: python
-
-			@asyncio.coroutine
-			def my_event_handler(message):
-				print(message)
-
-
-		:param event_handler: The function to handle the websocket events. Takes one argument.
-		:type event_handler: Function(message)
-		:return: The event loop
-		"""
-		self.websocket = websocket_cls(self.options, self.client.token)
-		loop = asyncio.get_event_loop()
-		loop.run_until_complete(self.websocket.connect(event_handler))
-		return loop
-
-	def login(self):
-		"""
-		Logs the user in.
-
-		The log in information is saved in the client
-			- userid
-			- username
-			- cookies
-
-		:return: The raw response from the request
-		"""
-		if self.options['token']:
-			self.client.token = self.options['token']
-			result = self.users.get_user('me')
-		else:
-			response = self.users.login_user({
-				'login_id': self.options['login_id'],
-				'password': self.options['password'],
-				'token': self.options['mfa_token']
-			})
-			if response.status_code == 200:
-				self.client.token = response.headers['Token']
-				self.client.cookies = response.cookies
-			try:
-				result = response.json()
-			except ValueError:
-				log.debug('Could not convert response to json, returning raw response')
-				result = response
+	def _read_login_response(self, response):
+		try:
+			return self.client.parse_json(response)
+		except ValueError:
+			log.debug('Could not convert response to json, returning raw response')
+			return response
 
+	def _set_logged_in_user(self, result):
 		log.debug(result)
 
 		if 'id' in result:
@@ -179,20 +193,33 @@ class Driver:
 		if 'username' in result:
 			self.client.username = result['username']
 
-		return result
+	def _create_websocket(self, websocket_cls=None):
+		if websocket_cls is None:
+			from .websocket import Websocket as websocket_cls
+		websocket = websocket_cls(self.options, self.client.token)
+		websocket.backfill = self._backfill_posts
+		websocket.cassette = self.client.cassette
+		if self.client.cache is not None:
+			websocket.observers.append(self._invalidate_cache)
+		return websocket
 
-	def logout(self):
+	def _invalidate_cache(self, event):
 		"""
-		Log the user out.
-
-		:return: The JSON response from the server
+		Lets the entity cache see the websocket events before the event_handler,
+		so changed users, channels and teams are fetched again.
 		"""
-		result = self.users.logout_user()
+		if event.type == 'hello':
+			# Changes could have been missed while the websocket was disconnected
+			self.client.cache.clear()
+		self.client.cache.handle_event(event)
+
+	def _reset_logged_in_user(self):
 		self.client.token = ''
 		self.client.userid = ''
 		self.client.username = ''
 		self.client.cookies = None
-		return result
+		if self.client.cache is not None:
+			self.client.cache.clear()
 
 	@property
 	def api(self):
@@ -205,7 +232,18 @@ class Driver:
 		:rtype: dict
 		"""
 		warnings.warn('Deprecated for 5.0.0. Use the endpoints directly instead.', DeprecationWarning)
-		return self._api
+		return {name: self._endpoint(name) for name in ENDPOINTS}
+
+	def _endpoint(self, name):
+		"""
+		:return: The endpoint instance of this driver, created and its module imported on first use
+		"""
+		endpoint = self._endpoints.get(name)
+		if endpoint is None:
+			module, cls = ENDPOINTS[name]
+			endpoint_cls = getattr(importlib.import_module('.endpoints.' + module, __package__), cls)
+			endpoint = self._endpoints.setdefault(name, endpoint_cls(self.client))
+		return endpoint
 
 	@property
 	def users(self):
@@ -214,7 +252,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.users.Users`
 		"""
-		return Users(self.client)
+		return self._endpoint('users')
 
 	@property
 	def teams(self):
@@ -223,7 +261,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.teams.Teams`
 		"""
-		return Teams(self.client)
+		return self._endpoint('teams')
 
 	@property
 	def channels(self):
@@ -232,7 +270,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.channels.Channels`
 		"""
-		return Channels(self.client)
+		return self._endpoint('channels')
 
 	@property
 	def posts(self):
@@ -241,7 +279,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.posts.Posts`
 		"""
-		return Posts(self.client)
+		return self._endpoint('posts')
 
 	@property
 	def files(self):
@@ -250,7 +288,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.files.Files`
 		"""
-		return Files(self.client)
+		return self._endpoint('files')
 
 	@property
 	def preferences(self):
@@ -259,7 +297,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.preferences.Preferences`
 		"""
-		return Preferences(self.client)
+		return self._endpoint('preferences')
 
 	@property
 	def emoji(self):
@@ -268,7 +306,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.emoji.Emoji`
 		"""
-		return Emoji(self.client)
+		return self._endpoint('emoji')
 
 	@property
 	def reactions(self):
@@ -277,7 +315,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.reactions.Reactions`
 		"""
-		return Reactions(self.client)
+		return self._endpoint('reactions')
 
 	@property
 	def system(self):
@@ -286,7 +324,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.system.System`
 		"""
-		return System(self.client)
+		return self._endpoint('system')
 
 	@property
 	def webhooks(self):
@@ -295,7 +333,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.webhooks.Webhooks`
 		"""
-		return Webhooks(self.client)
+		return self._endpoint('webhooks')
 
 	@property
 	def compliance(self):
@@ -304,7 +342,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.compliance.Compliance`
 		"""
-		return Compliance(self.client)
+		return self._endpoint('compliance')
 
 	@property
 	def cluster(self):
@@ -313,7 +351,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.cluster.Cluster`
 		"""
-		return Cluster(self.client)
+		return self._endpoint('cluster')
 
 	@property
 	def brand(self):
@@ -322,7 +360,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.brand.Brand`
 		"""
-		return Brand(self.client)
+		return self._endpoint('brand')
 
 	@property
 	def oauth(self):
@@ -331,7 +369,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.oauth.OAuth`
 		"""
-		return OAuth(self.client)
+		return self._endpoint('oauth')
 
 	@property
 	def saml(self):
@@ -340,7 +378,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.saml.SAML`
 		"""
-		return SAML(self.client)
+		return self._endpoint('saml')
 
 	@property
 	def ldap(self):
@@ -349,7 +387,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.ldap.LDAP`
 		"""
-		return LDAP(self.client)
+		return self._endpoint('ldap')
 
 	@property
 	def elasticsearch(self):
@@ -358,7 +396,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.elasticsearch.Elasticsearch`
 		"""
-		return Elasticsearch(self.client)
+		return self._endpoint('elasticsearch')
 
 	@property
 	def data_retention(self):
@@ -367,7 +405,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.data_retention.DataRetention`
 		"""
-		return DataRetention(self.client)
+		return self._endpoint('data_retention')
 
 	@property
 	def status(self):
@@ -376,7 +414,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.status.Status`
 		"""
-		return Status(self.client)
+		return self._endpoint('status')
 
 	@property
 	def commands(self):
@@ -385,7 +423,7 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.commands.Commands`
 		"""
-		return Commands(self.client)
+		return self._endpoint('commands')
 	
 	@property
 	def roles(self):
@@ -394,4 +432,204 @@ class Driver:
 
 		:return: Instance of :class:`~endpoints.roles.Roles`
 		"""
-		return Roles(self.client)
+		return self._endpoint('roles')
+
+
+class Driver(BaseDriver):
+	"""
+	Contains the client, api and provides you with functions for
+	login, logout and initializing a websocket connection.
+	"""
+
+	def init_websocket(self, event_handler, websocket_cls=None):
+		"""
+		Will initialize the websocket connection to the mattermost server.
+
+		This should be run after login(), because the websocket needs to make
+		an authentification.
+
+		See https://api.mattermost.com/v4/#tag/WebSocket for which
+		websocket events mattermost sends.
+
+		Example of a really simple event_handler function
+
+		.. code:: python
+
+			async def my_event_handler(message):
+				print(message)
+
+
+		:param event_handler: The function to handle the websocket events. Takes one argument.
+		:type event_handler: Function(message)
+		:return: The event loop
+		"""
+		self.websocket = self._create_websocket(websocket_cls)
+		loop = asyncio.get_event_loop()
+		loop.run_until_complete(self.websocket.connect(event_handler))
+		return loop
+
+	async def _backfill_posts(self, channel_id, since):
+		loop = asyncio.get_event_loop()
+		return await loop.run_in_executor(None, functools.partial(
+			self.posts.get_posts_for_channel, channel_id, params={'since': since}
+		))
+
+	def login(self):
+		"""
+		Logs the user in.
+
+		The log in information is saved in the client
+			- userid
+			- username
+			- cookies
+
+		:return: The raw response from the request
+		"""
+		if self.options['token']:
+			self.client.token = self.options['token']
+			result = self.users.get_user('me')
+		else:
+			response = self.users.login_user({
+				'login_id': self.options['login_id'],
+				'password': self.options['password'],
+				'token': self.options['mfa_token']
+			})
+			if response.status_code == 200:
+				self.client.token = response.headers['Token']
+				self.client.cookies = response.cookies
+			result = self._read_login_response(response)
+
+		self._set_logged_in_user(result)
+		return result
+
+	def logout(self):
+		"""
+		Log the user out and close all pooled connections.
+
+		:return: The JSON response from the server
+		"""
+		try:
+			result = self.users.logout_user()
+		finally:
+			self._reset_logged_in_user()
+			self.client.close()
+		return result
+
+	def bulk(self, function, arguments, workers=None, progress=None):
+		"""
+		Calls an endpoint function once for every item of `arguments`,
+		running `workers` requests at the same time.
+		Errors are collected per call instead of stopping the batch.
+
+		.. code:: python
+
+			results = driver.bulk(
+				driver.channels.add_user,
+				[(channel_id, {'user_id': user_id}) for user_id in user_ids],
+				progress=lambda done, total: print(done, '/', total)
+			)
+			failed = [result for result in results if result.error]
+
+		:param function: The endpoint function to call
+		:param arguments: Iterable of argument tuples, a single argument does not need to be a tuple
+		:param workers: Number of concurrent requests. Defaults to the `pool_maxsize` option.
+		:param progress: Called with the number of finished and total calls after every call
+		:return: A list of :class:`~mattermostdriver.bulk.BulkResult`, in the order of `arguments`
+		"""
+		return run_bulk(function, arguments, workers or self.options['pool_maxsize'], progress)
+
+
+class AsyncDriver(BaseDriver):
+	"""
+	Same as :class:`Driver`, but every api call is a coroutine
+	and all requests share one non-blocking connection pool.
+
+	.. code:: python
+
+		driver = AsyncDriver({...})
+		await driver.login()
+		await asyncio.gather(*(
+			driver.posts.create_post(options={'channel_id': channel_id, 'message': message})
+			for channel_id in channel_ids
+		))
+		await driver.logout()
+	"""
+
+	def __init__(self, options=None, client_cls=AsyncClient):
+		"""
+		:param options: A dict with the values from `default_options`
+		:type options: dict
+		:param client_cls: The class of the client making the requests
+		"""
+		super().__init__(options, client_cls)
+
+	async def __aenter__(self):
+		await self.login()
+		return self
+
+	async def __aexit__(self, *exc_info):
+		await self.logout()
+
+	async def init_websocket(self, event_handler, websocket_cls=None):
+		"""
+		Will initialize the websocket connection to the mattermost server
+		on the running event loop. Returns when the connection is closed.
+
+		This should be run after login(), because the websocket needs to make
+		an authentification.
+
+		:param event_handler: The coroutine function to handle the websocket events. Takes one argument.
+		:type event_handler: Function(message)
+		"""
+		self.websocket = self._create_websocket(websocket_cls)
+		await self.websocket.connect(event_handler)
+
+	async def _backfill_posts(self, channel_id, since):
+		return await self.posts.get_posts_for_channel(channel_id, params={'since': since})
+
+	async def login(self):
+		"""
+		Logs the user in.
+
+		The log in information is saved in the client
+			- userid
+			- username
+			- cookies
+
+		:return: The raw response from the request
+		"""
+		if self.options['token']:
+			self.client.token = self.options['token']
+			result = await self.users.get_user('me')
+		else:
+			response = await self.users.login_user({
+				'login_id': self.options['login_id'],
+				'password': self.options['password'],
+				'token': self.options['mfa_token']
+			})
+			if response.status_code == 200:
+				self.client.token = response.headers['Token']
+				self.client.cookies = response.cookies
+			result = self._read_login_response(response)
+
+		self._set_logged_in_user(result)
+		return result
+
+	async def logout(self):
+		"""
+		Log the user out and close all pooled connections.
+
+		:return: The JSON response from the server
+		"""
+		try:
+			result = await self.users.logout_user()
+		finally:
+			self._reset_logged_in_user()
+			await self.client.close()
+		return result
+
+	async def bulk(self, function, arguments, workers=None, progress=None):
+		"""
+		Same as :meth:`Driver.bulk`, awaiting at most `workers` calls at the same time.
+		"""
+		return await arun_bulk(function, arguments, workers or self.options['pool_maxsize'], progress)
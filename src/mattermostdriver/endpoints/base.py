@@ -1,3 +1,84 @@
+import asyncio
+
+from ..cache import cached, acached, invalidating, ainvalidating
+from ..downloads import DEFAULT_CHUNK_SIZE, iter_download, aiter_download, download, adownload
+from ..pagination import DEFAULT_PER_PAGE, iter_items, aiter_items
+
+
 class Base:
 	def __init__(self, client):
 		self.client = client
+
+	def _is_async(self):
+		return asyncio.iscoroutinefunction(self.client.make_request)
+
+	def _cached(self, key, function, *args, **kwargs):
+		"""
+		Serves `function` from the entity cache of the client, if it has one.
+
+		:param key: A tuple of the kind of entity, the lookup and its values
+		"""
+		cache = getattr(self.client, 'cache', None)
+		if cache is None:
+			return function(*args, **kwargs)
+		if self._is_async():
+			return acached(cache, key, function, *args, **kwargs)
+		return cached(cache, key, function, *args, **kwargs)
+
+	def _invalidating(self, entity, function, *args, **kwargs):
+		"""
+		Calls `function` changing an entity, and drops the entity from the cache of the client,
+		so the getters do not return it as it was before.
+
+		:param entity: A tuple of the kind of entity and its id, which can be 'me' for users
+		"""
+		cache = getattr(self.client, 'cache', None)
+		if cache is None:
+			return function(*args, **kwargs)
+		kind, entity_id = entity
+		if entity_id == 'me':
+			entity_id = self.client.userid
+		if self._is_async():
+			return ainvalidating(cache, (kind, entity_id), function, *args, **kwargs)
+		return invalidating(cache, (kind, entity_id), function, *args, **kwargs)
+
+	def _load(self, name, key, batch_function, key_of):
+		"""
+		Loads one item through the named batch loader of the client,
+		merging it with the other lookups made at about the same time.
+		"""
+		return self.client.batch_loader(name, batch_function, key_of).load(key)
+
+	def _paginate(self, get_page, *args, params=None, per_page=DEFAULT_PER_PAGE, items=None, prefetch=True):
+		"""
+		Walks all pages of `get_page`, yielding one item at a time.
+
+		:return: A generator, or an async generator if the client is asynchronous
+		"""
+		iterate = iter_items
+		if self._is_async():
+			iterate = aiter_items
+		return iterate(get_page, args, params=params, per_page=per_page, items=items, prefetch=prefetch)
+
+	def _stream(self, endpoint, offset=0, chunk_size=DEFAULT_CHUNK_SIZE):
+		"""
+		Downloads an endpoint in chunks, instead of reading it into memory.
+
+		:return: A generator of the chunks, or an async generator if the client is asynchronous
+		"""
+		stream = iter_download
+		if self._is_async():
+			stream = aiter_download
+		return stream(self.client, endpoint, offset=offset, chunk_size=chunk_size)
+
+	def _save(self, endpoint, destination, chunk_size=DEFAULT_CHUNK_SIZE, resume=False, segments=1, progress=None):
+		"""
+		Downloads an endpoint into a file, see :func:`~mattermostdriver.downloads.download`.
+		"""
+		save = download
+		if self._is_async():
+			save = adownload
+		return save(
+			self.client, endpoint, destination,
+			chunk_size=chunk_size, resume=resume, segments=segments, progress=progress
+		)
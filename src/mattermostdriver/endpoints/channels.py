@@ -1,5 +1,6 @@
 import logging
 from .base import Base
+from ..pagination import DEFAULT_PER_PAGE
 from .teams import Teams
 from .users import Users
 
@@ -35,30 +36,35 @@ class Channels(Base):
 		)
 
 	def get_channel(self, channel_id):
-		return self.client.get(
-			self.endpoint + '/' + channel_id
+		return self._cached(
+			('channel', 'id', channel_id),
+			self.client.get, self.endpoint + '/' + channel_id
 		)
 
 	def update_channel(self, channel_id, options):
-		return self.client.put(
-			self.endpoint + '/' + channel_id,
+		return self._invalidating(
+			('channel', channel_id),
+			self.client.put, self.endpoint + '/' + channel_id,
 			options=options
 		)
 
 	def delete_channel(self, channel_id):
-		return self.client.delete(
-			self.endpoint + '/' + channel_id
+		return self._invalidating(
+			('channel', channel_id),
+			self.client.delete, self.endpoint + '/' + channel_id
 		)
 
 	def patch_channel(self, channel_id, options):
-		return self.client.put(
-			self.endpoint + '/' + channel_id + '/patch',
+		return self._invalidating(
+			('channel', channel_id),
+			self.client.put, self.endpoint + '/' + channel_id + '/patch',
 			options=options
 		)
 
 	def restore_channel(self, channel_id):
-		return self.client.post(
-			self.endpoint + '/' + channel_id + '/restore',
+		return self._invalidating(
+			('channel', channel_id),
+			self.client.post, self.endpoint + '/' + channel_id + '/restore'
 		)
 
 	def get_channel_statistics(self, channel_id):
@@ -72,13 +78,15 @@ class Channels(Base):
 		)
 
 	def get_channel_by_name(self, team_id, channel_name):
-		return self.client.get(
-			Teams.endpoint + '/' + team_id + '/channels/name/' + channel_name
+		return self._cached(
+			('channel', 'name', team_id, channel_name),
+			self.client.get, Teams.endpoint + '/' + team_id + '/channels/name/' + channel_name
 		)
 
 	def get_channel_by_name_and_team_name(self, team_name, channel_name):
-		return self.client.get(
-			Teams.endpoint + '/name/' + team_name + '/channels/name/' + channel_name
+		return self._cached(
+			('channel', 'team_name', team_name, channel_name),
+			self.client.get, Teams.endpoint + '/name/' + team_name + '/channels/name/' + channel_name
 		)
 
 	def get_channel_members(self, channel_id, params=None):
@@ -87,6 +95,9 @@ class Channels(Base):
 			params=params
 		)
 
+	def iter_channel_members(self, channel_id, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.get_channel_members, channel_id, params=params, per_page=per_page)
+
 	def add_user(self, channel_id, options=None):
 		return self.client.post(
 			self.endpoint + '/' + channel_id + '/members',
@@ -156,12 +167,18 @@ class Channels(Base):
 			params=params
 		)
 
+	def iter_public_channels(self, team_id, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.get_public_channels, team_id, params=params, per_page=per_page)
+
 	def get_deleted_channels(self, team_id, params=None):
 		return self.client.get(
 			'/teams/' + team_id + '/channels/deleted',
 			params=params
 		)
 
+	def iter_deleted_channels(self, team_id, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.get_deleted_channels, team_id, params=params, per_page=per_page)
+
 	def search_channels(self, team_id, options=None):
 		return self.client.post(
 			'/teams/' + team_id + '/channels/search',
@@ -181,11 +198,13 @@ class Channels(Base):
 		)
 
 	def set_channel_scheme(self, channel_id):
-		return self.client.put(
-			self.endpoint + '/' + channel_id + '/scheme'
+		return self._invalidating(
+			('channel', channel_id),
+			self.client.put, self.endpoint + '/' + channel_id + '/scheme'
 		)
 
 	def convert_channel(self, channel_id):
-		return self.client.post(
-			self.endpoint + '/' + channel_id + '/convert'
+		return self._invalidating(
+			('channel', channel_id),
+			self.client.post, self.endpoint + '/' + channel_id + '/convert'
 		)
\ No newline at end of file
@@ -1,4 +1,6 @@
 from .base import Base
+from ..downloads import DEFAULT_CHUNK_SIZE
+from ..pagination import DEFAULT_PER_PAGE
 
 
 class Compliance(Base):
@@ -15,6 +17,9 @@ class Compliance(Base):
 			params=params
 		)
 
+	def iter_reports(self, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.get_reports, params=params, per_page=per_page)
+
 	def get_report(self, report_id):
 		return self.client.get(
 			self.endpoint + '/reports/' + report_id
@@ -24,3 +29,18 @@ class Compliance(Base):
 		return self.client.get(
 			self.endpoint + '/reports/' + report_id + '/download'
 		)
+
+	def stream_report(self, report_id, offset=0, chunk_size=DEFAULT_CHUNK_SIZE):
+		"""
+		Same as :meth:`download_report`, but yields the report in chunks instead of reading it into memory.
+		"""
+		return self._stream(self.endpoint + '/reports/' + report_id + '/download', offset=offset, chunk_size=chunk_size)
+
+	def save_report(self, report_id, destination, chunk_size=DEFAULT_CHUNK_SIZE, resume=False, segments=1, progress=None):
+		"""
+		Downloads a report straight into a path or file object, see :meth:`Files.save_file`.
+		"""
+		return self._save(
+			self.endpoint + '/reports/' + report_id + '/download', destination,
+			chunk_size=chunk_size, resume=resume, segments=segments, progress=progress
+		)
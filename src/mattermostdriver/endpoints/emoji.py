@@ -1,6 +1,7 @@
 import json
 
 from .base import Base
+from ..pagination import DEFAULT_PER_PAGE
 
 
 class Emoji(Base):
@@ -20,6 +21,9 @@ class Emoji(Base):
 			params=params
 		)
 
+	def iter_emoji_list(self, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.get_emoji_list, params=params, per_page=per_page)
+
 	def get_custom_emoji(self, emoji_id):
 		return self.client.get(
 			self.endpoint + '/' + emoji_id
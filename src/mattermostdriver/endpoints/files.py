@@ -1,15 +1,114 @@
+import os
+
 from .base import Base
+from ..bulk import run_bulk, arun_bulk
+from ..cache import MISSING
+from ..downloads import DEFAULT_CHUNK_SIZE
+from ..exceptions import NotEnoughPermissions, ResourceNotFound
+from ..uploads import MultipartEncoder, content_hash, reusable
 
 
 class Files(Base):
 	endpoint = '/files'
 
 	def upload_file(self, channel_id, files):
-		return self.client.post(
+		return self._deduplicated(channel_id, files, lambda: self.client.post(
 			self.endpoint,
 			data={'channel_id': channel_id},
 			files=files
-		)
+		))
+
+	def _deduplicated(self, channel_id, files, upload):
+		"""
+		With the `upload_cache` option, a single file uploaded to the channel before
+		is used again instead of calling `upload`, if it is not attached to a post yet.
+		"""
+		cache = self.client.upload_cache
+		key = _upload_key(cache, channel_id, files)
+		if key is None:
+			return upload()
+		if self._is_async():
+			return self._adeduplicated(cache, key, channel_id, upload)
+
+		file_info = cache.get(key)
+		if file_info is not MISSING:
+			try:
+				current = self.get_file_metadata(file_info['id'])
+			except (ResourceNotFound, NotEnoughPermissions):
+				current = None
+			if current is not None and reusable(current, channel_id):
+				return {'file_infos': [current], 'client_ids': []}
+			cache.invalidate('file', file_info['id'])
+		result = upload()
+		cache.put(key, result['file_infos'][0])
+		return result
+
+	async def _adeduplicated(self, cache, key, channel_id, upload):
+		file_info = cache.get(key)
+		if file_info is not MISSING:
+			try:
+				current = await self.get_file_metadata(file_info['id'])
+			except (ResourceNotFound, NotEnoughPermissions):
+				current = None
+			if current is not None and reusable(current, channel_id):
+				return {'file_infos': [current], 'client_ids': []}
+			cache.invalidate('file', file_info['id'])
+		result = await upload()
+		cache.put(key, result['file_infos'][0])
+		return result
+
+	def upload_file_stream(self, channel_id, files, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+		"""
+		Same as :meth:`upload_file`, but the request body is streamed from the files
+		instead of being built in memory.
+
+		:param files: A dict or list of ('files', (filename, content)), where content is bytes,
+			a file object opened in binary mode or an iterable of bytes
+		:param chunk_size: Size of the chunks read from file objects
+		:param progress: Called with the bytes sent so far and the size of the request (or None)
+		"""
+		body = MultipartEncoder({'channel_id': channel_id}, files, chunk_size=chunk_size, progress=progress)
+		return self.client.post(self.endpoint, data=body, headers=body.headers)
+
+	def upload_files(self, channel_id, files, workers=4, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+		"""
+		Uploads many files to a channel, `workers` at the same time, each streamed in its own request.
+
+		.. code:: python
+
+			file_ids = driver.files.upload_files(channel_id, ['build.log', 'report.html'])
+			driver.posts.create_post({'channel_id': channel_id, 'message': 'Build done', 'file_ids': file_ids})
+
+		:param files: Paths, or (filename, content) tuples as for :meth:`upload_file_stream`
+		:param progress: Called with the filename, the bytes sent so far and the size of the request
+		:return: The ids of the uploaded files, in the order of `files`
+		:raises: The error of the first upload which failed, after all uploads finished
+		"""
+		arguments = [(channel_id, file, chunk_size, progress) for file in files]
+		if self._is_async():
+			return self._aupload_files(arguments, workers)
+		return _file_ids(run_bulk(self._upload_one, arguments, workers))
+
+	async def _aupload_files(self, arguments, workers):
+		return _file_ids(await arun_bulk(self._aupload_one, arguments, workers))
+
+	def _upload_one(self, channel_id, file, chunk_size, progress):
+		filename, content = _open_upload(file)
+		files = [('files', (filename, content))]
+		try:
+			return self._deduplicated(channel_id, files, lambda: self.upload_file_stream(
+				channel_id, files, chunk_size, _progress_of(filename, progress)))
+		finally:
+			_close_upload(file, content)
+
+	async def _aupload_one(self, channel_id, file, chunk_size, progress):
+		filename, content = _open_upload(file)
+		files = [('files', (filename, content))]
+		try:
+			return await self._deduplicated(channel_id, files, lambda: self.upload_file_stream(
+				channel_id, files, chunk_size, _progress_of(filename, progress)))
+		finally:
+			_close_upload(file, content)
 
 	def get_file(self, file_id):
 		return self.client.get(
@@ -26,6 +125,49 @@ class Files(Base):
 			self.endpoint + '/' + file_id + '/preview',
 		)
 
+	def stream_file(self, file_id, offset=0, chunk_size=DEFAULT_CHUNK_SIZE):
+		"""
+		Same as :meth:`get_file`, but yields the file in chunks instead of reading it into memory.
+
+		:param offset: The first byte to download, to resume an interrupted download
+		:param chunk_size: Maximum size of the chunks in bytes
+		"""
+		return self._stream(self.endpoint + '/' + file_id, offset=offset, chunk_size=chunk_size)
+
+	def stream_file_thumbnail(self, file_id, offset=0, chunk_size=DEFAULT_CHUNK_SIZE):
+		return self._stream(self.endpoint + '/' + file_id + '/thumbnail', offset=offset, chunk_size=chunk_size)
+
+	def stream_file_preview(self, file_id, offset=0, chunk_size=DEFAULT_CHUNK_SIZE):
+		return self._stream(self.endpoint + '/' + file_id + '/preview', offset=offset, chunk_size=chunk_size)
+
+	def save_file(self, file_id, destination, chunk_size=DEFAULT_CHUNK_SIZE, resume=False, segments=1, progress=None):
+		"""
+		Downloads a file straight into a path or file object.
+
+		:param destination: A path, or a file object opened in binary mode
+		:param chunk_size: Maximum size of the chunks written in bytes
+		:param resume: Continue an interrupted download at the end of the file
+		:param segments: Number of ranges of the file downloaded in parallel
+		:param progress: Called with the bytes written so far and the size of the file
+		:return: The size of the file in bytes
+		"""
+		return self._save(
+			self.endpoint + '/' + file_id, destination,
+			chunk_size=chunk_size, resume=resume, segments=segments, progress=progress
+		)
+
+	def save_file_thumbnail(self, file_id, destination, chunk_size=DEFAULT_CHUNK_SIZE, resume=False, progress=None):
+		return self._save(
+			self.endpoint + '/' + file_id + '/thumbnail', destination,
+			chunk_size=chunk_size, resume=resume, progress=progress
+		)
+
+	def save_file_preview(self, file_id, destination, chunk_size=DEFAULT_CHUNK_SIZE, resume=False, progress=None):
+		return self._save(
+			self.endpoint + '/' + file_id + '/preview', destination,
+			chunk_size=chunk_size, resume=resume, progress=progress
+		)
+
 	def get_public_file_link(self, file_id):
 		return self.client.get(
 			self.endpoint + '/' + file_id + '/link',
@@ -35,3 +177,43 @@ class Files(Base):
 		return self.client.get(
 			self.endpoint + '/' + file_id + '/info',
 		)
+
+
+def _upload_key(cache, channel_id, files):
+	"""
+	:return: The key of a single file in the upload cache, or None if it can not be cached
+	"""
+	if cache is None:
+		return None
+	files = list(files.items()) if isinstance(files, dict) else list(files)
+	if len(files) != 1 or not isinstance(files[0][1], tuple):
+		return None
+	filename, content = files[0][1][:2]
+	digest = content_hash(content)
+	if digest is None:
+		return None
+	return ('file', channel_id, filename, digest)
+
+
+def _open_upload(file):
+	if isinstance(file, (str, bytes, os.PathLike)):
+		return os.path.basename(os.fsdecode(file)), open(file, 'rb')
+	return file[0], file[1]
+
+
+def _close_upload(file, content):
+	if isinstance(file, (str, bytes, os.PathLike)):
+		content.close()
+
+
+def _progress_of(filename, progress):
+	if progress is None:
+		return None
+	return lambda sent, total: progress(filename, sent, total)
+
+
+def _file_ids(results):
+	for result in results:
+		if result.error is not None:
+			raise result.error
+	return [result.result['file_infos'][0]['id'] for result in results]
@@ -1,4 +1,5 @@
 from .base import Base
+from ..pagination import DEFAULT_PER_PAGE
 from .users import Users
 
 
@@ -17,6 +18,9 @@ class OAuth(Base):
 			params=params
 		)
 
+	def iter_oauth_apps(self, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.get_oauth_apps, params=params, per_page=per_page)
+
 	def get_oauth_app(self, app_id):
 		return self.client.get(
 			self.endpoint + '/apps/' + app_id
@@ -1,13 +1,27 @@
 from .base import Base
+from ..history import ChannelHistory
+from ..pagination import DEFAULT_PER_PAGE
 from .teams import Teams
 from .users import Users
 from .channels import Channels
 
 
+def ordered_posts(post_list):
+	"""
+	:return: The posts of a post list response as a list, in the order given by the server
+	"""
+	return [post_list['posts'][post_id] for post_id in post_list['order']]
+
+
 class Posts(Base):
 	endpoint = '/posts'
 
 	def create_post(self, options):
+		upload_cache = getattr(self.client, 'upload_cache', None)
+		if upload_cache is not None:
+			# A file is attached to one post only, it can not be used for another upload again
+			for file_id in options.get('file_ids') or ():
+				upload_cache.invalidate('file', file_id)
 		return self.client.post(
 			self.endpoint,
 			options=options
@@ -52,6 +66,12 @@ class Posts(Base):
 			params=params
 		)
 
+	def iter_list_of_flagged_posts(self, user_id, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(
+			self.get_list_of_flagged_posts, user_id,
+			params=params, per_page=per_page, items=ordered_posts
+		)
+
 	def get_file_info_for_post(self, post_id):
 		return self.client.get(
 			self.endpoint + '/' + post_id + '/files/info',
@@ -63,6 +83,29 @@ class Posts(Base):
 			params=params
 		)
 
+	def iter_posts_for_channel(self, channel_id, params=None, per_page=DEFAULT_PER_PAGE):
+		"""
+		Yields the posts of a channel, newest first.
+		"""
+		return self._paginate(
+			self.get_posts_for_channel, channel_id,
+			params=params, per_page=per_page, items=ordered_posts
+		)
+
+	def iter_channel_history(self, channel_id, after=None, before=None, since=None, per_page=DEFAULT_PER_PAGE, prefetch=4):
+		"""
+		Yields the posts of a channel, oldest first, fetching `prefetch` pages concurrently.
+		Pass the :attr:`~mattermostdriver.history.ChannelHistory.cursor` of an earlier
+		walk as `after` to resume it.
+
+		:return: Instance of :class:`~mattermostdriver.history.ChannelHistory`
+		"""
+		return ChannelHistory(
+			self, channel_id,
+			after=after, before=before, since=since,
+			per_page=per_page, prefetch=prefetch
+		)
+
 	def search_for_team_posts(self, team_id, options):
 		return self.client.post(
 			Teams.endpoint + '/' + team_id + '/posts/search',
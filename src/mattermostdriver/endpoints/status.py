@@ -14,7 +14,15 @@ class Status(Base):
 			options=options
 		)
 
-	def get_user_statuses_by_id(self):
+	def get_user_statuses_by_id(self, options=None):
 		return self.client.post(
-			'/users/status/ids'
+			'/users/status/ids',
+			options=options
 		)
+
+	def load_user_status(self, user_id):
+		"""
+		Gets the status of a user like :meth:`get_user_status`, but lookups made
+		at about the same time are merged into one :meth:`get_user_statuses_by_id` request.
+		"""
+		return self._load('statuses_by_id', user_id, self.get_user_statuses_by_id, lambda status: status['user_id'])
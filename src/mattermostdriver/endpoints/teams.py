@@ -1,6 +1,7 @@
 import warnings
 
 from .base import Base
+from ..pagination import DEFAULT_PER_PAGE
 from .users import Users
 
 
@@ -19,32 +20,40 @@ class Teams(Base):
 			params=params
 		)
 
+	def iter_teams(self, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.get_teams, params=params, per_page=per_page)
+
 	def get_team(self, team_id):
-		return self.client.get(
-			self.endpoint + '/' + team_id,
+		return self._cached(
+			('team', 'id', team_id),
+			self.client.get, self.endpoint + '/' + team_id
 		)
 
 	def update_team(self, team_id, options=None):
-		return self.client.put(
-			self.endpoint + '/' + team_id,
+		return self._invalidating(
+			('team', team_id),
+			self.client.put, self.endpoint + '/' + team_id,
 			options
 		)
 
 	def delete_team(self, team_id, params=None):
-		return self.client.delete(
-			self.endpoint + '/' + team_id,
+		return self._invalidating(
+			('team', team_id),
+			self.client.delete, self.endpoint + '/' + team_id,
 			params=params
 		)
 
 	def patch_team(self, team_id, options=None):
-		return self.client.put(
-			self.endpoint + '/' + team_id + '/patch',
+		return self._invalidating(
+			('team', team_id),
+			self.client.put, self.endpoint + '/' + team_id + '/patch',
 			options
 		)
 
 	def get_team_by_name(self, name):
-		return self.client.get(
-			self.endpoint + '/name/' + name
+		return self._cached(
+			('team', 'name', name),
+			self.client.get, self.endpoint + '/name/' + name
 		)
 
 	def search_teams(self, options=None):
@@ -69,6 +78,9 @@ class Teams(Base):
 			params=params
 		)
 
+	def iter_team_members(self, team_id, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.get_team_members, team_id, params=params, per_page=per_page)
+
 	def add_user_to_team(self, team_id, options=None):
 		return self.client.post(
 			self.endpoint + '/' + team_id + '/members',
@@ -185,8 +197,9 @@ class Teams(Base):
 		)
 
 	def set_team_icon(self, team_id, file):
-		return self.client.post(
-			self.endpoint + '/' + team_id + '/image',
+		return self._invalidating(
+			('team', team_id),
+			self.client.post, self.endpoint + '/' + team_id + '/image',
 			files=file
 		)
 
@@ -197,11 +210,13 @@ class Teams(Base):
 		)
 
 	def delete_team_icon(self, team_id):
-		self.client.delete(
-			self.endpoint + '/' + team_id + '/image'
+		return self._invalidating(
+			('team', team_id),
+			self.client.delete, self.endpoint + '/' + team_id + '/image'
 		)
 
 	def set_team_scheme(self, team_id):
-		return self.client.put(
-			self.endpoint + '/' + team_id + '/scheme'
+		return self._invalidating(
+			('team', team_id),
+			self.client.put, self.endpoint + '/' + team_id + '/scheme'
 		)
@@ -1,4 +1,5 @@
 from .base import Base
+from ..pagination import DEFAULT_PER_PAGE
 
 
 class Users(Base):
@@ -16,6 +17,9 @@ class Users(Base):
 	def get_users(self, params=None):
 		return self.client.get(self.endpoint, params=params)
 
+	def iter_users(self, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.get_users, params=params, per_page=per_page)
+
 	def get_users_by_ids(self, options=None):
 		return self.client.post(
 			self.endpoint + '/ids',
@@ -28,6 +32,20 @@ class Users(Base):
 			options
 		)
 
+	def load_user(self, user_id):
+		"""
+		Gets a user like :meth:`get_user`, but lookups made by other threads or tasks
+		at about the same time are merged into one :meth:`get_users_by_ids` request.
+		"""
+		return self._load('users_by_ids', user_id, self.get_users_by_ids, lambda user: user['id'])
+
+	def load_user_by_username(self, username):
+		"""
+		Gets a user like :meth:`get_user_by_username`, but lookups made at about
+		the same time are merged into one :meth:`get_users_by_usernames` request.
+		"""
+		return self._load('users_by_usernames', username, self.get_users_by_usernames, lambda user: user['username'])
+
 	def search_users(self, options=None):
 		return self.client.post(
 			self.endpoint + '/search',
@@ -41,36 +59,42 @@ class Users(Base):
 		)
 
 	def get_user(self, user_id):
-		return self.client.get(
-			self.endpoint + '/' + user_id
+		return self._cached(
+			('user', 'id', user_id),
+			self.client.get, self.endpoint + '/' + user_id
 		)
 
 	def update_user(self, user_id, options=None):
-		return self.client.put(
-			self.endpoint + '/' + user_id,
+		return self._invalidating(
+			('user', user_id),
+			self.client.put, self.endpoint + '/' + user_id,
 			options
 		)
 
 	def deactivate_user(self, user_id):
-		return self.client.delete(
-			self.endpoint + '/' + user_id
+		return self._invalidating(
+			('user', user_id),
+			self.client.delete, self.endpoint + '/' + user_id
 		)
 
 	def patch_user(self, user_id, options=None):
-		return self.client.put(
-			self.endpoint + '/' + user_id + '/patch',
+		return self._invalidating(
+			('user', user_id),
+			self.client.put, self.endpoint + '/' + user_id + '/patch',
 			options
 		)
 
 	def update_user_role(self, user_id, options=None):
-		return self.client.put(
-			self.endpoint + '/' + user_id + '/roles',
+		return self._invalidating(
+			('user', user_id),
+			self.client.put, self.endpoint + '/' + user_id + '/roles',
 			options
 		)
 
 	def update_user_active_status(self, user_id, options=None):
-		return self.client.put(
-			self.endpoint + '/' + user_id + '/active',
+		return self._invalidating(
+			('user', user_id),
+			self.client.put, self.endpoint + '/' + user_id + '/active',
 			options
 		)
 
@@ -80,14 +104,16 @@ class Users(Base):
 		)
 
 	def set_user_profile_image(self, user_id, files):
-		return self.client.post(
-			self.endpoint + '/' + user_id + '/image',
+		return self._invalidating(
+			('user', user_id),
+			self.client.post, self.endpoint + '/' + user_id + '/image',
 			files=files
 		)
 
 	def get_user_by_username(self, username):
-		return self.client.get(
-			self.endpoint + '/username/' + username
+		return self._cached(
+			('user', 'username', username),
+			self.client.get, self.endpoint + '/username/' + username
 		)
 
 	def reset_password(self, options=None):
@@ -97,8 +123,9 @@ class Users(Base):
 		)
 
 	def update_user_mfa(self, user_id, options=None):
-		return self.client.put(
-			self.endpoint + '/' + user_id + '/mfa',
+		return self._invalidating(
+			('user', user_id),
+			self.client.put, self.endpoint + '/' + user_id + '/mfa',
 			options
 		)
 
@@ -126,8 +153,9 @@ class Users(Base):
 		)
 
 	def get_user_by_email(self, email):
-		return self.client.get(
-			self.endpoint + '/email/' + email
+		return self._cached(
+			('user', 'email', email),
+			self.client.get, self.endpoint + '/email/' + email
 		)
 
 	def get_user_sessions(self, user_id):
@@ -199,8 +227,9 @@ class Users(Base):
 		)
 
 	def update_user_authentication_method(self, user_id, options=None):
-		return self.client.put(
-			self.endpoint + '/' + user_id + '/auth',
+		return self._invalidating(
+			('user', user_id),
+			self.client.put, self.endpoint + '/' + user_id + '/auth',
 			options=options
 		)
 
@@ -1,4 +1,5 @@
 from .base import Base
+from ..pagination import DEFAULT_PER_PAGE
 
 
 class Webhooks(Base):
@@ -16,6 +17,9 @@ class Webhooks(Base):
 			params=params
 		)
 
+	def iter_incoming_hooks(self, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.list_incoming_hooks, params=params, per_page=per_page)
+
 	def get_incoming_hook(self, hook_id):
 		return self.client.get(
 			self.endpoint + '/incoming/' + hook_id
@@ -39,6 +43,9 @@ class Webhooks(Base):
 			params=params
 		)
 
+	def iter_outgoing_hooks(self, params=None, per_page=DEFAULT_PER_PAGE):
+		return self._paginate(self.list_outgoing_hooks, params=params, per_page=per_page)
+
 	def get_outgoing_hook(self, hook_id):
 		return self.client.get(
 			self.endpoint + '/outgoing/' + hook_id
@@ -0,0 +1,150 @@
+"""
+Parsed websocket events and routing them to handlers by their type.
+"""
+
+import asyncio
+import logging
+
+from .codec import STDLIB
+
+log = logging.getLogger('mattermostdriver.events')
+log.setLevel(logging.INFO)
+
+# Registering a handler for this type passes it every event
+ALL_EVENTS = '*'
+
+
+class Event(dict):
+	"""
+	A websocket event, parsed once when it is received.
+
+	Mattermost encodes some payloads, like the post of a `posted` event,
+	as JSON strings inside the event. They are only decoded when accessed,
+	e.g. with :attr:`post`.
+	"""
+
+	__slots__ = ('_raw', '_post', '_codec')
+
+	def __init__(self, event, raw=None, codec=STDLIB):
+		super().__init__(event)
+		self._raw = raw
+		self._post = None
+		self._codec = codec
+
+	@classmethod
+	def parse(cls, message, codec=STDLIB):
+		"""
+		:param message: A message received from the websocket
+		:param codec: The :class:`~mattermostdriver.codec.JSONCodec` decoding the message and its payloads
+		:return: The parsed :class:`Event`. Messages which are not a JSON object give an empty event.
+		"""
+		try:
+			event = codec.loads(message)
+		except ValueError:
+			event = None
+		if not isinstance(event, dict):
+			event = {}
+		return cls(event, message, codec)
+
+	@property
+	def raw(self):
+		"""
+		The message as received from the websocket
+		"""
+		if self._raw is None:
+			self._raw = self._codec.dumps(self)
+		return self._raw
+
+	@property
+	def type(self):
+		return self.get('event')
+
+	@property
+	def data(self):
+		return self.get('data') or {}
+
+	@property
+	def broadcast(self):
+		return self.get('broadcast') or {}
+
+	@property
+	def seq(self):
+		return self.get('seq')
+
+	@property
+	def channel_id(self):
+		return self.broadcast.get('channel_id') or self.data.get('channel_id')
+
+	@property
+	def post(self):
+		"""
+		The decoded post of `posted`, `post_edited` and `post_deleted` events, else None
+		"""
+		if self._post is None:
+			post = self.data.get('post')
+			if isinstance(post, str):
+				try:
+					post = self._codec.loads(post)
+				except ValueError:
+					post = None
+			self._post = post if isinstance(post, dict) else None
+		return self._post
+
+
+class EventRouter:
+	"""
+	Passes websocket events to the handlers registered for their type.
+	Can be used as the event_handler of :meth:`~mattermostdriver.Driver.init_websocket`.
+
+	Events without a handler are dropped as soon as they are received,
+	before their payload is decoded or they are queued for the `event_workers`.
+
+	.. code:: python
+
+		router = EventRouter()
+
+		@router.on('posted')
+		async def posted(event):
+			print(event.post['message'])
+
+		driver.init_websocket(router)
+
+	Handlers take the :class:`Event` and can be coroutine functions or plain functions.
+	"""
+
+	def __init__(self):
+		self._handlers = {}
+
+	def on(self, *event_types):
+		"""
+		Decorator registering a handler for one or more event types,
+		or for every event with ``'*'``.
+		"""
+		def register(handler):
+			for event_type in event_types:
+				self.add(event_type, handler)
+			return handler
+		return register
+
+	def add(self, event_type, handler):
+		self._handlers.setdefault(event_type, []).append(handler)
+
+	def remove(self, event_type, handler):
+		handlers = self._handlers.get(event_type, [])
+		if handler in handlers:
+			handlers.remove(handler)
+		if not handlers:
+			self._handlers.pop(event_type, None)
+
+	def wants(self, event_type):
+		"""
+		:return: Whether any handler is registered for events of this type
+		"""
+		return event_type in self._handlers or ALL_EVENTS in self._handlers
+
+	async def __call__(self, event):
+		handlers = self._handlers.get(event.type, []) + self._handlers.get(ALL_EVENTS, [])
+		for handler in handlers:
+			result = handler(event)
+			if asyncio.iscoroutine(result):
+				await result
@@ -43,6 +43,13 @@ class ContentTooLarge(HTTPError):
 	"""
 
 
+class TooManyRequests(HTTPError):
+	"""
+	Raised when mattermost returns a
+	429 Too many requests
+	"""
+
+
 class FeatureDisabled(HTTPError):
 	"""
 	Raised when mattermost returns a
@@ -0,0 +1,1501 @@
+"""
+A fake Mattermost server, to run bots and load tests without a real server.
+
+It serves the part of the ``/api/v4`` routes used by the `users`, `teams`, `channels`,
+`posts`, `files`, `reactions` and `webhooks` endpoints, and the websocket with
+its authentication challenge and events, keeping everything in memory.
+Latency and failing requests can be injected to measure throughput, retries and reconnects.
+
+.. code:: python
+
+	from mattermostdriver import Driver
+	from mattermostdriver.fakeserver import FakeMattermost
+
+	with FakeMattermost() as server:
+		team = server.add_team('team')
+		channel = server.add_channel(team['id'], 'town-square')
+		driver = Driver(server.driver_options())
+		driver.login()
+		driver.posts.create_post({'channel_id': channel['id'], 'message': 'Hello'})
+
+It only needs the standard library and can also be started on its own
+with ``python -m mattermostdriver.fakeserver``.
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import random
+import re
+import socket
+import socketserver
+import struct
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+log = logging.getLogger('mattermostdriver.fakeserver')
+log.setLevel(logging.INFO)
+
+API = '/api/v4'
+
+_WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+_OP_TEXT, _OP_CLOSE, _OP_PING, _OP_PONG = 0x1, 0x8, 0x9, 0xA
+# Events kept per websocket session, to replay them when a connection is resumed
+_REPLAY_BUFFER = 256
+# Largest page mattermost returns, whatever per_page asks for
+MAX_PER_PAGE = 200
+# Responses smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+
+
+def new_id():
+	"""
+	:return: A random id in the format of Mattermost ids
+	"""
+	return uuid.uuid4().hex[:26]
+
+
+class HTTPError(Exception):
+	def __init__(self, status, message):
+		super().__init__(message)
+		self.status = status
+		self.message = message
+
+
+class _Request:
+	def __init__(self, method, path, query, headers, body):
+		self.method = method
+		self.path = path
+		self.query = query
+		self.headers = headers
+		self.body = body
+		self.user_id = None
+		self.events = []
+
+	def json(self):
+		if not self.body:
+			return {}
+		try:
+			return json.loads(self.body.decode('utf8'))
+		except ValueError:
+			raise HTTPError(400, 'Invalid or missing body')
+
+	def param(self, name, default=None):
+		return self.query.get(name, default)
+
+	def int_param(self, name, default):
+		try:
+			return int(self.query.get(name, default))
+		except ValueError:
+			raise HTTPError(400, 'Invalid {name} parameter'.format(name=name))
+
+
+class _Response:
+	def __init__(self, status=200, body=None, headers=None, raw=None, content_type='application/json'):
+		self.status = status
+		self.headers = dict(headers or {})
+		if raw is None:
+			raw = json.dumps(body).encode('utf8')
+		self.body = raw
+		self.headers.setdefault('Content-Type', content_type)
+
+
+_ROUTES = []
+
+
+def _route(method, pattern, auth=True):
+	"""
+	Registers the decorated method of :class:`_Api` for a method and path.
+	``{name}`` in the pattern matches a path segment passed as keyword argument.
+	"""
+	regex = re.compile('^' + re.sub(r'{(\w+)}', r'(?P<\1>[^/]+)', pattern) + '$')
+
+	def decorator(function):
+		_ROUTES.append((method, regex, function, auth))
+		return function
+	return decorator
+
+
+def _per_page(request, default=60):
+	# Like mattermost, larger pages are silently cut to the maximum
+	return min(request.int_param('per_page', default), MAX_PER_PAGE)
+
+
+def _page(items, request, per_page=60):
+	page = request.int_param('page', 0)
+	per_page = _per_page(request, per_page)
+	return items[page * per_page:(page + 1) * per_page]
+
+
+def _parse_range(header, size):
+	"""
+	:return: The first and last byte of a ``bytes=first-last`` range, None for the whole file
+	:raises HTTPError: With 416 if the range is outside of the file
+	"""
+	match = re.match(r'^bytes=(\d*)-(\d*)$', header or '')
+	if not match or not (match.group(1) or match.group(2)):
+		return None
+	if not match.group(1):
+		first = max(size - int(match.group(2)), 0)
+		last = size - 1
+	else:
+		first = int(match.group(1))
+		last = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+	if first >= size or first > last:
+		raise HTTPError(416, 'Requested range not satisfiable')
+	return first, last
+
+
+def _parse_multipart(body, content_type):
+	"""
+	:return: The form fields and the files as list of (filename, content)
+	"""
+	match = re.search(r'boundary="?([^";]+)"?', content_type)
+	if not match:
+		raise HTTPError(400, 'Missing multipart boundary')
+	fields, files = {}, []
+	for part in body.split(b'--' + match.group(1).encode('latin-1'))[1:]:
+		if part.startswith(b'--'):
+			break
+		head, _, content = part.partition(b'\r\n\r\n')
+		if content.endswith(b'\r\n'):
+			content = content[:-2]
+		disposition = ''
+		for line in head.decode('utf8').split('\r\n'):
+			if line.lower().startswith('content-disposition:'):
+				disposition = line
+		name = re.search(r'\bname="([^"]*)"', disposition)
+		filename = re.search(r'\bfilename="([^"]*)"', disposition)
+		if filename:
+			files.append((unquote(filename.group(1)), content))
+		elif name:
+			fields[unquote(name.group(1))] = content.decode('utf8')
+	return fields, files
+
+
+class _Session:
+	"""
+	The events sent to a websocket connection, which can be resumed by its connection id.
+	"""
+
+	def __init__(self, user_id, token):
+		self.connection_id = new_id()
+		self.user_id = user_id
+		# The token the session was opened with, it ends when the token is revoked
+		self.token = token
+		self.seq = 0
+		self.buffer = deque(maxlen=_REPLAY_BUFFER)
+		self.connection = None
+
+
+class _WebsocketConnection:
+	"""
+	The server side of a websocket, reading and writing its frames.
+	"""
+
+	def __init__(self, sock, rfile, wfile):
+		self.socket = sock
+		self.rfile = rfile
+		self.wfile = wfile
+		self.session = None
+		self.closed = False
+		self._send_lock = threading.Lock()
+
+	def _read_exactly(self, size):
+		data = self.rfile.read(size)
+		if len(data) < size:
+			raise ConnectionError('Websocket closed')
+		return data
+
+	def read_frame(self):
+		first, second = self._read_exactly(2)
+		opcode = first & 0x0F
+		length = second & 0x7F
+		if length == 126:
+			length = struct.unpack('!H', self._read_exactly(2))[0]
+		elif length == 127:
+			length = struct.unpack('!Q', self._read_exactly(8))[0]
+		mask = self._read_exactly(4) if second & 0x80 else None
+		payload = self._read_exactly(length)
+		if mask and length:
+			key = (mask * (length // 4 + 1))[:length]
+			payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+		return bool(first & 0x80), opcode, payload
+
+	def read_message(self):
+		"""
+		:return: The next text or binary message, answering pings on the way, or None when closed
+		"""
+		message = b''
+		while True:
+			fin, opcode, payload = self.read_frame()
+			if opcode == _OP_PING:
+				self.send_frame(_OP_PONG, payload)
+			elif opcode == _OP_PONG:
+				continue
+			elif opcode == _OP_CLOSE:
+				self.close(payload[:2] or b'\x03\xe8')
+				return None
+			else:
+				message += payload
+				if fin:
+					return message
+
+	def send_frame(self, opcode, payload):
+		length = len(payload)
+		if length < 126:
+			header = struct.pack('!BB', 0x80 | opcode, length)
+		elif length < 1 << 16:
+			header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+		else:
+			header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+		with self._send_lock:
+			if self.closed and opcode != _OP_CLOSE:
+				return False
+			try:
+				self.wfile.write(header + payload)
+				self.wfile.flush()
+			except OSError:
+				self.closed = True
+				return False
+		return True
+
+	def send_json(self, message):
+		return self.send_frame(_OP_TEXT, json.dumps(message).encode('utf8'))
+
+	def close(self, code=b'\x03\xe8'):
+		if self.closed:
+			return
+		self.send_frame(_OP_CLOSE, code)
+		self.closed = True
+
+	def drop(self):
+		"""
+		Breaks the connection without a close frame.
+		"""
+		self.closed = True
+		try:
+			self.socket.shutdown(socket.SHUT_RDWR)
+		except OSError:
+			pass
+
+
+class _Api:
+	"""
+	The in-memory state of the server and the handlers of its routes.
+	"""
+
+	def __init__(self, server):
+		self.server = server
+		self.lock = threading.RLock()
+		self.users = {}
+		self.passwords = {}
+		self.tokens = {}
+		self.access_tokens = {}
+		self.statuses = {}
+		self.teams = {}
+		self.team_members = {}
+		self.channels = {}
+		self.channel_members = {}
+		self.posts = {}
+		self.channel_posts = {}
+		self.files = {}
+		self.reactions = {}
+		self.hooks = {}
+		self.sessions = {}
+		self._last_timestamp = 0
+
+	def now(self):
+		"""
+		:return: The time in milliseconds, increasing with every call so posts are ordered
+		"""
+		with self.lock:
+			self._last_timestamp = max(int(time.time() * 1000), self._last_timestamp + 1)
+			return self._last_timestamp
+
+	# Helpers
+
+	def _get(self, collection, item_id, name):
+		item = collection.get(item_id)
+		if item is None or item.get('delete_at'):
+			raise HTTPError(404, 'Unable to find the {name}'.format(name=name))
+		return item
+
+	def _user(self, user_id, request=None):
+		if request is not None and user_id == 'me':
+			user_id = request.user_id
+		return self._get(self.users, user_id, 'user')
+
+	def _emit(self, request, event, data, channel_id='', team_id='', user_id='', omit_user_id=None):
+		request.events.append((event, data, {
+			'omit_users': {omit_user_id: True} if omit_user_id else None,
+			'user_id': user_id,
+			'channel_id': channel_id,
+			'team_id': team_id,
+		}))
+
+	def create_user(self, username, password='password', email=None, roles='system_user', **fields):
+		with self.lock:
+			if any(user['username'] == username for user in self.users.values()):
+				raise HTTPError(400, 'An account with that username already exists')
+			now = self.now()
+			user = dict({
+				'id': new_id(),
+				'create_at': now,
+				'update_at': now,
+				'delete_at': 0,
+				'username': username,
+				'email': email or '{username}@example.com'.format(username=username),
+				'nickname': '',
+				'first_name': '',
+				'last_name': '',
+				'position': '',
+				'roles': roles,
+				'locale': 'en',
+				'auth_service': '',
+				'is_bot': False,
+			}, **fields)
+			self.users[user['id']] = user
+			self.passwords[user['id']] = password
+			self.statuses[user['id']] = 'offline'
+			return user
+
+	def create_token(self, user_id):
+		with self.lock:
+			token = new_id()
+			self.tokens[token] = user_id
+			return token
+
+	def revoke_token(self, token):
+		"""
+		Stops accepting a token and ends the websocket sessions opened with it.
+		"""
+		with self.lock:
+			self.tokens.pop(token, None)
+			ended = [session for session in self.sessions.values() if session.token == token]
+			for session in ended:
+				del self.sessions[session.connection_id]
+		for session in ended:
+			if session.connection is not None:
+				session.connection.close()
+
+	def create_team(self, name, display_name=None, team_type='O', creator_id=None):
+		with self.lock:
+			if any(team['name'] == name for team in self.teams.values()):
+				raise HTTPError(400, 'A team with that name already exists')
+			now = self.now()
+			team = {
+				'id': new_id(),
+				'create_at': now,
+				'update_at': now,
+				'delete_at': 0,
+				'name': name,
+				'display_name': display_name or name,
+				'type': team_type,
+				'description': '',
+				'email': '',
+				'allow_open_invite': team_type == 'O',
+			}
+			self.teams[team['id']] = team
+			self.team_members[team['id']] = []
+			if creator_id:
+				self.add_team_member(team['id'], creator_id)
+			return team
+
+	def add_team_member(self, team_id, user_id):
+		with self.lock:
+			members = self.team_members[team_id]
+			if user_id not in members:
+				members.append(user_id)
+			return {'team_id': team_id, 'user_id': user_id, 'roles': 'team_user', 'delete_at': 0}
+
+	def create_channel(self, team_id, name, display_name=None, channel_type='O', creator_id=None):
+		with self.lock:
+			if any(
+					channel['team_id'] == team_id and channel['name'] == name
+					for channel in self.channels.values()):
+				raise HTTPError(400, 'A channel with that name already exists on the same team')
+			now = self.now()
+			channel = {
+				'id': new_id(),
+				'create_at': now,
+				'update_at': now,
+				'delete_at': 0,
+				'team_id': team_id,
+				'type': channel_type,
+				'name': name,
+				'display_name': display_name or name,
+				'header': '',
+				'purpose': '',
+				'last_post_at': 0,
+				'total_msg_count': 0,
+				'creator_id': creator_id or '',
+			}
+			self.channels[channel['id']] = channel
+			self.channel_members[channel['id']] = []
+			self.channel_posts[channel['id']] = []
+			if creator_id:
+				self.add_channel_member(channel['id'], creator_id)
+			return channel
+
+	def add_channel_member(self, channel_id, user_id):
+		with self.lock:
+			members = self.channel_members[channel_id]
+			if user_id not in members:
+				members.append(user_id)
+			return self._channel_member(channel_id, user_id)
+
+	def _channel_member(self, channel_id, user_id):
+		return {
+			'channel_id': channel_id,
+			'user_id': user_id,
+			'roles': 'channel_user',
+			'last_viewed_at': 0,
+			'msg_count': 0,
+			'mention_count': 0,
+			'notify_props': {},
+		}
+
+	def create_post(self, request, channel_id, user_id, message, root_id='', file_ids=None, props=None):
+		with self.lock:
+			channel = self._get(self.channels, channel_id, 'channel')
+			if root_id:
+				self._get(self.posts, root_id, 'post')
+			now = self.now()
+			post = {
+				'id': new_id(),
+				'create_at': now,
+				'update_at': now,
+				'edit_at': 0,
+				'delete_at': 0,
+				'is_pinned': False,
+				'user_id': user_id,
+				'channel_id': channel_id,
+				'root_id': root_id,
+				'original_id': '',
+				'message': message,
+				'type': '',
+				'props': props or {},
+				'hashtags': '',
+				'file_ids': list(file_ids or []),
+				'pending_post_id': '',
+				'metadata': {},
+			}
+			for file_id in post['file_ids']:
+				info = self._get(self.files, file_id, 'file')['info']
+				if info['post_id']:
+					raise HTTPError(400, 'The file is already attached to a post')
+				info['post_id'] = post['id']
+			self.posts[post['id']] = post
+			self.channel_posts[channel_id].append(post['id'])
+			channel['last_post_at'] = now
+			channel['total_msg_count'] += 1
+			sender = self.users.get(user_id, {})
+			self._emit(request, 'posted', {
+				'channel_display_name': channel['display_name'],
+				'channel_name': channel['name'],
+				'channel_type': channel['type'],
+				'post': json.dumps(post),
+				'sender_name': '@' + sender.get('username', ''),
+				'team_id': channel['team_id'],
+			}, channel_id=channel_id)
+			return post
+
+	def _edit_post(self, request, post_id, changes):
+		with self.lock:
+			post = self._get(self.posts, post_id, 'post')
+			for key in ('message', 'props', 'is_pinned', 'file_ids', 'has_reactions'):
+				if key in changes:
+					post[key] = changes[key]
+			post['update_at'] = post['edit_at'] = self.now()
+			self._emit(request, 'post_edited', {'post': json.dumps(post)}, channel_id=post['channel_id'])
+			return post
+
+	def _post_list(self, post_ids):
+		return {
+			'order': post_ids,
+			'posts': {post_id: self.posts[post_id] for post_id in post_ids},
+			'next_post_id': '',
+			'prev_post_id': '',
+		}
+
+	# Users
+
+	@_route('POST', '/users/login', auth=False)
+	def login(self, request):
+		options = request.json()
+		login_id = options.get('login_id', '')
+		for user in self.users.values():
+			if login_id in (user['username'], user['email']) and not user['delete_at']:
+				if self.passwords.get(user['id']) == options.get('password'):
+					token = self.create_token(user['id'])
+					return _Response(200, user, headers={
+						'Token': token,
+						'Set-Cookie': 'MMAUTHTOKEN={token}; Path=/; HttpOnly'.format(token=token),
+					})
+		raise HTTPError(401, 'Enter a valid email or username and/or password')
+
+	@_route('POST', '/users/logout')
+	def logout(self, request):
+		self.revoke_token(self.server.token_of(request))
+		return {'status': 'OK'}
+
+	@_route('POST', '/users/{user_id}/tokens')
+	def create_user_access_token(self, request, user_id):
+		user = self._user(user_id, request)
+		access_token = {
+			'id': new_id(),
+			'token': self.create_token(user['id']),
+			'user_id': user['id'],
+			'description': request.json().get('description', ''),
+			'is_active': True,
+		}
+		self.access_tokens[access_token['id']] = access_token
+		return access_token
+
+	@_route('POST', '/users/tokens/revoke')
+	def revoke_user_access_token(self, request):
+		access_token = self.access_tokens.pop(request.json().get('token_id', ''), None)
+		if access_token is None:
+			raise HTTPError(404, 'Unable to find the token')
+		self.revoke_token(access_token['token'])
+		return {'status': 'OK'}
+
+	@_route('POST', '/users', auth=False)
+	def post_user(self, request):
+		options = request.json()
+		if not options.get('username'):
+			raise HTTPError(400, 'Invalid username')
+		fields = {key: value for key, value in options.items() if key not in ('username', 'password', 'email', 'id')}
+		user = self.create_user(options['username'], options.get('password', ''), options.get('email'), **fields)
+		return _Response(201, user)
+
+	@_route('GET', '/users')
+	def get_users(self, request):
+		users = [user for user in self.users.values() if not user['delete_at']]
+		if request.param('in_team'):
+			members = self.team_members.get(request.param('in_team'), [])
+			users = [user for user in users if user['id'] in members]
+		if request.param('in_channel'):
+			members = self.channel_members.get(request.param('in_channel'), [])
+			users = [user for user in users if user['id'] in members]
+		return _page(users, request)
+
+	@_route('POST', '/users/ids')
+	def get_users_by_ids(self, request):
+		return [self.users[user_id] for user_id in request.json() if user_id in self.users]
+
+	@_route('POST', '/users/usernames')
+	def get_users_by_usernames(self, request):
+		usernames = set(request.json())
+		return [user for user in self.users.values() if user['username'] in usernames]
+
+	@_route('GET', '/users/username/{username}')
+	def get_user_by_username(self, request, username):
+		for user in self.users.values():
+			if user['username'] == username:
+				return user
+		raise HTTPError(404, 'Unable to find the user')
+
+	@_route('GET', '/users/email/{email}')
+	def get_user_by_email(self, request, email):
+		for user in self.users.values():
+			if user['email'] == email:
+				return user
+		raise HTTPError(404, 'Unable to find the user')
+
+	@_route('GET', '/users/{user_id}')
+	def get_user(self, request, user_id):
+		return self._user(user_id, request)
+
+	@_route('PUT', '/users/{user_id}/patch')
+	def patch_user(self, request, user_id):
+		user = self._user(user_id, request)
+		for key, value in request.json().items():
+			if key not in ('id', 'create_at', 'delete_at', 'roles'):
+				user[key] = value
+		user['update_at'] = self.now()
+		self._emit(request, 'user_updated', {'user': user}, user_id=user['id'])
+		return user
+
+	@_route('GET', '/users/{user_id}/teams')
+	def get_user_teams(self, request, user_id):
+		user = self._user(user_id, request)
+		return [team for team in self.teams.values() if user['id'] in self.team_members[team['id']]]
+
+	@_route('GET', '/users/{user_id}/teams/{team_id}/channels')
+	def get_user_channels(self, request, user_id, team_id):
+		user = self._user(user_id, request)
+		return [
+			channel for channel in self.channels.values()
+			if channel['team_id'] in (team_id, '') and user['id'] in self.channel_members[channel['id']]
+		]
+
+	@_route('GET', '/users/{user_id}/status')
+	def get_user_status(self, request, user_id):
+		user = self._user(user_id, request)
+		return {'user_id': user['id'], 'status': self.statuses[user['id']], 'manual': False, 'last_activity_at': 0}
+
+	# Teams
+
+	@_route('POST', '/teams')
+	def post_team(self, request):
+		options = request.json()
+		return _Response(201, self.create_team(
+			options.get('name', ''), options.get('display_name'), options.get('type', 'O'), request.user_id))
+
+	@_route('GET', '/teams')
+	def get_teams(self, request):
+		return _page([team for team in self.teams.values() if not team['delete_at']], request)
+
+	@_route('GET', '/teams/{team_id}')
+	def get_team(self, request, team_id):
+		return self._get(self.teams, team_id, 'team')
+
+	@_route('GET', '/teams/name/{name}')
+	def get_team_by_name(self, request, name):
+		for team in self.teams.values():
+			if team['name'] == name and not team['delete_at']:
+				return team
+		raise HTTPError(404, 'Unable to find the team')
+
+	@_route('GET', '/teams/name/{name}/exists')
+	def check_team_exists(self, request, name):
+		return {'exists': any(team['name'] == name for team in self.teams.values())}
+
+	@_route('GET', '/teams/{team_id}/members')
+	def get_team_members(self, request, team_id):
+		self._get(self.teams, team_id, 'team')
+		members = [
+			{'team_id': team_id, 'user_id': user_id, 'roles': 'team_user', 'delete_at': 0}
+			for user_id in self.team_members[team_id]
+		]
+		return _page(members, request)
+
+	@_route('POST', '/teams/{team_id}/members')
+	def post_team_member(self, request, team_id):
+		self._get(self.teams, team_id, 'team')
+		user = self._user(request.json().get('user_id', ''))
+		return _Response(201, self.add_team_member(team_id, user['id']))
+
+	@_route('GET', '/teams/{team_id}/channels')
+	def get_public_channels(self, request, team_id):
+		self._get(self.teams, team_id, 'team')
+		channels = [
+			channel for channel in self.channels.values()
+			if channel['team_id'] == team_id and channel['type'] == 'O' and not channel['delete_at']
+		]
+		return _page(channels, request)
+
+	@_route('GET', '/teams/{team_id}/channels/name/{name}')
+	def get_channel_by_name(self, request, team_id, name):
+		for channel in self.channels.values():
+			if channel['team_id'] == team_id and channel['name'] == name and not channel['delete_at']:
+				return channel
+		raise HTTPError(404, 'Unable to find the channel')
+
+	@_route('GET', '/teams/name/{team_name}/channels/name/{name}')
+	def get_channel_by_name_and_team_name(self, request, team_name, name):
+		team = self.get_team_by_name(request, team_name)
+		return self.get_channel_by_name(request, team['id'], name)
+
+	# Channels
+
+	@_route('POST', '/channels')
+	def post_channel(self, request):
+		options = request.json()
+		self._get(self.teams, options.get('team_id', ''), 'team')
+		return _Response(201, self.create_channel(
+			options['team_id'], options.get('name', ''), options.get('display_name'),
+			options.get('type', 'O'), request.user_id))
+
+	@_route('POST', '/channels/direct')
+	def post_direct_channel(self, request):
+		user_ids = sorted(self._user(user_id)['id'] for user_id in request.json())
+		name = '__'.join(user_ids)
+		for channel in self.channels.values():
+			if channel['type'] == 'D' and channel['name'] == name:
+				return channel
+		channel = self.create_channel('', name, channel_type='D')
+		for user_id in user_ids:
+			self.add_channel_member(channel['id'], user_id)
+		return _Response(201, channel)
+
+	@_route('GET', '/channels/{channel_id}')
+	def get_channel(self, request, channel_id):
+		return self._get(self.channels, channel_id, 'channel')
+
+	@_route('PUT', '/channels/{channel_id}/patch')
+	def patch_channel(self, request, channel_id):
+		channel = self._get(self.channels, channel_id, 'channel')
+		for key, value in request.json().items():
+			if key in ('name', 'display_name', 'header', 'purpose'):
+				channel[key] = value
+		channel['update_at'] = self.now()
+		self._emit(request, 'channel_updated', {'channel': json.dumps(channel)}, channel_id=channel_id)
+		return channel
+
+	@_route('GET', '/channels/{channel_id}/members')
+	def get_channel_members(self, request, channel_id):
+		self._get(self.channels, channel_id, 'channel')
+		return _page([
+			self._channel_member(channel_id, user_id) for user_id in self.channel_members[channel_id]
+		], request)
+
+	@_route('POST', '/channels/{channel_id}/members')
+	def post_channel_member(self, request, channel_id):
+		channel = self._get(self.channels, channel_id, 'channel')
+		user = self._user(request.json().get('user_id', ''))
+		member = self.add_channel_member(channel_id, user['id'])
+		self._emit(request, 'user_added', {'user_id': user['id'], 'team_id': channel['team_id']}, channel_id=channel_id)
+		return _Response(201, member)
+
+	@_route('DELETE', '/channels/{channel_id}/members/{user_id}')
+	def delete_channel_member(self, request, channel_id, user_id):
+		self._get(self.channels, channel_id, 'channel')
+		user = self._user(user_id, request)
+		if user['id'] in self.channel_members[channel_id]:
+			self.channel_members[channel_id].remove(user['id'])
+		self._emit(request, 'user_removed', {'user_id': user['id'], 'remover_id': request.user_id}, channel_id=channel_id)
+		return {'status': 'OK'}
+
+	@_route('GET', '/channels/{channel_id}/posts')
+	def get_posts_for_channel(self, request, channel_id):
+		self._get(self.channels, channel_id, 'channel')
+		post_ids = [post_id for post_id in self.channel_posts[channel_id] if not self.posts[post_id]['delete_at']]
+		since, before, after = request.param('since'), request.param('before'), request.param('after')
+		if since:
+			since = int(since)
+			return self._post_list([
+				post_id for post_id in reversed(post_ids) if self.posts[post_id]['update_at'] > since
+			])
+		page = request.int_param('page', 0)
+		per_page = _per_page(request)
+		if after:
+			newer = post_ids[post_ids.index(after) + 1:] if after in post_ids else []
+			return self._post_list(list(reversed(newer[page * per_page:(page + 1) * per_page])))
+		if before:
+			post_ids = post_ids[:post_ids.index(before)] if before in post_ids else []
+		newest_first = list(reversed(post_ids))
+		return self._post_list(newest_first[page * per_page:(page + 1) * per_page])
+
+	# Posts
+
+	@_route('POST', '/posts')
+	def post_post(self, request):
+		options = request.json()
+		return _Response(201, self.create_post(
+			request, options.get('channel_id', ''), request.user_id, options.get('message', ''),
+			options.get('root_id', ''), options.get('file_ids'), options.get('props')))
+
+	@_route('GET', '/posts/{post_id}')
+	def get_post(self, request, post_id):
+		return self._get(self.posts, post_id, 'post')
+
+	@_route('PUT', '/posts/{post_id}')
+	def update_post(self, request, post_id):
+		return self._edit_post(request, post_id, request.json())
+
+	@_route('PUT', '/posts/{post_id}/patch')
+	def patch_post(self, request, post_id):
+		return self._edit_post(request, post_id, request.json())
+
+	@_route('DELETE', '/posts/{post_id}')
+	def delete_post(self, request, post_id):
+		post = self._get(self.posts, post_id, 'post')
+		post['delete_at'] = post['update_at'] = self.now()
+		self._emit(request, 'post_deleted', {'post': json.dumps(post)}, channel_id=post['channel_id'])
+		return {'status': 'OK'}
+
+	@_route('GET', '/posts/{post_id}/thread')
+	def get_post_thread(self, request, post_id):
+		root = self._get(self.posts, post_id, 'post')
+		root_id = root['root_id'] or root['id']
+		thread = [
+			post_id for post_id in self.channel_posts[root['channel_id']]
+			if (post_id == root_id or self.posts[post_id]['root_id'] == root_id) and not self.posts[post_id]['delete_at']
+		]
+		return self._post_list(list(reversed(thread)))
+
+	@_route('GET', '/posts/{post_id}/files/info')
+	def get_file_info_for_post(self, request, post_id):
+		post = self._get(self.posts, post_id, 'post')
+		return [self.files[file_id]['info'] for file_id in post['file_ids'] if file_id in self.files]
+
+	# Files
+
+	@_route('POST', '/files')
+	def upload_file(self, request):
+		content_type = request.headers.get('Content-Type', '')
+		if content_type.startswith('multipart/form-data'):
+			fields, files = _parse_multipart(request.body, content_type)
+			channel_id = fields.get('channel_id') or request.param('channel_id', '')
+		else:
+			channel_id = request.param('channel_id', '')
+			files = [(request.param('filename', 'file'), request.body)]
+		self._get(self.channels, channel_id, 'channel')
+		infos = []
+		for filename, content in files:
+			now = self.now()
+			info = {
+				'id': new_id(),
+				'user_id': request.user_id,
+				'channel_id': channel_id,
+				'post_id': '',
+				'create_at': now,
+				'update_at': now,
+				'delete_at': 0,
+				'name': filename,
+				'extension': filename.rsplit('.', 1)[1].lower() if '.' in filename else '',
+				'size': len(content),
+				'mime_type': 'application/octet-stream',
+				'has_preview_image': False,
+			}
+			self.files[info['id']] = {'info': info, 'content': content}
+			infos.append(info)
+		return _Response(201, {'file_infos': infos, 'client_ids': []})
+
+	@_route('GET', '/files/{file_id}')
+	@_route('GET', '/files/{file_id}/thumbnail')
+	@_route('GET', '/files/{file_id}/preview')
+	def get_file(self, request, file_id):
+		stored = self._get(self.files, file_id, 'file')
+		content = stored['content']
+		headers = {
+			'Accept-Ranges': 'bytes',
+			'Content-Disposition': 'attachment; filename="{name}"'.format(name=stored['info']['name']),
+		}
+		byte_range = _parse_range(request.headers.get('Range'), len(content))
+		if byte_range is None:
+			return _Response(200, raw=content, headers=headers, content_type='application/octet-stream')
+		first, last = byte_range
+		headers['Content-Range'] = 'bytes {first}-{last}/{size}'.format(first=first, last=last, size=len(content))
+		return _Response(206, raw=content[first:last + 1], headers=headers, content_type='application/octet-stream')
+
+	@_route('GET', '/files/{file_id}/info')
+	def get_file_metadata(self, request, file_id):
+		return self._get(self.files, file_id, 'file')['info']
+
+	@_route('GET', '/files/{file_id}/link')
+	def get_public_file_link(self, request, file_id):
+		self._get(self.files, file_id, 'file')
+		return {'link': '{url}/files/{file_id}/public'.format(url=self.server.url, file_id=file_id)}
+
+	# Reactions
+
+	@_route('POST', '/reactions')
+	def post_reaction(self, request):
+		options = request.json()
+		post = self._get(self.posts, options.get('post_id', ''), 'post')
+		reaction = {
+			'user_id': options.get('user_id') or request.user_id,
+			'post_id': post['id'],
+			'emoji_name': options.get('emoji_name', ''),
+			'create_at': self.now(),
+		}
+		reactions = self.reactions.setdefault(post['id'], [])
+		reactions[:] = [
+			other for other in reactions
+			if (other['user_id'], other['emoji_name']) != (reaction['user_id'], reaction['emoji_name'])
+		]
+		reactions.append(reaction)
+		post['has_reactions'] = True
+		self._emit(request, 'reaction_added', {'reaction': json.dumps(reaction)}, channel_id=post['channel_id'])
+		return _Response(201, reaction)
+
+	@_route('GET', '/posts/{post_id}/reactions')
+	def get_reactions_of_post(self, request, post_id):
+		self._get(self.posts, post_id, 'post')
+		return self.reactions.get(post_id, [])
+
+	@_route('DELETE', '/users/{user_id}/posts/{post_id}/reactions/{emoji_name}')
+	def delete_reaction(self, request, user_id, post_id, emoji_name):
+		post = self._get(self.posts, post_id, 'post')
+		user = self._user(user_id, request)
+		reactions = self.reactions.get(post_id, [])
+		for reaction in reactions:
+			if reaction['user_id'] == user['id'] and reaction['emoji_name'] == emoji_name:
+				reactions.remove(reaction)
+				post['has_reactions'] = bool(reactions)
+				self._emit(request, 'reaction_removed', {'reaction': json.dumps(reaction)}, channel_id=post['channel_id'])
+				break
+		return {'status': 'OK'}
+
+	# Webhooks
+
+	@_route('POST', '/hooks/incoming')
+	def post_incoming_hook(self, request):
+		options = request.json()
+		channel = self._get(self.channels, options.get('channel_id', ''), 'channel')
+		now = self.now()
+		hook = {
+			'id': new_id(),
+			'create_at': now,
+			'update_at': now,
+			'delete_at': 0,
+			'channel_id': channel['id'],
+			'team_id': channel['team_id'],
+			'user_id': request.user_id,
+			'display_name': options.get('display_name', ''),
+			'description': options.get('description', ''),
+			'username': options.get('username', ''),
+			'icon_url': options.get('icon_url', ''),
+			'channel_locked': options.get('channel_locked', False),
+		}
+		self.hooks[hook['id']] = hook
+		return _Response(201, hook)
+
+	@_route('GET', '/hooks/incoming')
+	def list_incoming_hooks(self, request):
+		hooks = [hook for hook in self.hooks.values() if not hook['delete_at']]
+		if request.param('team_id'):
+			hooks = [hook for hook in hooks if hook['team_id'] == request.param('team_id')]
+		return _page(hooks, request)
+
+	@_route('GET', '/hooks/incoming/{hook_id}')
+	def get_incoming_hook(self, request, hook_id):
+		return self._get(self.hooks, hook_id, 'hook')
+
+	@_route('PUT', '/hooks/incoming/{hook_id}')
+	def update_incoming_hook(self, request, hook_id):
+		hook = self._get(self.hooks, hook_id, 'hook')
+		for key, value in request.json().items():
+			if key in ('channel_id', 'display_name', 'description', 'username', 'icon_url', 'channel_locked'):
+				hook[key] = value
+		hook['update_at'] = self.now()
+		return hook
+
+	@_route('DELETE', '/hooks/incoming/{hook_id}')
+	def delete_incoming_hook(self, request, hook_id):
+		hook = self._get(self.hooks, hook_id, 'hook')
+		hook['delete_at'] = self.now()
+		return {'status': 'OK'}
+
+	def call_webhook(self, request, hook_id):
+		hook = self._get(self.hooks, hook_id, 'hook')
+		options = request.json()
+		if not options.get('text') and not options.get('attachments'):
+			raise HTTPError(400, 'Unable to parse the webhook payload')
+		props = {'from_webhook': 'true'}
+		if options.get('attachments'):
+			props['attachments'] = options['attachments']
+		self.create_post(request, hook['channel_id'], hook['user_id'], options.get('text', ''), props=props)
+		return _Response(200, raw=b'ok', content_type='text/plain')
+
+
+class _Handler(BaseHTTPRequestHandler):
+	protocol_version = 'HTTP/1.1'
+	server_version = 'FakeMattermost'
+	# Headers and body are written separately, without this each response waits for a delayed ACK
+	disable_nagle_algorithm = True
+
+	def log_message(self, format, *args):
+		log.debug(format, *args)
+
+	def do_GET(self):
+		if urlsplit(self.path).path.rstrip('/') == API + '/websocket' and \
+				self.headers.get('Upgrade', '').lower() == 'websocket':
+			self.server.fake.websocket(self)
+			self.close_connection = True
+			return
+		self._dispatch()
+
+	def do_POST(self):
+		self._dispatch()
+
+	def do_PUT(self):
+		self._dispatch()
+
+	def do_DELETE(self):
+		self._dispatch()
+
+	def _read_body(self):
+		if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+			body = b''
+			while True:
+				size = int(self.rfile.readline().split(b';', 1)[0].strip(), 16)
+				if not size:
+					while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+						pass
+					return body
+				body += self.rfile.read(size)
+				self.rfile.readline()
+		return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+	def _dispatch(self):
+		body = self._read_body()
+		url = urlsplit(self.path)
+		request = _Request(
+			self.command,
+			re.sub('/+', '/', unquote(url.path)),
+			{key: values[-1] for key, values in parse_qs(url.query).items()},
+			self.headers,
+			body
+		)
+		self._send(self.server.fake.handle(request))
+
+	def _accepts_gzip(self):
+		encodings = [encoding.split(';', 1)[0].strip() for encoding in self.headers.get('Accept-Encoding', '').split(',')]
+		return 'gzip' in encodings
+
+	def _send(self, response):
+		body = response.body
+		self.send_response(response.status)
+		for name, value in response.headers.items():
+			self.send_header(name, value)
+		if self.server.fake.gzip and response.status == 200 and len(body) >= GZIP_MIN_SIZE:
+			self.send_header('Vary', 'Accept-Encoding')
+			if self._accepts_gzip():
+				body = gzip.compress(body, compresslevel=5)
+				self.send_header('Content-Encoding', 'gzip')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		if self.command != 'HEAD':
+			self.wfile.write(body)
+
+
+class _HTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+	daemon_threads = True
+	allow_reuse_address = True
+	request_queue_size = 128
+
+
+class FakeMattermost:
+	"""
+	A fake Mattermost server running in a background thread.
+
+	An admin user is created with it, see :attr:`admin` and :attr:`token`.
+	"""
+
+	def __init__(self, host='127.0.0.1', port=0, latency=0, fault_rate=0, fault_status=503, seed=None, gzip=False):
+		"""
+		:param host: The address to listen on
+		:param port: The port to listen on, 0 for a free port
+		:param latency: Seconds every request is delayed, or a (min, max) range to pick from
+		:param fault_rate: Share of requests failing with `fault_status`, between 0 and 1
+		:param fault_status: Status code of the failing requests
+		:param seed: Seed of the random latency and faults, to make them reproducible
+		:param gzip: Compress responses larger than :data:`GZIP_MIN_SIZE` bytes if the client accepts gzip
+		"""
+		self.host = host
+		self.latency = latency
+		self.fault_rate = fault_rate
+		self.fault_status = fault_status
+		self.gzip = gzip
+		self._random = random.Random(seed)
+		self._random_lock = threading.Lock()
+		self._failures = deque()
+		self._api = _Api(self)
+		self._server = _HTTPServer((host, port), _Handler)
+		self._server.fake = self
+		self._thread = None
+		self._connections = []
+		self._stats_lock = threading.Lock()
+		self._stats = {'requests': 0, 'faults': 0, 'not_modified': 0, 'websockets': 0, 'events': 0}
+		self.admin = self._api.create_user('admin', 'admin', roles='system_admin system_user')
+		self.token = self._api.create_token(self.admin['id'])
+
+	@property
+	def port(self):
+		return self._server.server_address[1]
+
+	@property
+	def url(self):
+		"""
+		:return: The url of the server, e.g. ``http://127.0.0.1:8065``
+		"""
+		return 'http://{host}:{port}'.format(host=self.host, port=self.port)
+
+	def start(self):
+		"""
+		Starts serving in a background thread.
+		"""
+		if self._thread is None:
+			self._thread = threading.Thread(target=self._server.serve_forever, name='FakeMattermost', daemon=True)
+			self._thread.start()
+		return self
+
+	def stop(self):
+		"""
+		Stops the server and closes all websockets.
+		"""
+		self.drop_websockets()
+		if self._thread is not None:
+			self._server.shutdown()
+			self._thread.join()
+			self._thread = None
+		self._server.server_close()
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *exc_info):
+		self.stop()
+
+	def driver_options(self, user_id=None, **options):
+		"""
+		:param user_id: The user to log in as, the admin by default
+		:param options: Further options of the driver
+		:return: The options for a :class:`~mattermostdriver.Driver` connecting to this server
+		"""
+		token = self.token if user_id is None else self.create_token(user_id)
+		return dict({
+			'url': self.host,
+			'port': self.port,
+			'scheme': 'http',
+			'basepath': API,
+			'token': token,
+		}, **options)
+
+	def add_user(self, username, password='password', email=None, **fields):
+		"""
+		:return: The created user
+		"""
+		return self._api.create_user(username, password, email, **fields)
+
+	def create_token(self, user_id):
+		"""
+		:return: A new session token of the user
+		"""
+		return self._api.create_token(user_id)
+
+	def add_team(self, name, display_name=None, members=()):
+		"""
+		:param members: Ids of users added to the team, besides the admin
+		:return: The created team
+		"""
+		team = self._api.create_team(name, display_name, creator_id=self.admin['id'])
+		for user_id in members:
+			self._api.add_team_member(team['id'], user_id)
+		return team
+
+	def add_channel(self, team_id, name, display_name=None, channel_type='O', members=()):
+		"""
+		:param members: Ids of users added to the channel, besides the admin
+		:return: The created channel
+		"""
+		channel = self._api.create_channel(team_id, name, display_name, channel_type, creator_id=self.admin['id'])
+		for user_id in members:
+			self._api.add_channel_member(channel['id'], user_id)
+		return channel
+
+	def add_post(self, channel_id, message, user_id=None, root_id=''):
+		"""
+		Creates a post as if a user wrote it, sending the `posted` event.
+
+		:return: The created post
+		"""
+		request = _Request('POST', API + '/posts', {}, {}, b'')
+		with self._api.lock:
+			post = self._api.create_post(request, channel_id, user_id or self.admin['id'], message, root_id)
+		self._broadcast(request.events)
+		return post
+
+	def fail_next(self, count=1, status=None):
+		"""
+		Lets the next requests fail.
+
+		:param count: Number of requests to fail
+		:param status: Their status code, `fault_status` by default
+		"""
+		with self._random_lock:
+			self._failures.extend([status or self.fault_status] * count)
+
+	def drop_websockets(self):
+		"""
+		Closes the connections of all websockets, like a restarting server or a broken network.
+		Their sessions are kept, so they can be resumed.
+		"""
+		with self._api.lock:
+			connections, self._connections = self._connections, []
+		for connection in connections:
+			connection.drop()
+
+	@property
+	def stats(self):
+		"""
+		:return: The `requests` handled, the `faults` injected, the responses `not_modified`, the `websockets` connected
+			and the `events` sent to them
+		"""
+		with self._stats_lock:
+			stats = dict(self._stats)
+		stats['connected'] = len(self._connections)
+		return stats
+
+	def _count(self, name, value=1):
+		with self._stats_lock:
+			self._stats[name] += value
+
+	def token_of(self, request):
+		authorization = request.headers.get('Authorization', '')
+		if authorization.lower().startswith('bearer '):
+			return authorization[7:].strip()
+		match = re.search(r'MMAUTHTOKEN=([^;\s]+)', request.headers.get('Cookie', ''))
+		return match.group(1) if match else None
+
+	def _delay(self):
+		latency = self.latency
+		if isinstance(latency, (tuple, list)):
+			with self._random_lock:
+				latency = self._random.uniform(*latency)
+		if latency:
+			time.sleep(latency)
+
+	def _fault(self):
+		with self._random_lock:
+			if self._failures:
+				return self._failures.popleft()
+			if self.fault_rate and self._random.random() < self.fault_rate:
+				return self.fault_status
+		return None
+
+	@staticmethod
+	def _error(status, message):
+		return _Response(status, {
+			'id': 'api.fake.error',
+			'message': message,
+			'detailed_error': '',
+			'request_id': new_id(),
+			'status_code': status,
+		})
+
+	def handle(self, request):
+		"""
+		:return: The :class:`_Response` to a request
+		"""
+		self._count('requests')
+		self._delay()
+		status = self._fault()
+		if status is not None:
+			self._count('faults')
+			response = self._error(status, 'Injected fault')
+			if status == 429:
+				# Like the rate limiter of Mattermost
+				response.headers['Retry-After'] = '1'
+			return response
+
+		try:
+			if request.path.startswith('/hooks/') and request.method == 'POST':
+				handler, params, auth = _Api.call_webhook, {'hook_id': request.path[len('/hooks/'):]}, False
+			elif request.path.startswith(API + '/'):
+				handler, params, auth = self._find_route(request.method, request.path[len(API):])
+			else:
+				raise HTTPError(404, 'Not found')
+		except HTTPError as e:
+			return self._error(e.status, e.message)
+
+		with self._api.lock:
+			if auth:
+				request.user_id = self._api.tokens.get(self.token_of(request))
+				if request.user_id is None:
+					return self._error(401, 'Invalid or expired session, please login again.')
+			try:
+				result = handler(self._api, request, **params)
+			except HTTPError as e:
+				return self._error(e.status, e.message)
+			except (KeyError, TypeError, ValueError, AttributeError) as e:
+				log.debug('Invalid request %s %s: %r', request.method, request.path, e)
+				return self._error(400, 'Invalid or missing parameters')
+		self._broadcast(request.events)
+		response = result if isinstance(result, _Response) else _Response(200, result)
+		if request.method == 'GET' and response.status == 200:
+			return self._not_modified(request, response)
+		return response
+
+	def _not_modified(self, request, response):
+		"""
+		Adds an ETag to a response like mattermost does,
+		and answers with 304 Not Modified if the client has the same one.
+		"""
+		etag = '"{digest}"'.format(digest=hashlib.md5(response.body).hexdigest())
+		response.headers['Etag'] = etag
+		if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+			self._count('not_modified')
+			return _Response(304, raw=b'', headers={'Etag': etag})
+		return response
+
+	@staticmethod
+	def _find_route(method, path):
+		"""
+		:return: The handler of a route, the parameters in its path and whether it needs a session
+		:raises HTTPError: If there is no such route
+		"""
+		allowed = False
+		for route_method, regex, function, auth in _ROUTES:
+			match = regex.match(path)
+			if match:
+				if route_method == method:
+					return function, match.groupdict(), auth
+				allowed = True
+		if allowed:
+			raise HTTPError(405, 'Method not allowed')
+		raise HTTPError(404, 'Not found')
+
+	# Websocket
+
+	def websocket(self, handler):
+		"""
+		Accepts a websocket upgrade and serves the connection until it is closed.
+		"""
+		key = handler.headers.get('Sec-WebSocket-Key', '')
+		accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode('latin-1')).digest()).decode('latin-1')
+		handler.send_response(101)
+		handler.send_header('Upgrade', 'websocket')
+		handler.send_header('Connection', 'Upgrade')
+		handler.send_header('Sec-WebSocket-Accept', accept)
+		handler.end_headers()
+		handler.wfile.flush()
+
+		query = {key: values[-1] for key, values in parse_qs(urlsplit(handler.path).query).items()}
+		connection = _WebsocketConnection(handler.connection, handler.rfile, handler.wfile)
+		with self._api.lock:
+			self._connections.append(connection)
+		self._count('websockets')
+		try:
+			token = self.token_of(handler)
+			user_id = self._api.tokens.get(token)
+			if user_id is not None:
+				self._open_session(connection, user_id, token, query)
+			while True:
+				message = connection.read_message()
+				if message is None:
+					break
+				self._websocket_message(connection, message, query)
+		except (ConnectionError, OSError, ValueError) as e:
+			log.debug('Websocket closed: %r', e)
+		finally:
+			connection.closed = True
+			with self._api.lock:
+				if connection in self._connections:
+					self._connections.remove(connection)
+				if connection.session is not None and connection.session.connection is connection:
+					connection.session.connection = None
+
+	def _websocket_message(self, connection, message, query):
+		try:
+			request = json.loads(message.decode('utf8'))
+		except ValueError:
+			return
+		seq = request.get('seq', 0)
+		action = request.get('action')
+		if connection.session is None:
+			user_id = token = None
+			if action == 'authentication_challenge':
+				token = (request.get('data') or {}).get('token')
+				user_id = self._api.tokens.get(token)
+			if user_id is None:
+				connection.send_json({
+					'status': 'FAIL',
+					'seq_reply': seq,
+					'error': {'id': 'api.web_socket_router.not_authenticated.app_error', 'message': 'Not authenticated'},
+				})
+				connection.close()
+				return
+			connection.send_json({'status': 'OK', 'seq_reply': seq})
+			self._open_session(connection, user_id, token, query)
+			return
+
+		connection.send_json({'status': 'OK', 'seq_reply': seq})
+		if action == 'user_typing':
+			data = request.get('data') or {}
+			self._broadcast([(
+				'typing',
+				{'parent_id': data.get('parent_id', ''), 'user_id': connection.session.user_id},
+				{
+					'omit_users': {connection.session.user_id: True},
+					'user_id': '',
+					'channel_id': data.get('channel_id', ''),
+					'team_id': '',
+				}
+			)])
+
+	def _open_session(self, connection, user_id, token, query):
+		"""
+		Resumes the session of the connection id in the query, if its missed events are still
+		buffered, else starts a new session. Sends the hello event.
+		"""
+		with self._api.lock:
+			session = self._api.sessions.get(query.get('connection_id'))
+			resumed = False
+			if session is not None and session.user_id == user_id:
+				try:
+					sequence = int(query.get('sequence_number', ''))
+				except ValueError:
+					sequence = -1
+				oldest = session.buffer[0]['seq'] if session.buffer else session.seq
+				resumed = oldest <= sequence <= session.seq
+			if not resumed:
+				session = _Session(user_id, token)
+				self._api.sessions[session.connection_id] = session
+				sequence = 0
+			session.connection = connection
+			connection.session = session
+			self._api.statuses[user_id] = 'online'
+			missed = [event for event in session.buffer if event['seq'] >= sequence]
+		for event in missed:
+			connection.send_json(event)
+		self._send_event(session, 'hello', {
+			'server_version': '9.0.0.fake',
+			'connection_id': session.connection_id,
+		}, {'omit_users': None, 'user_id': user_id, 'channel_id': '', 'team_id': ''})
+
+	def _send_event(self, session, event, data, broadcast):
+		with self._api.lock:
+			message = {'event': event, 'data': data, 'broadcast': broadcast, 'seq': session.seq}
+			session.seq += 1
+			session.buffer.append(message)
+			connection = session.connection
+		if connection is not None and connection.send_json(message):
+			self._count('events')
+
+	def _receives(self, session, broadcast):
+		if broadcast['omit_users'] and session.user_id in broadcast['omit_users']:
+			return False
+		if broadcast['channel_id']:
+			return session.user_id in self._api.channel_members.get(broadcast['channel_id'], ())
+		if broadcast['team_id']:
+			return session.user_id in self._api.team_members.get(broadcast['team_id'], ())
+		if broadcast['user_id']:
+			return session.user_id == broadcast['user_id']
+		return True
+
+	def _broadcast(self, events):
+		for event, data, broadcast in events:
+			with self._api.lock:
+				sessions = [session for session in self._api.sessions.values() if self._receives(session, broadcast)]
+			for session in sessions:
+				self._send_event(session, event, data, broadcast)
+
+
+def main(args=None):
+	parser = argparse.ArgumentParser(description='Runs a fake Mattermost server.')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8065)
+	parser.add_argument('--latency', type=float, default=0, help='Seconds every request is delayed')
+	parser.add_argument('--fault-rate', type=float, default=0, help='Share of requests failing')
+	parser.add_argument('--fault-status', type=int, default=503, help='Status code of the failing requests')
+	parser.add_argument('--seed', type=int, default=None)
+	parser.add_argument('--gzip', action='store_true', help='Compress large responses')
+	args = parser.parse_args(args)
+
+	server = FakeMattermost(args.host, args.port, args.latency, args.fault_rate, args.fault_status, args.seed, args.gzip)
+	team = server.add_team('team', 'Team')
+	server.add_channel(team['id'], 'town-square', 'Town Square')
+	print('Serving {url}{api}, log in as admin/admin or with the token {token}'.format(
+		url=server.url, api=API, token=server.token))
+	server.start()
+	try:
+		server._thread.join()
+	except KeyboardInterrupt:
+		server.stop()
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,196 @@
+"""
+Streams the history of a channel in chronological order.
+
+The walk is anchored on a post id and fetches the following pages
+with the `after` cursor of `Posts.get_posts_for_channel`. Several pages
+are requested concurrently, but only the pages in flight are held in memory.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .pagination import DEFAULT_PER_PAGE, MAX_PER_PAGE
+
+
+def _chronological(post_list):
+	posts = [post_list['posts'][post_id] for post_id in post_list['order']]
+	posts.sort(key=lambda post: (post['create_at'], post['id']))
+	return posts
+
+
+class ChannelHistory:
+	"""
+	Iterates over all posts of a channel, oldest first.
+	Use ``for`` with :class:`~mattermostdriver.Driver` and ``async for``
+	with :class:`~mattermostdriver.AsyncDriver`.
+
+	:attr:`cursor` always holds the id of the last post yielded. Save it,
+	and pass it as `after` to continue an interrupted export from there.
+
+	.. code:: python
+
+		history = driver.posts.iter_channel_history(channel_id, after=saved_cursor)
+		for post in history:
+			archive(post)
+			saved_cursor = history.cursor
+	"""
+
+	def __init__(self, posts, channel_id, after=None, before=None, since=None,
+			per_page=DEFAULT_PER_PAGE, prefetch=4):
+		"""
+		:param posts: The :class:`~mattermostdriver.endpoints.posts.Posts` endpoint
+		:param channel_id: The channel to walk
+		:param after: Only yield posts after this post id (exclusive), e.g. a saved cursor
+		:param before: Stop at this post id (exclusive)
+		:param since: Only yield posts created at or after this timestamp in milliseconds
+		:param per_page: Number of posts requested per page, at most
+			:data:`~mattermostdriver.pagination.MAX_PER_PAGE`
+		:param prefetch: Number of pages requested concurrently
+		"""
+		self._posts = posts
+		self.channel_id = channel_id
+		self.cursor = after
+		self.before = before
+		self.since = since
+		# The server cuts larger pages, which would be taken for the last one
+		self.per_page = min(per_page, MAX_PER_PAGE)
+		self.prefetch = max(1, prefetch)
+
+	def _params(self, page, after=None):
+		params = {'page': page, 'per_page': self.per_page}
+		if after:
+			params['after'] = after
+		return params
+
+	def _fetch(self, page, after=None):
+		return self._posts.get_posts_for_channel(self.channel_id, params=self._params(page, after))
+
+	def _contains_start(self, post_list):
+		"""
+		Whether a page (counted from the newest post) still holds posts to export.
+		"""
+		if not post_list['order']:
+			return False
+		if self.since is None:
+			return True
+		return max(post['create_at'] for post in post_list['posts'].values()) >= self.since
+
+	def _first_posts(self, post_list):
+		return [post for post in _chronological(post_list) if self.since is None or post['create_at'] >= self.since]
+
+	def _yield_posts(self, posts):
+		"""
+		:return: False when the `before` post has been reached
+		"""
+		for post in posts:
+			if post['id'] == self.before:
+				return False
+			self.cursor = post['id']
+			yield post
+		return True
+
+	def __iter__(self):
+		if self.cursor is None:
+			start = self._find_start()
+			if start is None:
+				return
+			if not (yield from self._yield_posts(self._first_posts(start))):
+				return
+
+		anchor = self.cursor
+		with ThreadPoolExecutor(max_workers=self.prefetch) as executor:
+			pending = deque(executor.submit(self._fetch, page, anchor) for page in range(self.prefetch))
+			next_page = self.prefetch
+			try:
+				while pending:
+					post_list = pending.popleft().result()
+					posts = _chronological(post_list)
+					if len(posts) < self.per_page:
+						for future in pending:
+							future.cancel()
+						pending.clear()
+					else:
+						pending.append(executor.submit(self._fetch, next_page, anchor))
+						next_page += 1
+					if not (yield from self._yield_posts(posts)):
+						return
+			finally:
+				for future in pending:
+					future.cancel()
+
+	def _find_start(self):
+		"""
+		Finds the oldest page holding posts to export, with an exponential
+		followed by a binary search over the page numbers.
+		"""
+		first = self._fetch(0)
+		if not self._contains_start(first):
+			return None
+		low, low_list, high = 0, first, 1
+		while True:
+			post_list = self._fetch(high)
+			if not self._contains_start(post_list):
+				break
+			low, low_list, high = high, post_list, high * 2
+		while high - low > 1:
+			middle = (low + high) // 2
+			post_list = self._fetch(middle)
+			if self._contains_start(post_list):
+				low, low_list = middle, post_list
+			else:
+				high = middle
+		return low_list
+
+	async def __aiter__(self):
+		if self.cursor is None:
+			start = await self._afind_start()
+			if start is None:
+				return
+			for post in self._first_posts(start):
+				if post['id'] == self.before:
+					return
+				self.cursor = post['id']
+				yield post
+
+		anchor = self.cursor
+		pending = deque(asyncio.ensure_future(self._fetch(page, anchor)) for page in range(self.prefetch))
+		next_page = self.prefetch
+		try:
+			while pending:
+				post_list = await pending.popleft()
+				posts = _chronological(post_list)
+				if len(posts) < self.per_page:
+					for task in pending:
+						task.cancel()
+					pending.clear()
+				else:
+					pending.append(asyncio.ensure_future(self._fetch(next_page, anchor)))
+					next_page += 1
+				for post in posts:
+					if post['id'] == self.before:
+						return
+					self.cursor = post['id']
+					yield post
+		finally:
+			for task in pending:
+				task.cancel()
+
+	async def _afind_start(self):
+		first = await self._fetch(0)
+		if not self._contains_start(first):
+			return None
+		low, low_list, high = 0, first, 1
+		while True:
+			post_list = await self._fetch(high)
+			if not self._contains_start(post_list):
+				break
+			low, low_list, high = high, post_list, high * 2
+		while high - low > 1:
+			middle = (low + high) // 2
+			post_list = await self._fetch(middle)
+			if self._contains_start(post_list):
+				low, low_list = middle, post_list
+			else:
+				high = middle
+		return low_list
@@ -0,0 +1,344 @@
+"""
+Caching the responses of GET requests by their ETag, to revalidate them with If-None-Match.
+
+Mattermost sends an ETag with many responses, e.g. of users, channels, teams, emojis
+and the config. When a cached response is requested again, the server answers
+with 304 Not Modified and an empty body if it did not change, which is served from the cache.
+
+The entries are kept by a storage, in memory or on disk, bounded by the size of the bodies.
+Any object with the methods of :class:`MemoryStorage` can be used as storage.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from urllib.parse import urlencode
+
+log = logging.getLogger('mattermostdriver.httpcache')
+log.setLevel(logging.INFO)
+
+# The body is stored decoded and credentials are not stored, so these headers are not kept
+_DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'set-cookie', 'connection')
+
+CacheEntry = namedtuple('CacheEntry', ['etag', 'headers', 'body'])
+CacheEntry.__doc__ = """
+A cached response: its `etag`, a dict of its `headers` and the decoded `body` as bytes.
+"""
+
+
+def _size(entry):
+	return len(entry.body) + sum(len(name) + len(value) for name, value in entry.headers.items())
+
+
+class MemoryStorage:
+	"""
+	A thread safe LRU storage of the cached responses in memory.
+	"""
+
+	def __init__(self, maxsize=64 * 1024 * 1024):
+		"""
+		:param maxsize: Maximum bytes of the stored responses
+		"""
+		self.maxsize = maxsize
+		self._lock = threading.Lock()
+		self._entries = OrderedDict()
+		self._size = 0
+		self._evictions = 0
+
+	@property
+	def size(self):
+		"""
+		:return: Bytes of the stored responses
+		"""
+		return self._size
+
+	@property
+	def evictions(self):
+		return self._evictions
+
+	def __len__(self):
+		return len(self._entries)
+
+	def get(self, key):
+		"""
+		:return: The :class:`CacheEntry` stored for `key`, or None
+		"""
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is not None:
+				self._entries.move_to_end(key)
+			return entry
+
+	def put(self, key, entry):
+		"""
+		Stores an entry, evicting the least recently used ones if the storage is full.
+		Entries larger than the storage are not stored.
+		"""
+		size = _size(entry)
+		with self._lock:
+			self._remove(key)
+			if size > self.maxsize:
+				return
+			self._entries[key] = entry
+			self._size += size
+			while self._size > self.maxsize:
+				self._remove(next(iter(self._entries)))
+				self._evictions += 1
+
+	def _remove(self, key):
+		entry = self._entries.pop(key, None)
+		if entry is not None:
+			self._size -= _size(entry)
+
+	def delete(self, key):
+		with self._lock:
+			self._remove(key)
+
+	def clear(self):
+		with self._lock:
+			self._entries.clear()
+			self._size = 0
+
+
+class DiskStorage:
+	"""
+	Stores the cached responses as files in a directory, to keep them between runs.
+	The least recently used files are deleted when the directory gets larger than `maxsize`.
+
+	The bodies are stored as they are, so the directory should only be readable by the user of the driver.
+	"""
+
+	def __init__(self, directory, maxsize=256 * 1024 * 1024):
+		"""
+		:param directory: The directory of the files, created if it does not exist
+		:param maxsize: Maximum bytes of the stored files
+		"""
+		self.directory = directory
+		self.maxsize = maxsize
+		self._lock = threading.Lock()
+		self._evictions = 0
+		os.makedirs(directory, mode=0o700, exist_ok=True)
+		# The sizes of the files by name, least recently used first
+		self._files = OrderedDict()
+		files = []
+		for item in os.scandir(directory):
+			if item.is_file() and item.name.endswith('.cache'):
+				stat = item.stat()
+				files.append((stat.st_mtime, item.name, stat.st_size))
+		for _mtime, name, size in sorted(files):
+			self._files[name] = size
+		self._size = sum(self._files.values())
+
+	@property
+	def size(self):
+		"""
+		:return: Bytes of the stored files
+		"""
+		return self._size
+
+	@property
+	def evictions(self):
+		return self._evictions
+
+	def __len__(self):
+		return len(self._files)
+
+	@staticmethod
+	def _name(key):
+		return hashlib.sha256(key.encode('utf8')).hexdigest() + '.cache'
+
+	def get(self, key):
+		"""
+		:return: The :class:`CacheEntry` stored for `key`, or None
+		"""
+		name = self._name(key)
+		path = os.path.join(self.directory, name)
+		try:
+			with open(path, 'rb') as file:
+				meta = json.loads(file.readline())
+				body = file.read()
+			if meta['key'] != key:
+				return None
+			os.utime(path)
+		except (OSError, ValueError, KeyError):
+			return None
+		with self._lock:
+			if name in self._files:
+				self._files.move_to_end(name)
+		return CacheEntry(meta['etag'], meta['headers'], body)
+
+	def put(self, key, entry):
+		"""
+		Stores an entry, deleting the least recently used files if the directory is full.
+		Entries larger than the storage are not stored.
+		"""
+		name = self._name(key)
+		meta = json.dumps({'key': key, 'etag': entry.etag, 'headers': entry.headers}).encode('utf8')
+		size = len(meta) + 1 + len(entry.body)
+		if size > self.maxsize:
+			self.delete(key)
+			return
+		path = os.path.join(self.directory, name)
+		# Written to a temporary file first, so readers never see half a file
+		temporary = '{path}.{thread}.tmp'.format(path=path, thread=threading.get_ident())
+		try:
+			with open(temporary, 'wb') as file:
+				file.write(meta + b'\n')
+				file.write(entry.body)
+			os.replace(temporary, path)
+		except OSError as e:
+			log.warning('Could not store %s in the cache: %s', key, e)
+			return
+		with self._lock:
+			self._size += size - self._files.pop(name, 0)
+			self._files[name] = size
+			while self._size > self.maxsize:
+				self._delete(next(iter(self._files)))
+				self._evictions += 1
+
+	def _delete(self, name):
+		self._size -= self._files.pop(name, 0)
+		try:
+			os.remove(os.path.join(self.directory, name))
+		except OSError:
+			pass
+
+	def delete(self, key):
+		with self._lock:
+			self._delete(self._name(key))
+
+	def clear(self):
+		with self._lock:
+			for name in list(self._files):
+				self._delete(name)
+
+
+STORAGES = {
+	'memory': MemoryStorage,
+	'disk': DiskStorage,
+}
+
+
+class HTTPCache:
+	"""
+	Decides which responses are cached, and counts how often they could be served from the cache.
+
+	Responses are cached per URL, query parameters and Authorization header,
+	so users of different tokens never see the responses of each other.
+	"""
+
+	def __init__(self, storage=None):
+		"""
+		:param storage: A :class:`MemoryStorage`, :class:`DiskStorage` or an object with their methods,
+			a new :class:`MemoryStorage` if None
+		"""
+		self.storage = storage if storage is not None else MemoryStorage()
+		self._lock = threading.Lock()
+		self._hits = 0
+		self._misses = 0
+		self._stores = 0
+		self._bytes_saved = 0
+
+	@property
+	def stats(self):
+		"""
+		:return: A dict with the number of `hits` answered with 304 Not Modified, the `misses`
+			answered with a new body, the responses `stored`, the `bytes_saved` by the hits, the `hit_ratio`
+			and the current `size` in bytes and `evictions` of the storage
+		"""
+		with self._lock:
+			revalidated = self._hits + self._misses
+			return {
+				'hits': self._hits,
+				'misses': self._misses,
+				'stored': self._stores,
+				'bytes_saved': self._bytes_saved,
+				'hit_ratio': self._hits / revalidated if revalidated else 0.0,
+				'size': getattr(self.storage, 'size', None),
+				'evictions': getattr(self.storage, 'evictions', None),
+			}
+
+	@staticmethod
+	def key(url, params, headers):
+		"""
+		:param url: The url of the request, without query
+		:param params: The query parameters of the request
+		:param headers: The headers of the request, holding the Authorization header
+		:return: The key of the request in the storage
+		"""
+		key = url
+		if params:
+			key += '?' + urlencode(sorted((str(name), str(value)) for name, value in params.items()))
+		authorization = (headers or {}).get('Authorization')
+		if authorization:
+			key += '#' + hashlib.sha256(authorization.encode('utf8')).hexdigest()[:32]
+		return key
+
+	def get(self, key):
+		"""
+		:return: The :class:`CacheEntry` to revalidate, or None
+		"""
+		return self.storage.get(key)
+
+	def revalidated(self, key, entry, status_code, headers, body):
+		"""
+		Updates the cache with the response to a request sent with the ETag of `entry`.
+
+		:param entry: The :class:`CacheEntry` sent with If-None-Match, or None
+		:param status_code: The status code of the response
+		:param headers: The headers of the response
+		:param body: A function returning the decoded body of the response,
+			only called if the response is stored
+		:return: The entry to answer the request with if the response was 304 Not Modified, else None
+		"""
+		if status_code == 304 and entry is not None:
+			with self._lock:
+				self._hits += 1
+				self._bytes_saved += len(entry.body)
+			return entry
+		if entry is not None:
+			with self._lock:
+				self._misses += 1
+		etag = headers.get('ETag')
+		if status_code != 200 or not etag or 'no-store' in headers.get('Cache-Control', '').lower():
+			if entry is not None:
+				self.storage.delete(key)
+			return None
+		stored = CacheEntry(etag, {
+			name: value for name, value in headers.items()
+			if name.lower() not in _DROPPED_HEADERS
+		}, body())
+		self.storage.put(key, stored)
+		with self._lock:
+			self._stores += 1
+		return None
+
+	def clear(self):
+		self.storage.clear()
+
+
+def create_http_cache(storage, directory=None, maxsize=None):
+	"""
+	:param storage: 'memory', 'disk', True for 'memory', or a storage object
+	:param directory: The directory of the 'disk' storage
+	:param maxsize: Maximum bytes of the stored responses, the default of the storage if None
+	:return: The :class:`HTTPCache`
+	"""
+	if storage is True:
+		storage = 'memory'
+	if not isinstance(storage, str):
+		return HTTPCache(storage)
+	if storage not in STORAGES:
+		raise ValueError('Unknown http cache storage {storage}, use one of {storages}'.format(
+			storage=storage,
+			storages=', '.join(STORAGES)
+		))
+	kwargs = {'maxsize': maxsize} if maxsize is not None else {}
+	if storage == 'disk':
+		if not directory:
+			raise ValueError('The disk http cache needs a directory in the http_cache_dir option')
+		return HTTPCache(DiskStorage(directory, **kwargs))
+	return HTTPCache(MemoryStorage(**kwargs))
@@ -0,0 +1,212 @@
+"""
+Counting the requests made and their latency, per endpoint, method and status code,
+and the bytes of the responses received compressed and decoded.
+"""
+
+import re
+import threading
+import time
+from collections import namedtuple
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Mattermost ids are 26 lowercase letters and digits
+_ID = re.compile(r'/[a-z0-9]{26}(?=/|$)')
+# Path segments following these are names, not ids
+_NAME = re.compile(r'/(username|email|name|usernames|emails)/[^/]+')
+
+RequestInfo = namedtuple('RequestInfo', ['method', 'url', 'endpoint', 'started'])
+RequestInfo.__doc__ = """
+A request being sent, passed to the hooks of the client.
+`endpoint` is its path template, e.g. ``/users/{id}``, and
+`started` the :func:`time.monotonic` time it was sent at.
+"""
+
+
+def endpoint_template(path):
+	"""
+	:param path: The path of a request, e.g. ``/users/4xp9fdt77pncbef59f4k1qe83o/teams``
+	:return: The path with the ids and names replaced, e.g. ``/users/{id}/teams``
+	"""
+	path = _NAME.sub(r'/\1/{name}', re.sub('/+', '/', path.split('?', 1)[0]))
+	return _ID.sub('/{id}', path)
+
+
+def _label(value):
+	return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Series:
+	__slots__ = ('count', 'errors', 'statuses', 'sum', 'max', 'buckets')
+
+	def __init__(self):
+		self.count = 0
+		self.errors = {}
+		self.statuses = {}
+		self.sum = 0.0
+		self.max = 0.0
+		self.buckets = [0] * len(BUCKETS)
+
+	def observe(self, seconds):
+		self.count += 1
+		self.sum += seconds
+		self.max = max(self.max, seconds)
+		for index, bound in enumerate(BUCKETS):
+			if seconds <= bound:
+				self.buckets[index] += 1
+				break
+
+
+class Metrics:
+	"""
+	Thread safe counters and latency histograms of the requests of a client,
+	per method and endpoint template, with the responses counted per status code
+	and the failed requests per error.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._series = {}
+		# [responses, wire bytes, decoded bytes] by content encoding
+		self._transfer = {}
+
+	def _get(self, request):
+		key = (request.method.upper(), request.endpoint)
+		series = self._series.get(key)
+		if series is None:
+			series = self._series[key] = _Series()
+		return series
+
+	def record_response(self, request, status_code):
+		seconds = time.monotonic() - request.started
+		with self._lock:
+			series = self._get(request)
+			series.observe(seconds)
+			series.statuses[status_code] = series.statuses.get(status_code, 0) + 1
+
+	def record_error(self, request, error):
+		seconds = time.monotonic() - request.started
+		name = type(error).__name__
+		with self._lock:
+			series = self._get(request)
+			series.observe(seconds)
+			series.errors[name] = series.errors.get(name, 0) + 1
+
+	def record_transfer(self, encoding, wire, decoded):
+		"""
+		:param encoding: The Content-Encoding of the response, 'identity' if not compressed
+		:param wire: Bytes of the body as received
+		:param decoded: Bytes of the body after decompression
+		"""
+		with self._lock:
+			counts = self._transfer.get(encoding)
+			if counts is None:
+				counts = self._transfer[encoding] = [0, 0, 0]
+			counts[0] += 1
+			counts[1] += wire
+			counts[2] += decoded
+
+	def reset(self):
+		with self._lock:
+			self._series.clear()
+			self._transfer.clear()
+
+	def transfer(self):
+		"""
+		:return: A dict with the number of `responses`, the bytes of their bodies as received
+			in `wire_bytes` and after decompression in `decoded_bytes`, their `ratio`,
+			and the same per content encoding in `by_encoding`
+		"""
+		with self._lock:
+			by_encoding = {
+				encoding: {
+					'responses': responses,
+					'wire_bytes': wire,
+					'decoded_bytes': decoded,
+					'ratio': wire / decoded if decoded else 1.0,
+				}
+				for encoding, (responses, wire, decoded) in sorted(self._transfer.items())
+			}
+		wire = sum(counts['wire_bytes'] for counts in by_encoding.values())
+		decoded = sum(counts['decoded_bytes'] for counts in by_encoding.values())
+		return {
+			'responses': sum(counts['responses'] for counts in by_encoding.values()),
+			'wire_bytes': wire,
+			'decoded_bytes': decoded,
+			'ratio': wire / decoded if decoded else 1.0,
+			'by_encoding': by_encoding,
+		}
+
+	def as_dict(self):
+		"""
+		:return: A dict by ``'<METHOD> <endpoint template>'`` of the `count` of requests,
+			the responses by status code in `statuses`, the failed requests by error in `errors`,
+			and their latency in seconds: `sum`, `avg`, `max` and the cumulative `buckets`
+			by upper bound
+		"""
+		with self._lock:
+			result = {}
+			for (method, endpoint), series in sorted(self._series.items()):
+				cumulative = 0
+				buckets = {}
+				for bound, count in zip(BUCKETS, series.buckets):
+					cumulative += count
+					buckets[bound] = cumulative
+				result['{method} {endpoint}'.format(method=method, endpoint=endpoint)] = {
+					'count': series.count,
+					'statuses': dict(series.statuses),
+					'errors': dict(series.errors),
+					'sum': series.sum,
+					'avg': series.sum / series.count if series.count else 0.0,
+					'max': series.max,
+					'buckets': buckets,
+				}
+			return result
+
+	def prometheus(self, prefix='mattermostdriver'):
+		"""
+		:return: The metrics in the Prometheus text exposition format
+		"""
+		lines = [
+			'# HELP {prefix}_requests_total Responses received, by status code.'.format(prefix=prefix),
+			'# TYPE {prefix}_requests_total counter'.format(prefix=prefix),
+		]
+		snapshot = self.as_dict()
+		parsed = [(key.split(' ', 1), values) for key, values in snapshot.items()]
+		for (method, endpoint), values in parsed:
+			for status, count in sorted(values['statuses'].items()):
+				lines.append('{prefix}_requests_total{{method="{method}",endpoint="{endpoint}",status="{status}"}} {count}'.format(
+					prefix=prefix, method=method, endpoint=_label(endpoint), status=status, count=count))
+		lines += [
+			'# HELP {prefix}_request_errors_total Requests failed without a response, by error.'.format(prefix=prefix),
+			'# TYPE {prefix}_request_errors_total counter'.format(prefix=prefix),
+		]
+		for (method, endpoint), values in parsed:
+			for error, count in sorted(values['errors'].items()):
+				lines.append('{prefix}_request_errors_total{{method="{method}",endpoint="{endpoint}",error="{error}"}} {count}'.format(
+					prefix=prefix, method=method, endpoint=_label(endpoint), error=_label(error), count=count))
+		lines += [
+			'# HELP {prefix}_request_duration_seconds Latency of the requests.'.format(prefix=prefix),
+			'# TYPE {prefix}_request_duration_seconds histogram'.format(prefix=prefix),
+		]
+		for (method, endpoint), values in parsed:
+			labels = 'method="{method}",endpoint="{endpoint}"'.format(method=method, endpoint=_label(endpoint))
+			for bound, count in values['buckets'].items():
+				lines.append('{prefix}_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}'.format(
+					prefix=prefix, labels=labels, bound=bound, count=count))
+			lines.append('{prefix}_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}'.format(
+				prefix=prefix, labels=labels, count=values['count']))
+			lines.append('{prefix}_request_duration_seconds_sum{{{labels}}} {sum}'.format(
+				prefix=prefix, labels=labels, sum=values['sum']))
+			lines.append('{prefix}_request_duration_seconds_count{{{labels}}} {count}'.format(
+				prefix=prefix, labels=labels, count=values['count']))
+		lines += [
+			'# HELP {prefix}_response_bytes_total Bytes of the response bodies as received and decoded.'.format(prefix=prefix),
+			'# TYPE {prefix}_response_bytes_total counter'.format(prefix=prefix),
+		]
+		for encoding, values in self.transfer()['by_encoding'].items():
+			for stage in ('wire', 'decoded'):
+				lines.append('{prefix}_response_bytes_total{{encoding="{encoding}",stage="{stage}"}} {count}'.format(
+					prefix=prefix, encoding=_label(encoding), stage=stage, count=values[stage + '_bytes']))
+		return '\n'.join(lines) + '\n'
@@ -0,0 +1,350 @@
+"""
+Compact read-only objects for users, channels, teams, posts, reactions and file infos.
+
+With the `models` option the client returns these instead of dicts. They keep their fields
+in ``__slots__``, share one copy of repeated strings like ids and roles,
+and keep nested fields like `props`, `metadata` or `notify_props` as JSON text
+until they are accessed. Fields unknown to the model are kept, too.
+
+The models are mappings, so ``user['username']`` keeps working next to ``user.username``,
+and they compare equal to the dicts they were created from.
+"""
+
+import json
+import sys
+from abc import ABCMeta
+from collections.abc import Mapping
+
+from .codec import STDLIB
+from .metrics import endpoint_template
+
+
+class _Encoded(str):
+	"""
+	A nested field kept as JSON text until it is accessed.
+	"""
+	__slots__ = ()
+	#: Decodes the text, set per codec by :func:`_encoded_type`
+	loads = staticmethod(json.loads)
+
+
+# The loads function of a codec -> the type of the fields it encoded
+_encoded_types = {json.loads: _Encoded}
+
+
+def _encoded_type(codec):
+	"""
+	:return: A subclass of :class:`_Encoded` decoding with `codec`,
+		so the models need no slot for their codec
+	"""
+	encoded = _encoded_types.get(codec.loads)
+	if encoded is None:
+		encoded = _encoded_types[codec.loads] = type(
+			'_Encoded', (_Encoded,), {'__slots__': (), 'loads': staticmethod(codec.loads)})
+	return encoded
+
+
+_intern = sys.intern
+_setattr = object.__setattr__
+
+_EMPTY_OBJECT = _Encoded('{}')
+_EMPTY_LIST = _Encoded('[]')
+
+
+def _lazy_field(name):
+	slot = '_' + name
+
+	def get(self):
+		try:
+			value = getattr(self, slot)
+		except AttributeError:
+			raise AttributeError(name) from None
+		if isinstance(value, _Encoded):
+			value = value.loads(value)
+			setattr(self, slot, value)
+		return value
+
+	def set(self, value):
+		setattr(self, slot, value)
+
+	return property(get, set)
+
+
+class _ModelMeta(ABCMeta):
+	"""
+	Creates the slots of the `_fields` of a model, and the properties decoding its `_lazy` fields.
+	"""
+
+	def __new__(mcs, name, bases, namespace):
+		if '__slots__' not in namespace:
+			fields = namespace.get('_fields', ())
+			lazy = namespace.get('_lazy', ())
+			namespace['__slots__'] = tuple('_' + field if field in lazy else field for field in fields)
+			for field in lazy:
+				namespace[field] = _lazy_field(field)
+			namespace['_field_set'] = frozenset(fields)
+		return super().__new__(mcs, name, bases, namespace)
+
+
+class Model(Mapping, metaclass=_ModelMeta):
+	"""
+	Base class of the models.
+	"""
+
+	__slots__ = ('_extra',)
+	#: The fields of the entity
+	_fields = ()
+	_field_set = frozenset()
+	#: Nested fields kept as JSON text until they are accessed
+	_lazy = ()
+	#: Fields whose values repeat across entities, stored once
+	_interned = ()
+	#: Fields a dict needs to be this entity
+	_key = ('id',)
+
+	def __init__(self, data, codec=STDLIB):
+		"""
+		:param data: The dict returned by the server
+		:param codec: The :class:`~mattermostdriver.codec.JSONCodec` encoding and decoding the lazy fields
+		"""
+		fields, lazy, interned = self._field_set, self._lazy, self._interned
+		encoded = None
+		extra = None
+		for name, value in data.items():
+			if name not in fields:
+				if extra is None:
+					extra = {}
+				extra[name] = value
+				continue
+			if name in lazy:
+				if type(value) is dict or type(value) is list:
+					if not value:
+						value = _EMPTY_OBJECT if type(value) is dict else _EMPTY_LIST
+					else:
+						if encoded is None:
+							encoded = _encoded_type(codec)
+						value = encoded(codec.dumps(value))
+				name = '_' + name
+			elif type(value) is str and name in interned:
+				value = _intern(value)
+			_setattr(self, name, value)
+		self._extra = extra
+
+	@classmethod
+	def matches(cls, data):
+		"""
+		:return: Whether a value returned by the server is an entity of this model
+		"""
+		return isinstance(data, dict) and all(key in data for key in cls._key)
+
+	def __getitem__(self, key):
+		if key in self._field_set:
+			try:
+				return getattr(self, key)
+			except AttributeError:
+				raise KeyError(key) from None
+		if self._extra is not None and key in self._extra:
+			return self._extra[key]
+		raise KeyError(key)
+
+	def __iter__(self):
+		for field in self._fields:
+			if hasattr(self, '_' + field if field in self._lazy else field):
+				yield field
+		if self._extra is not None:
+			yield from self._extra
+
+	def __len__(self):
+		return sum(1 for _ in self)
+
+	def __repr__(self):
+		return '<{cls} {key}>'.format(
+			cls=type(self).__name__,
+			key=' '.join('{name}={value!r}'.format(name=name, value=self.get(name)) for name in self._key)
+		)
+
+	def __getstate__(self):
+		return self.to_dict()
+
+	def __setstate__(self, state):
+		self.__init__(state)
+
+	def to_dict(self):
+		"""
+		:return: The entity as dict, with the nested fields decoded
+		"""
+		return dict(self.items())
+
+
+class User(Model):
+	"""
+	A user, its `props`, `notify_props` and `timezone` are decoded on first access.
+	"""
+
+	_fields = (
+		'id', 'create_at', 'update_at', 'delete_at', 'username', 'auth_data', 'auth_service',
+		'email', 'email_verified', 'nickname', 'first_name', 'last_name', 'position', 'roles',
+		'allow_marketing', 'props', 'notify_props', 'last_password_update', 'last_picture_update',
+		'failed_attempts', 'locale', 'timezone', 'mfa_active', 'is_bot', 'bot_description',
+		'last_activity_at', 'disable_welcome_email', 'remote_id',
+	)
+	_lazy = ('props', 'notify_props', 'timezone')
+	_interned = ('id', 'auth_service', 'position', 'roles', 'locale')
+
+
+class Channel(Model):
+	"""
+	A channel, its `props` are decoded on first access.
+	"""
+
+	_fields = (
+		'id', 'create_at', 'update_at', 'delete_at', 'team_id', 'type', 'display_name', 'name',
+		'header', 'purpose', 'last_post_at', 'last_root_post_at', 'total_msg_count',
+		'total_msg_count_root', 'extra_update_at', 'creator_id', 'scheme_id', 'props',
+		'group_constrained', 'shared', 'policy_id',
+	)
+	_lazy = ('props',)
+	_interned = ('id', 'team_id', 'type', 'creator_id', 'scheme_id', 'policy_id')
+
+
+class Team(Model):
+	"""
+	A team.
+	"""
+
+	_fields = (
+		'id', 'create_at', 'update_at', 'delete_at', 'display_name', 'name', 'description',
+		'email', 'type', 'company_name', 'allowed_domains', 'invite_id', 'allow_open_invite',
+		'last_team_icon_update', 'scheme_id', 'group_constrained', 'policy_id', 'cloud_limits_archived',
+	)
+	_interned = ('id', 'type', 'scheme_id', 'policy_id')
+
+
+class Post(Model):
+	"""
+	A post, its `props`, `participants` and `metadata` are decoded on first access.
+	"""
+
+	_fields = (
+		'id', 'create_at', 'update_at', 'edit_at', 'delete_at', 'is_pinned', 'user_id', 'channel_id',
+		'root_id', 'parent_id', 'original_id', 'message', 'type', 'props', 'hashtags', 'file_ids',
+		'pending_post_id', 'reply_count', 'last_reply_at', 'participants', 'is_following',
+		'has_reactions', 'metadata', 'remote_id',
+	)
+	_lazy = ('props', 'participants', 'metadata')
+	_interned = ('id', 'user_id', 'channel_id', 'root_id', 'parent_id', 'original_id', 'type')
+
+
+class Reaction(Model):
+	"""
+	A reaction to a post, identified by `user_id`, `post_id` and `emoji_name`.
+	"""
+
+	_fields = ('user_id', 'post_id', 'emoji_name', 'create_at', 'update_at', 'delete_at', 'channel_id', 'remote_id')
+	_interned = ('user_id', 'post_id', 'emoji_name', 'channel_id')
+	_key = ('user_id', 'post_id', 'emoji_name')
+
+
+class FileInfo(Model):
+	"""
+	The info of an uploaded file.
+	"""
+
+	_fields = (
+		'id', 'user_id', 'post_id', 'channel_id', 'create_at', 'update_at', 'delete_at', 'name',
+		'extension', 'size', 'mime_type', 'width', 'height', 'has_preview_image', 'mini_preview',
+		'remote_id', 'archived',
+	)
+	_interned = ('id', 'user_id', 'post_id', 'channel_id', 'extension', 'mime_type')
+
+
+def _entities(model):
+	def convert(result, codec):
+		if isinstance(result, list):
+			return [model(item, codec) if model.matches(item) else item for item in result]
+		if model.matches(result):
+			return model(result, codec)
+		return result
+	return convert
+
+
+def _post_list(result, codec):
+	if isinstance(result, dict) and isinstance(result.get('posts'), dict):
+		result['posts'] = {
+			post_id: Post(post, codec) if Post.matches(post) else post
+			for post_id, post in result['posts'].items()
+		}
+	return result
+
+
+def _file_infos(result, codec):
+	if isinstance(result, dict) and isinstance(result.get('file_infos'), list):
+		result['file_infos'] = _entities(FileInfo)(result['file_infos'], codec)
+	return result
+
+
+_users = _entities(User)
+_channels = _entities(Channel)
+_teams = _entities(Team)
+_posts = _entities(Post)
+
+# The endpoint templates returning entities, and how to convert their results
+ENDPOINTS = {
+	'/users': _users,
+	'/users/ids': _users,
+	'/users/usernames': _users,
+	'/users/search': _users,
+	'/users/me': _users,
+	'/users/{id}': _users,
+	'/users/{id}/patch': _users,
+	'/users/username/{name}': _users,
+	'/users/email/{name}': _users,
+	'/channels': _channels,
+	'/channels/direct': _channels,
+	'/channels/group': _channels,
+	'/channels/{id}': _channels,
+	'/channels/{id}/patch': _channels,
+	'/teams/{id}/channels': _channels,
+	'/teams/{id}/channels/ids': _channels,
+	'/teams/{id}/channels/deleted': _channels,
+	'/teams/{id}/channels/search': _channels,
+	'/teams/{id}/channels/name/{name}': _channels,
+	'/teams/name/{name}/channels/name/{name}': _channels,
+	'/users/{id}/teams/{id}/channels': _channels,
+	'/users/me/teams/{id}/channels': _channels,
+	'/teams': _teams,
+	'/teams/search': _teams,
+	'/teams/{id}': _teams,
+	'/teams/{id}/patch': _teams,
+	'/teams/name/{name}': _teams,
+	'/users/{id}/teams': _teams,
+	'/users/me/teams': _teams,
+	'/posts': _posts,
+	'/posts/{id}': _posts,
+	'/posts/{id}/patch': _posts,
+	'/posts/{id}/thread': _post_list,
+	'/channels/{id}/posts': _post_list,
+	'/users/{id}/posts/flagged': _post_list,
+	'/users/{id}/channels/{id}/posts/unread': _post_list,
+	'/teams/{id}/posts/search': _post_list,
+	'/reactions': _entities(Reaction),
+	'/posts/{id}/reactions': _entities(Reaction),
+	'/files': _file_infos,
+	'/files/{id}/info': _entities(FileInfo),
+	'/posts/{id}/files/info': _entities(FileInfo),
+}
+
+
+def to_models(endpoint, result, codec=STDLIB):
+	"""
+	Converts the entities returned by an endpoint to models.
+
+	:param endpoint: The endpoint requested, e.g. ``/users/4xp9fdt77pncbef59f4k1qe83o``
+	:param result: The decoded response
+	:return: The result with its users, channels, teams, posts, reactions and file infos
+		as models, or as it was if the endpoint does not return any
+	"""
+	convert = ENDPOINTS.get(endpoint_template(endpoint))
+	if convert is None:
+		return result
+	return convert(result, codec)
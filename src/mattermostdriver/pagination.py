@@ -0,0 +1,98 @@
+"""
+Iterators walking the paged list endpoints of the api.
+
+Only the current and the next page are held in memory. While the items
+of one page are consumed, the next page is already fetched in the
+background (in a thread for the sync client, as a task for the async client).
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PER_PAGE = 200
+# Mattermost returns at most this many items per page, whatever per_page asks for
+MAX_PER_PAGE = 200
+
+
+def _page_params(params):
+	params = dict(params or {})
+	first_page = int(params.pop('page', 0))
+	params.pop('per_page', None)
+	return params, first_page
+
+
+def iter_items(get_page, args=(), params=None, per_page=DEFAULT_PER_PAGE, items=None, prefetch=True):
+	"""
+	Yields the items of every page returned by `get_page`, starting
+	with the `page` given in `params` (or 0), until a page is not full.
+
+	:param get_page: The endpoint function returning one page, e.g. `Users.get_users`
+	:param args: Positional arguments passed to `get_page` before `params`
+	:param params: Query parameters passed to every call of `get_page`
+	:param per_page: Number of items requested per page, at most :data:`MAX_PER_PAGE`
+	:param items: Function extracting the list of items from a page. Defaults to the page itself.
+	:param prefetch: Fetch the next page in the background while the current one is consumed
+	"""
+	params, page = _page_params(params)
+	# A larger page would be cut by the server and taken for the last one
+	per_page = min(per_page, MAX_PER_PAGE)
+
+	def fetch(page_number):
+		return get_page(*args, params=dict(params, page=page_number, per_page=per_page))
+
+	executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+	try:
+		result = fetch(page)
+		while True:
+			page_items = items(result) if items else result
+			if not page_items:
+				return
+			last_page = len(page_items) < per_page
+			next_page = None
+			if executor and not last_page:
+				next_page = executor.submit(fetch, page + 1)
+			for item in page_items:
+				yield item
+			if last_page:
+				return
+			page += 1
+			result = next_page.result() if next_page else fetch(page)
+	finally:
+		if executor:
+			executor.shutdown(wait=False)
+
+
+async def aiter_items(get_page, args=(), params=None, per_page=DEFAULT_PER_PAGE, items=None, prefetch=True):
+	"""
+	Same as :func:`iter_items` for coroutine endpoints, usable with ``async for``.
+	"""
+	params, page = _page_params(params)
+	# A larger page would be cut by the server and taken for the last one
+	per_page = min(per_page, MAX_PER_PAGE)
+
+	def fetch(page_number):
+		return get_page(*args, params=dict(params, page=page_number, per_page=per_page))
+
+	next_page = None
+	try:
+		result = await fetch(page)
+		while True:
+			page_items = items(result) if items else result
+			if not page_items:
+				return
+			last_page = len(page_items) < per_page
+			if prefetch and not last_page:
+				next_page = asyncio.ensure_future(fetch(page + 1))
+			for item in page_items:
+				yield item
+			if last_page:
+				return
+			page += 1
+			if next_page:
+				result = await next_page
+				next_page = None
+			else:
+				result = await fetch(page)
+	finally:
+		if next_page and not next_page.done():
+			next_page.cancel()
@@ -0,0 +1,191 @@
+"""
+Many accounts, on one or more mattermost servers, in one process.
+"""
+
+import asyncio
+import logging
+from http.cookiejar import DefaultCookiePolicy
+
+from .driver import AsyncDriver
+
+log = logging.getLogger('mattermostdriver.pool')
+log.setLevel(logging.INFO)
+
+
+def _host_of(options):
+	return (options['scheme'], options['url'], options['port'], options['verify'])
+
+
+def _without_cookies(session):
+	"""
+	Stops a shared session from storing the login cookie of one account and sending it
+	with the requests of the others. Every request is authenticated by its token instead.
+	"""
+	jar = getattr(session.cookies, 'jar', session.cookies)
+	jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+	return session
+
+
+class DriverPool:
+	"""
+	Manages the :class:`~mattermostdriver.AsyncDriver` of many accounts.
+
+	The accounts of one server share one connection pool, so connections
+	grow with the number of servers and not with the number of accounts.
+	The websockets of all accounts run as tasks of one event loop,
+	each passing its events to the event_handler of its account.
+
+	.. code:: python
+
+		pool = DriverPool({'scheme': 'https', 'port': 443})
+		pool.add('bot', {'url': 'chat.example.com', 'token': 'token'}, event_handler=router)
+		pool.add('other-bot', {'url': 'chat.example.com', 'token': 'other token'})
+		pool.add('bot-elsewhere', {'url': 'chat.example.org', 'token': 'token'}, event_handler=handler)
+
+		async with pool:
+			await pool['other-bot'].posts.create_post(options={...})
+			await pool.run_websockets()
+	"""
+
+	def __init__(self, options=None, driver_cls=AsyncDriver):
+		"""
+		:param options: The options shared by all accounts, see :attr:`AsyncDriver.default_options`
+		:param driver_cls: The class of the drivers, a subclass of :class:`~mattermostdriver.AsyncDriver`
+		"""
+		self.options = options or {}
+		self.driver_cls = driver_cls
+		self._drivers = {}
+		self._event_handlers = {}
+		self._sessions = {}
+		self._websockets = {}
+
+	def __getitem__(self, name):
+		return self._drivers[name]
+
+	def __contains__(self, name):
+		return name in self._drivers
+
+	def __iter__(self):
+		return iter(self._drivers)
+
+	def __len__(self):
+		return len(self._drivers)
+
+	@property
+	def stats(self):
+		"""
+		:return: A dict with the number of `accounts`, `hosts` (and so connection pools)
+			and running `websockets`
+		"""
+		return {
+			'accounts': len(self._drivers),
+			'hosts': len(self._sessions),
+			'websockets': sum(1 for task in self._websockets.values() if not task.done()),
+		}
+
+	def add(self, name, options=None, event_handler=None):
+		"""
+		Adds an account. It is logged in by :meth:`login`.
+
+		:param name: The name to get the driver of the account with, ``pool[name]``
+		:param options: The options of this account, e.g. the url and token,
+			overriding the options of the pool
+		:param event_handler: Handles the websocket events of this account
+			(a coroutine function or an :class:`~mattermostdriver.events.EventRouter`).
+			Without one, no websocket is opened for this account.
+		:return: The :class:`~mattermostdriver.AsyncDriver` of the account
+		"""
+		if name in self._drivers:
+			raise ValueError('An account named {name} was already added'.format(name=name))
+		account_options = self.options.copy()
+		account_options.update(options or {})
+		driver = self.driver_cls(account_options)
+
+		host = _host_of(driver.options)
+		session = self._sessions.get(host)
+		if session is None:
+			session = self._sessions[host] = _without_cookies(driver.client._create_session())
+		driver.client.session = session
+
+		self._drivers[name] = driver
+		if event_handler is not None:
+			self._event_handlers[name] = event_handler
+		return driver
+
+	async def remove(self, name):
+		"""
+		Stops the websocket of an account, logs it out and removes it from the pool.
+		"""
+		driver = self._drivers.pop(name)
+		self._event_handlers.pop(name, None)
+		await self._stop_websocket(name)
+		await driver.logout()
+
+	async def login(self):
+		"""
+		Logs in every account which is not logged in yet, at the same time.
+
+		:return: A dict of the login result, or the exception raised, by the name of the account
+		"""
+		names = [name for name, driver in self._drivers.items() if not driver.client.userid]
+		results = await asyncio.gather(
+			*(self._drivers[name].login() for name in names),
+			return_exceptions=True
+		)
+		for name, result in zip(names, results):
+			if isinstance(result, Exception):
+				log.error('Could not log in %s: %s', name, result)
+		return dict(zip(names, results))
+
+	def start_websockets(self):
+		"""
+		Connects the websocket of every account with an event_handler which is not connected yet,
+		as tasks on the running event loop.
+
+		:return: The tasks by the name of their account
+		"""
+		for name, event_handler in self._event_handlers.items():
+			task = self._websockets.get(name)
+			if task is None or task.done():
+				self._websockets[name] = asyncio.ensure_future(
+					self._drivers[name].init_websocket(event_handler)
+				)
+		return dict(self._websockets)
+
+	async def run_websockets(self):
+		"""
+		Starts the websockets and waits until all of them are closed.
+		A websocket failing does not stop the others.
+		"""
+		tasks = self.start_websockets()
+		results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+		for name, result in zip(tasks, results):
+			if isinstance(result, Exception):
+				log.error('The websocket of %s failed: %s', name, result)
+
+	async def _stop_websocket(self, name):
+		task = self._websockets.pop(name, None)
+		if task is not None:
+			task.cancel()
+			await asyncio.gather(task, return_exceptions=True)
+
+	async def close(self):
+		"""
+		Stops the websockets, logs out every account and closes the shared connection pools.
+		"""
+		for name in list(self._websockets):
+			await self._stop_websocket(name)
+		await asyncio.gather(
+			*(driver.logout() for driver in self._drivers.values() if driver.client.userid),
+			return_exceptions=True
+		)
+		for session in self._sessions.values():
+			await session.aclose()
+		self._sessions.clear()
+
+	async def __aenter__(self):
+		await self.login()
+		return self
+
+	async def __aexit__(self, *exc_info):
+		await self.close()
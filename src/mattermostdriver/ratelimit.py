@@ -0,0 +1,108 @@
+"""
+Client side rate limiting, adapting to the X-RateLimit headers mattermost sends.
+"""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger('mattermostdriver.ratelimit')
+log.setLevel(logging.INFO)
+
+
+def _int_header(headers, name):
+	try:
+		return int(float(headers[name]))
+	except (KeyError, TypeError, ValueError):
+		return None
+
+
+class RateLimiter:
+	"""
+	A token bucket pacing the requests of a client.
+
+	The bucket only computes how long a request has to wait, the caller
+	does the waiting itself. So one limiter can be shared by threads
+	(sleeping with :func:`time.sleep`) and tasks (sleeping with :func:`asyncio.sleep`).
+
+	Without a configured rate, requests are not paced until the server
+	sends its X-RateLimit headers. Then the size of the bucket follows
+	X-RateLimit-Limit, the tokens left follow X-RateLimit-Remaining and the rate
+	is estimated from the time until X-RateLimit-Reset. Only a rejected request
+	(429 with Retry-After) holds back all requests, see :meth:`retry_after`.
+	"""
+
+	def __init__(self, per_second=None, burst=None):
+		"""
+		:param per_second: Requests allowed per second, None until the server tells us
+		:param burst: Number of requests allowed at once, defaults to `per_second`
+		"""
+		self._lock = threading.Lock()
+		self._rate = per_second
+		self._capacity = burst or per_second or 1
+		self._tokens = self._capacity
+		self._updated = time.monotonic()
+		self._blocked_until = 0
+
+	@property
+	def rate(self):
+		"""
+		:return: The requests allowed per second, or None if unknown
+		"""
+		return self._rate
+
+	def _refill(self, now):
+		if self._rate:
+			self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+		self._updated = now
+
+	def reserve(self):
+		"""
+		Takes a token for one request.
+
+		:return: The number of seconds to wait before sending the request
+		"""
+		with self._lock:
+			now = time.monotonic()
+			delay = max(0, self._blocked_until - now)
+			if not self._rate:
+				return delay
+			self._refill(now)
+			self._tokens -= 1
+			if self._tokens < 0:
+				delay = max(delay, -self._tokens / self._rate)
+			return delay
+
+	def update(self, headers):
+		"""
+		Adapts the bucket to the X-RateLimit headers of a response.
+		"""
+		limit = _int_header(headers, 'X-RateLimit-Limit')
+		remaining = _int_header(headers, 'X-RateLimit-Remaining')
+		if limit is None or remaining is None:
+			return
+		reset = _int_header(headers, 'X-RateLimit-Reset')
+		with self._lock:
+			now = time.monotonic()
+			self._refill(now)
+			if not self._rate:
+				self._tokens = remaining
+			self._capacity = limit
+			if reset and limit > remaining:
+				self._rate = (limit - remaining) / reset
+			elif not self._rate:
+				self._rate = limit
+			# Mattermost's reset is the time until the whole burst is refilled,
+			# the next token is due after 1 / rate, the bucket paces for that
+			self._tokens = min(self._tokens, remaining)
+
+	def retry_after(self, seconds):
+		"""
+		Holds back all requests for `seconds`, after the server rejected one.
+		"""
+		log.warning('Rate limit exceeded, waiting %s seconds', seconds)
+		with self._lock:
+			now = time.monotonic()
+			self._tokens = min(self._tokens, 0)
+			self._updated = now
+			self._blocked_until = max(self._blocked_until, now + seconds)
@@ -0,0 +1,119 @@
+"""
+Retrying failed requests with an exponential backoff.
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from collections import Counter
+
+log = logging.getLogger('mattermostdriver.retry')
+log.setLevel(logging.INFO)
+
+IDEMPOTENT_METHODS = frozenset(['get', 'head', 'options', 'put', 'delete'])
+
+
+def parse_retry_after(value):
+	"""
+	:return: The seconds to wait from a Retry-After header, given in seconds or as a date. None if not parseable.
+	"""
+	if value is None:
+		return None
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		pass
+	try:
+		date = email.utils.parsedate_to_datetime(value)
+	except (TypeError, ValueError):
+		return None
+	if date is None:
+		return None
+	return max(0.0, date.timestamp() - time.time())
+
+
+class RetryPolicy:
+	"""
+	Decides which requests are retried and how long to wait before.
+
+	Only idempotent methods are retried, unless `retry_post` is set.
+	The wait grows exponentially with every attempt, up to `backoff_max`,
+	and with `jitter` a random part of it is used so that many clients
+	do not retry at the same time. A Retry-After header sent by the server
+	is used instead if present.
+
+	How often requests have been retried is counted in :attr:`stats`.
+	"""
+
+	def __init__(self, retries=3, backoff=0.5, backoff_max=30, jitter=True,
+			statuses=(429, 502, 503, 504), retry_post=False):
+		"""
+		:param retries: Maximum number of retries of a request, 0 disables retrying
+		:param backoff: Wait in seconds before the first retry, doubled with every further retry
+		:param backoff_max: Maximum wait in seconds between two attempts
+		:param jitter: Wait a random time between 0 and the backoff
+		:param statuses: Response status codes which are retried
+		:param retry_post: Retry POST requests, too
+		"""
+		self.retries = retries
+		self.backoff = backoff
+		self.backoff_max = backoff_max
+		self.jitter = jitter
+		self.statuses = frozenset(statuses)
+		self.retry_post = retry_post
+		self._lock = threading.Lock()
+		self._retries = Counter()
+		self._gave_up = 0
+
+	@property
+	def stats(self):
+		"""
+		:return: A dict with the total number of `retries`, the retries per reason
+			in `reasons` and the requests which failed after the last retry in `gave_up`
+		"""
+		with self._lock:
+			return {
+				'retries': sum(self._retries.values()),
+				'reasons': dict(self._retries),
+				'gave_up': self._gave_up,
+			}
+
+	def _method_allowed(self, method):
+		return method in IDEMPOTENT_METHODS or (self.retry_post and method == 'post')
+
+	def should_retry(self, method, attempt, status_code=None, error=None):
+		"""
+		:param method: The lower case http method of the request
+		:param attempt: The number of retries made so far
+		:param status_code: The status code of the response, if there is one
+		:param error: The exception raised while sending the request, if any
+		:return: Whether the request should be sent again
+		"""
+		if error is None and status_code not in self.statuses:
+			return False
+		if not self._method_allowed(method):
+			return False
+		reason = type(error).__name__ if error is not None else str(status_code)
+		with self._lock:
+			if attempt >= self.retries:
+				self._gave_up += 1
+				return False
+			self._retries[reason] += 1
+		log.warning('Retrying %s request after %s (retry %s of %s)', method.upper(), reason, attempt + 1, self.retries)
+		return True
+
+	def delay(self, attempt, retry_after=None):
+		"""
+		:param attempt: The number of retries made so far
+		:param retry_after: The value of the Retry-After header of the response
+		:return: The seconds to wait before the next attempt
+		"""
+		seconds = parse_retry_after(retry_after)
+		if seconds is not None:
+			return min(seconds, self.backoff_max)
+		backoff = min(self.backoff_max, self.backoff * 2 ** attempt)
+		if self.jitter:
+			return random.uniform(0, backoff)
+		return backoff
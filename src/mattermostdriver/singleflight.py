@@ -0,0 +1,91 @@
+"""
+Coalescing identical requests which are in flight at the same time.
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import Future
+
+
+def request_key(*parts):
+	"""
+	:return: A hashable key for the given parts of a request, e.g. the endpoint and its params
+	"""
+	return json.dumps(parts, sort_keys=True, default=str)
+
+
+class SingleFlight:
+	"""
+	Lets threads calling :meth:`do` with the same key at the same time share
+	one call of the function and its result (or exception).
+
+	The shared result is the same object for every caller, do not modify it.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._calls = {}
+		self._calls_made = 0
+		self._calls_shared = 0
+
+	@property
+	def stats(self):
+		"""
+		:return: A dict with the number of `calls` made and the number of callers
+			which got the result of a call already in flight in `shared`
+		"""
+		with self._lock:
+			return {'calls': self._calls_made, 'shared': self._calls_shared}
+
+	def do(self, key, function, *args, **kwargs):
+		with self._lock:
+			call = self._calls.get(key)
+			leader = call is None
+			if leader:
+				call = self._calls[key] = Future()
+				self._calls_made += 1
+			else:
+				self._calls_shared += 1
+		if not leader:
+			return call.result()
+
+		try:
+			result = function(*args, **kwargs)
+		except BaseException as e:
+			self._finish(key)
+			call.set_exception(e)
+			raise
+		self._finish(key)
+		call.set_result(result)
+		return result
+
+	def _finish(self, key):
+		with self._lock:
+			del self._calls[key]
+
+
+class AsyncSingleFlight:
+	"""
+	Same as :class:`SingleFlight` for coroutine functions called by tasks of one event loop.
+	A caller being cancelled does not cancel the shared call.
+	"""
+
+	def __init__(self):
+		self._calls = {}
+		self._calls_made = 0
+		self._calls_shared = 0
+
+	@property
+	def stats(self):
+		return {'calls': self._calls_made, 'shared': self._calls_shared}
+
+	async def do(self, key, function, *args, **kwargs):
+		call = self._calls.get(key)
+		if call is not None:
+			self._calls_shared += 1
+		else:
+			call = self._calls[key] = asyncio.ensure_future(function(*args, **kwargs))
+			call.add_done_callback(lambda _: self._calls.pop(key, None))
+			self._calls_made += 1
+		return await asyncio.shield(call)
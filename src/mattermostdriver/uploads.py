@@ -0,0 +1,204 @@
+"""
+Streaming multipart uploads, sending file objects and generators
+part by part instead of building the whole body in memory.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import uuid
+
+log = logging.getLogger('mattermostdriver.uploads')
+log.setLevel(logging.INFO)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _size_of(content):
+	"""
+	:return: The number of bytes left to read from `content`, or None if it is not known
+	"""
+	if isinstance(content, bytes):
+		return len(content)
+	if not hasattr(content, 'read'):
+		return None
+	try:
+		return os.fstat(content.fileno()).st_size - content.tell()
+	except (AttributeError, OSError, io.UnsupportedOperation):
+		pass
+	try:
+		position = content.tell()
+		end = content.seek(0, os.SEEK_END)
+		content.seek(position)
+		return end - position
+	except (AttributeError, OSError, io.UnsupportedOperation):
+		return None
+
+
+def content_hash(content, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""
+	:param content: Bytes or a seekable file object, which is read to its end and rewound
+	:return: The sha256 hex digest of the content, or None if it can not be read twice
+	"""
+	if isinstance(content, bytes):
+		return hashlib.sha256(content).hexdigest()
+	if not hasattr(content, 'read'):
+		return None
+	try:
+		position = content.tell()
+		digest = hashlib.sha256()
+		for chunk in iter(lambda: content.read(chunk_size), b''):
+			digest.update(chunk)
+		content.seek(position)
+	except (AttributeError, OSError, io.UnsupportedOperation):
+		return None
+	return digest.hexdigest()
+
+
+def reusable(file_info, channel_id):
+	"""
+	A file can only be attached to one post, so an uploaded file can only be
+	used again while it is not attached to a post yet.
+
+	:param file_info: The current file info of an uploaded file
+	:return: Whether the file can be attached to a new post in the channel
+	"""
+	return (
+		not file_info.get('post_id')
+		and not file_info.get('delete_at')
+		and file_info.get('channel_id', channel_id) in (channel_id, '')
+	)
+
+
+def _quote(value):
+	return value.replace('\\', '\\\\').replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+
+def _items(files):
+	if files is None:
+		return []
+	if isinstance(files, dict):
+		return list(files.items())
+	return list(files)
+
+
+class MultipartEncoder:
+	"""
+	A multipart/form-data body, produced part by part while it is sent.
+
+	Pass it as `data` of a request together with its :attr:`headers`.
+	The fields come first, then the files. The content of a file can be bytes,
+	a file object opened in binary mode or an iterable of bytes (an async iterable
+	with the :class:`~mattermostdriver.AsyncClient`). If the size of every
+	part is known, the body is sent with a Content-Length, else chunked.
+
+	The body can only be sent once.
+	"""
+
+	def __init__(self, fields=None, files=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+		"""
+		:param fields: A dict of form fields
+		:param files: A dict or list of (name, (filename, content[, content_type])),
+			like the `files` argument of `requests`
+		:param chunk_size: Size of the chunks read from file objects
+		:param progress: Called with the bytes sent so far and the size of the body (or None)
+		"""
+		self.boundary = uuid.uuid4().hex
+		self.chunk_size = chunk_size
+		self.progress = progress
+		self.sent = 0
+		self._parts = []
+		for name, value in _items(fields):
+			self._add(
+				'Content-Disposition: form-data; name="{name}"\r\n\r\n'.format(name=_quote(name)),
+				value
+			)
+		for name, value in _items(files):
+			if not isinstance(value, tuple):
+				value = (getattr(value, 'name', name), value)
+			filename, content = value[0], value[1]
+			content_type = value[2] if len(value) > 2 else 'application/octet-stream'
+			self._add(
+				'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+				'Content-Type: {content_type}\r\n\r\n'.format(
+					name=_quote(name),
+					filename=_quote(os.path.basename(str(filename))),
+					content_type=content_type
+				),
+				content
+			)
+		self._trailer = '--{boundary}--\r\n'.format(boundary=self.boundary).encode('utf8')
+		sizes = [_size_of(content) for _, content in self._parts]
+		self.length = None
+		if None not in sizes:
+			self.length = sum(len(header) + 2 for header, _ in self._parts) + sum(sizes) + len(self._trailer)
+
+	def _add(self, header, content):
+		if isinstance(content, str):
+			content = content.encode('utf8')
+		header = '--{boundary}\r\n{header}'.format(boundary=self.boundary, header=header).encode('utf8')
+		self._parts.append((header, content))
+
+	@property
+	def content_type(self):
+		return 'multipart/form-data; boundary={boundary}'.format(boundary=self.boundary)
+
+	@property
+	def headers(self):
+		"""
+		:return: The headers to send the body with
+		"""
+		headers = {'Content-Type': self.content_type}
+		if self.length is not None:
+			headers['Content-Length'] = str(self.length)
+		return headers
+
+	def __len__(self):
+		# requests sends a body without length chunked
+		return self.length or 0
+
+	def __bool__(self):
+		return True
+
+	def _sending(self, chunk):
+		self.sent += len(chunk)
+		if self.progress is not None:
+			self.progress(self.sent, self.length)
+		return chunk
+
+	def _chunks(self, content):
+		if isinstance(content, bytes):
+			yield content
+		elif hasattr(content, 'read'):
+			while True:
+				chunk = content.read(self.chunk_size)
+				if not chunk:
+					break
+				yield chunk
+		else:
+			for chunk in content:
+				yield chunk
+
+	def __iter__(self):
+		for header, content in self._parts:
+			yield self._sending(header)
+			for chunk in self._chunks(content):
+				if chunk:
+					yield self._sending(chunk)
+			yield self._sending(b'\r\n')
+		yield self._sending(self._trailer)
+
+	async def __aiter__(self):
+		for header, content in self._parts:
+			yield self._sending(header)
+			if hasattr(content, '__aiter__'):
+				async for chunk in content:
+					if chunk:
+						yield self._sending(chunk)
+			else:
+				for chunk in self._chunks(content):
+					if chunk:
+						yield self._sending(chunk)
+			yield self._sending(b'\r\n')
+		yield self._sending(self._trailer)
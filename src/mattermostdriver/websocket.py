@@ -1,12 +1,24 @@
-import json
 import ssl
+import time
+import random
 import asyncio
 import logging
+from collections import OrderedDict
+from urllib.parse import urlencode
+
 import websockets
 
+from .codec import get_codec
+from .compression import websocket_compression
+from .dispatch import EventDispatcher
+from .events import Event, EventRouter
+
 log = logging.getLogger('mattermostdriver.websocket')
 log.setLevel(logging.INFO)
 
+# Number of post ids remembered to skip posts already seen when backfilling
+SEEN_POSTS = 1000
+
 
 class Websocket:
 	def __init__(self, options, token):
@@ -14,44 +26,249 @@ class Websocket:
 		if options['debug']:
 			log.setLevel(logging.DEBUG)
 		self._token = token
+		self._codec = get_codec(options.get('json_codec', 'json'))
+		#: Coroutine function ``backfill(channel_id, since)`` returning the post list of a
+		#: channel since a timestamp, e.g. `Posts.get_posts_for_channel` with the `since` param.
+		#: Used to fetch the posts missed while reconnecting.
+		self.backfill = None
+		#: Channels whose missed posts are fetched after a reconnect.
+		#: Every channel a post is received for is added automatically.
+		self.watched_channels = set()
+		self.connection_id = None
+		self.sequence = None
+		self.last_event_at = None
+		self.last_post_at = None
+		self.reconnects = 0
+		self.dispatcher = None
+		#: Functions called with every :class:`~mattermostdriver.events.Event` received,
+		#: before it is passed to the event_handler
+		self.observers = []
+		#: The :class:`~mattermostdriver.cassette.Cassette` recording the messages received,
+		#: or replaying them instead of connecting
+		self.cassette = None
+		self._wants = None
+		self._seen_posts = OrderedDict()
+		# Whether the hello event of the current connection has been received
+		self._greeted = False
 
-	@asyncio.coroutine
-	def connect(self, event_handler):
+	def _url(self):
+		scheme = 'wss://'
+		if self.options['scheme'] != 'https':
+			scheme = 'ws://'
+
+		url = '{scheme:s}{url:s}:{port:s}{basepath:s}/websocket'.format(
+			scheme=scheme,
+			url=self.options['url'],
+			port=str(self.options['port']),
+			basepath=self.options['basepath']
+		)
+		if self.connection_id and self.sequence is not None:
+			# Lets the server replay the events we missed, if it still has them
+			url += '?' + urlencode({'connection_id': self.connection_id, 'sequence_number': self.sequence})
+		return url
+
+	def _ssl_context(self):
+		if self.options['scheme'] != 'https':
+			return None
+		context = ssl.create_default_context(purpose=ssl.Purpose.CLIENT_AUTH)
+		if not self.options['verify']:
+			context.verify_mode = ssl.CERT_NONE
+		return context
+
+	def _reconnect_delay(self, attempt):
+		delay = min(
+			self.options.get('websocket_reconnect_delay_max', 60),
+			self.options.get('websocket_reconnect_delay', 1) * 2 ** attempt
+		)
+		return random.uniform(delay / 2, delay)
+
+	async def connect(self, event_handler):
 		"""
 		Connect to the websocket and authenticate it.
 		When the authentication has finished, start the loop listening for messages,
 		sending a ping to the server to keep the connection alive.
 
-		:param event_handler: Every websocket event will be passed there. Takes one argument.
+		If the connection is lost, it is established again with an increasing delay,
+		unless the `websocket_reconnect` option is False. Posts missed in the
+		meantime are passed to the event_handler as `posted` events, if
+		:attr:`backfill` is set and the server could not resume the connection.
+
+		With the `event_workers` option, events are queued and handled by that many
+		concurrent tasks (see :class:`~mattermostdriver.dispatch.EventDispatcher`)
+		instead of one after the other while reading the websocket.
+
+		:param event_handler: Every websocket event will be passed there as string. Takes one argument.
+			An :class:`~mattermostdriver.events.EventRouter` gets the parsed events of the types
+			it has handlers for instead.
 		:type event_handler: Function(message)
 		:return:
 		"""
-		context = ssl.create_default_context(purpose=ssl.Purpose.CLIENT_AUTH)
-		if not self.options['verify']:
-			context.verify_mode = ssl.CERT_NONE
+		if isinstance(event_handler, EventRouter):
+			deliver = event_handler
+			self._wants = event_handler.wants
+		else:
+			async def deliver(event):
+				await event_handler(event.raw)
+			self._wants = None
 
-		scheme = 'wss://'
-		if self.options['scheme'] != 'https':
-			scheme = 'ws://'
-			context = None
+		workers = self.options.get('event_workers', 0)
+		if not workers:
+			return await self._supervise(deliver)
 
-		url = '{scheme:s}{url:s}:{port:s}{basepath:s}/websocket'.format(
-			scheme=scheme,
-			url=self.options['url'],
-			port=str(self.options['port']),
-			basepath=self.options['basepath']
+		self.dispatcher = EventDispatcher(
+			deliver,
+			workers=workers,
+			queue_size=self.options.get('event_queue_size', 1000),
+			policy=self.options.get('event_queue_policy', 'block'),
+			ordered=self.options.get('event_ordered', True)
 		)
+		self.dispatcher.start()
+		try:
+			await self._supervise(self.dispatcher.put)
+		finally:
+			await self.dispatcher.stop()
 
-		websocket = yield from websockets.connect(
-			url,
-			ssl=context,
+	async def _supervise(self, event_handler):
+		"""
+		Keeps the websocket connected, reconnecting when the connection is lost.
+		"""
+		reconnect = self.options.get('websocket_reconnect', True)
+		attempt = 0
+		connected_before = False
+		while True:
+			try:
+				websocket = await self._connect()
+			except (OSError, websockets.exceptions.InvalidHandshake) as e:
+				if not reconnect:
+					raise
+				log.warning('Could not connect the websocket: %s', e)
+			else:
+				if websocket is None:
+					log.info('Replayed all recorded websocket sessions')
+					return
+				previous_connection_id = self.connection_id
+				self._greeted = False
+				try:
+					await self._authenticate_websocket(websocket, event_handler)
+					attempt = 0
+					if connected_before:
+						self.reconnects += 1
+						await self._wait_for_hello(websocket, event_handler)
+						resumed = previous_connection_id is not None and self.connection_id == previous_connection_id
+						if not resumed:
+							await self._backfill(event_handler)
+					connected_before = True
+					await self._start_loop(websocket, event_handler)
+				except websockets.exceptions.ConnectionClosed as e:
+					if not reconnect:
+						raise
+					log.warning('Websocket connection closed: %s', e)
+				finally:
+					await websocket.close()
+
+			delay = self._reconnect_delay(attempt)
+			if self.cassette is not None and not self.cassette.recording:
+				# The next recorded session is replayed right away
+				delay = 0
+			log.info('Reconnecting the websocket in %.1f seconds', delay)
+			attempt += 1
+			await asyncio.sleep(delay)
+
+	async def _connect(self):
+		"""
+		:return: The connected websocket, or None if there is no recorded session left to replay
+		"""
+		if self.cassette is not None and not self.cassette.recording:
+			return self.cassette.replay_websocket()
+		websocket = await websockets.connect(
+			self._url(),
+			ssl=self._ssl_context(),
+			**websocket_compression(self.options.get('websocket_compression', True))
 		)
+		if self.cassette is not None:
+			return self.cassette.record_websocket(self._url(), websocket)
+		return websocket
 
-		yield from self._authenticate_websocket(websocket, event_handler)
-		yield from self._start_loop(websocket, event_handler)
+	async def _receive(self, message, event_handler):
+		"""
+		Parses a message, the only time it is parsed, and passes it on.
+		"""
+		event = Event.parse(message, self._codec)
+		self._track(event)
+		await self._handle(event, event_handler)
+		return event
+
+	async def _handle(self, event, event_handler):
+		for observer in self.observers:
+			observer(event)
+		if self._wants is not None and not self._wants(event.type):
+			return
+		await event_handler(event)
+
+	def _track(self, event):
+		"""
+		Remembers the sequence number and connection of the server
+		and the posts received, to resume or backfill after a reconnect.
+		"""
+		if not event:
+			return
+		self.last_event_at = int(time.time() * 1000)
+		if event.seq is not None and event.type is not None:
+			# The server expects the sequence number of the next event when resuming
+			self.sequence = event.seq + 1
+		if event.type == 'hello' and event.data.get('connection_id'):
+			self.connection_id = event.data['connection_id']
+			self._greeted = True
+		elif event.type == 'posted' and self._tracks_posts() and event.post is not None:
+			self._seen(event.post)
 
-	@asyncio.coroutine
-	def _start_loop(self, websocket, event_handler):
+	def _tracks_posts(self):
+		"""
+		Whether the posts received are decoded to remember them for a backfill.
+		Backfilled posts are passed on as `posted` events, so without a backfill
+		or a handler for `posted` there is nothing to remember.
+		"""
+		return self.backfill is not None and (self._wants is None or self._wants('posted'))
+
+	def _seen(self, post):
+		self.watched_channels.add(post['channel_id'])
+		self.last_post_at = max(self.last_post_at or 0, post['create_at'])
+		self._seen_posts[post['id']] = None
+		if len(self._seen_posts) > SEEN_POSTS:
+			self._seen_posts.popitem(last=False)
+
+	async def _backfill(self, event_handler):
+		"""
+		Passes the posts created while we were disconnected to the event_handler,
+		as `posted` events, oldest first.
+		"""
+		if self.backfill is None or not self.watched_channels:
+			return
+		since = self.last_post_at or self.last_event_at
+		for channel_id in list(self.watched_channels):
+			try:
+				post_list = await self.backfill(channel_id, since)
+			except Exception as e:
+				log.warning('Could not backfill channel %s: %s', channel_id, e)
+				continue
+			posts = [post_list['posts'][post_id] for post_id in post_list.get('order') or ()]
+			posts.sort(key=lambda post: post['create_at'])
+			for post in posts:
+				if post['id'] in self._seen_posts or post['create_at'] < since:
+					continue
+				self._seen(post)
+				log.debug('Backfilling post %s', post['id'])
+				await self._handle(Event({
+					'event': 'posted',
+					'data': {
+						'channel_id': channel_id,
+						'post': self._codec.dumps(dict(post)),
+						'backfilled': True,
+					},
+					'broadcast': {'channel_id': channel_id},
+				}, codec=self._codec), event_handler)
+
+	async def _start_loop(self, websocket, event_handler):
 		"""
 		We will listen for websockets events, sending a heartbeat/pong everytime
 		we react a TimeoutError. If we don't the webserver would close the idle connection,
@@ -60,48 +277,50 @@ class Websocket:
 		log.debug('Starting websocket loop')
 		while True:
 			try:
-				yield from asyncio.wait_for(
-					self._wait_for_message(websocket, event_handler),
-					timeout=self.options['timeout']
-				)
+				message = await asyncio.wait_for(websocket.recv(), timeout=self.options['timeout'])
 			except asyncio.TimeoutError:
-				yield from websocket.pong()
+				await websocket.pong()
 				log.debug("Sending heartbeat...")
 				continue
+			# Only receiving is timed, waiting for space in a full event queue must not cancel the event
+			await self._receive(message, event_handler)
+
+	async def _wait_for_hello(self, websocket, event_handler):
+		"""
+		The hello event tells whether the server resumed the connection,
+		but it can arrive after the reply to the authentication challenge.
+		"""
+		while not self._greeted:
+			try:
+				message = await asyncio.wait_for(websocket.recv(), timeout=self.options['timeout'])
+			except asyncio.TimeoutError:
+				log.warning('No hello event received after reconnecting')
+				return
+			await self._receive(message, event_handler)
 
-	@asyncio.coroutine
-	def _authenticate_websocket(self, websocket, event_handler):
+	async def _authenticate_websocket(self, websocket, event_handler):
 		"""
 		Sends a authentication challenge over a websocket.
 		This is not needed when we just send the cookie we got on login
 		when connecting to the websocket.
 		"""
 		log.debug('Authenticating websocket')
-		json_data = json.dumps({
+		json_data = self._codec.dumps({
 			"seq": 1,
 			"action": "authentication_challenge",
 			"data": {
 				"token": self._token
 			}
 		}).encode('utf8')
-		yield from websocket.send(json_data)
+		await websocket.send(json_data)
 		while True:
-			message = yield from websocket.recv()
-			status = json.loads(message)
-			log.debug(status)
 			# We want to pass the events to the event_handler already
 			# because the hello event could arrive before the authentication ok response
-			yield from event_handler(message)
+			status = await self._receive(await websocket.recv(), event_handler)
+			log.debug(status)
 			if ('status' in status and status['status'] == 'OK') and \
 					('seq_reply' in status and status['seq_reply'] == 1):
 				log.info('Websocket authentification OK')
 				return True
 			elif 'seq_reply' in status and status['seq_reply'] == 1:
 				log.error('Websocket authentification failed')
-
-	@asyncio.coroutine
-	def _wait_for_message(self, websocket, event_handler):
-		log.debug('Waiting for messages on websocket')
-		while True:
-			message = yield from websocket.recv()
-			yield from event_handler(message)
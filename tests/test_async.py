@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from mattermostdriver import AsyncDriver
+from mattermostdriver.exceptions import ResourceNotFound
+from mattermostdriver.fakeserver import FakeMattermost
+
+
+def test_concurrent_requests_share_one_session():
+	with FakeMattermost(latency=0.05) as server:
+		team = server.add_team('team')
+		channels = [server.add_channel(team['id'], 'channel{index}'.format(index=index)) for index in range(10)]
+
+		async def run():
+			async with AsyncDriver(server.driver_options(token=None, login_id='admin', password='admin')) as driver:
+				session = driver.client.session
+				posts = await asyncio.gather(*(
+					driver.posts.create_post(options={'channel_id': channel['id'], 'message': 'hello'})
+					for channel in channels
+				))
+				assert driver.client.session is session
+				return posts, driver.client.token
+
+		posts, token = asyncio.run(run())
+		assert token not in server._api.tokens
+
+	assert sorted(post['channel_id'] for post in posts) == sorted(channel['id'] for channel in channels)
+
+
+def test_errors_are_raised_like_the_sync_driver():
+	with FakeMattermost() as server:
+		async def run():
+			driver = AsyncDriver(server.driver_options())
+			await driver.login()
+			try:
+				with pytest.raises(ResourceNotFound):
+					await driver.channels.get_channel('missing')
+			finally:
+				await driver.client.close()
+
+		asyncio.run(run())
+
+
+def test_assigned_session_is_not_closed():
+	with FakeMattermost() as server:
+		async def run():
+			first = AsyncDriver(server.driver_options())
+			second = AsyncDriver(server.driver_options())
+			await first.login()
+			second.client.session = first.client.session
+			await second.login()
+			await second.client.close()
+			assert not first.client.session.is_closed
+			user = await first.users.get_user('me')
+			await first.client.close()
+			return user, first.client._session
+
+		user, session = asyncio.run(run())
+
+	assert user['username'] == 'admin'
+	assert session is None
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+from mattermostdriver.batching import BatchLoader, AsyncBatchLoader
+
+
+def _key_of(item):
+	return item['id']
+
+
+def test_invalid_items_fail_every_caller():
+	loader = BatchLoader(lambda keys: [{'name': key} for key in keys], _key_of, window=0.05)
+	errors = []
+
+	def load(key):
+		try:
+			loader.load(key)
+		except KeyError as e:
+			errors.append(e)
+
+	threads = [threading.Thread(target=load, args=(key,)) for key in ('a', 'b', 'c')]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join(timeout=5)
+	assert not any(thread.is_alive() for thread in threads)
+	assert len(errors) == 3
+
+
+def test_invalid_items_fail_every_task():
+	async def fetch(keys):
+		return [{'name': key} for key in keys]
+
+	async def run():
+		loader = AsyncBatchLoader(fetch, _key_of, window=0)
+		results = await asyncio.wait_for(
+			asyncio.gather(*(loader.load(key) for key in ('a', 'b')), return_exceptions=True), timeout=5)
+		assert not loader._tasks
+		return results
+
+	results = asyncio.run(run())
+	assert all(isinstance(result, KeyError) for result in results)
+
+
+def test_items_are_returned_to_their_callers():
+	async def fetch(keys):
+		return [{'id': key} for key in keys]
+
+	async def run():
+		loader = AsyncBatchLoader(fetch, _key_of, window=0)
+		return await asyncio.gather(loader.load('a'), loader.load('b')), loader.stats
+
+	results, stats = asyncio.run(run())
+	assert results == [{'id': 'a'}, {'id': 'b'}]
+	assert stats == {'loads': 2, 'batches': 1}
@@ -0,0 +1,35 @@
+import asyncio
+
+from mattermostdriver import AsyncDriver, Driver
+from mattermostdriver.fakeserver import FakeMattermost
+
+
+def test_patched_channel_is_fetched_again():
+	with FakeMattermost() as server:
+		team = server.add_team('team')
+		channel = server.add_channel(team['id'], 'channel', 'Before')
+		driver = Driver(server.driver_options(cache=True))
+		driver.login()
+		assert driver.channels.get_channel(channel['id'])['display_name'] == 'Before'
+		assert driver.channels.get_channel_by_name(team['id'], 'channel')['display_name'] == 'Before'
+		driver.channels.patch_channel(channel['id'], {'display_name': 'After'})
+		assert driver.channels.get_channel(channel['id'])['display_name'] == 'After'
+		assert driver.channels.get_channel_by_name(team['id'], 'channel')['display_name'] == 'After'
+		assert driver.client.cache.stats['invalidations'] == 1
+
+
+def test_patched_user_is_fetched_again():
+	with FakeMattermost() as server:
+		async def run():
+			driver = AsyncDriver(server.driver_options(cache=True))
+			await driver.login()
+			try:
+				assert (await driver.users.get_user_by_username('admin'))['nickname'] == ''
+				await driver.users.patch_user('me', {'nickname': 'boss'})
+				return await driver.users.get_user_by_username('admin')
+			finally:
+				await driver.client.close()
+
+		user = asyncio.run(run())
+
+	assert user['nickname'] == 'boss'
@@ -0,0 +1,27 @@
+from mattermostdriver import Driver
+from mattermostdriver.cassette import _redact_response
+from mattermostdriver.fakeserver import FakeMattermost
+
+
+def test_login_password_is_not_recorded(tmp_path):
+	path = str(tmp_path / 'login.jsonl')
+	with FakeMattermost() as server:
+		server.add_user('john', password='secret-password')
+		options = server.driver_options(cassette=path, cassette_mode='record')
+		del options['token']
+		options.update(login_id='john', password='secret-password')
+		driver = Driver(options)
+		driver.login()
+		driver.client.cassette.close()
+
+	with open(path, encoding='utf8') as fileobj:
+		recorded = fileobj.read()
+	assert '/users/login' in recorded
+	assert 'secret-password' not in recorded
+	assert driver.client.token not in recorded
+
+
+def test_created_access_token_is_not_recorded():
+	body = b'{"id": "tokenid", "token": "secret-token", "user_id": "userid"}'
+	assert b'secret-token' not in _redact_response('http://localhost/api/v4/users/userid/tokens', body)
+	assert _redact_response('http://localhost/api/v4/users/userid', body) == body
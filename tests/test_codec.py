@@ -0,0 +1,34 @@
+import json
+import pickle
+
+from mattermostdriver.cache import EntityCache
+from mattermostdriver.codec import JSONCodec
+from mattermostdriver.models import User
+
+
+class CountingCodec(JSONCodec):
+	def __init__(self):
+		super().__init__('counting', json.dumps, self._loads)
+		self.decoded = 0
+
+	def _loads(self, text):
+		self.decoded += 1
+		return json.loads(text)
+
+
+def test_cache_decodes_events_with_codec():
+	codec = CountingCodec()
+	cache = EntityCache(codec=codec)
+	cache.put(('user', 'id', 'u1'), {'id': 'u1'})
+	cache.handle_event({'event': 'user_updated', 'data': {'user': json.dumps({'id': 'u1'})}})
+	assert codec.decoded == 1
+	assert cache.stats['invalidations'] == 1
+
+
+def test_lazy_fields_decode_with_codec():
+	codec = CountingCodec()
+	user = User({'id': 'u1', 'props': {'a': 1}, 'notify_props': {}}, codec)
+	assert user.props == {'a': 1}
+	assert user.notify_props == {}
+	assert codec.decoded == 1
+	assert pickle.loads(pickle.dumps(user)) == {'id': 'u1', 'props': {'a': 1}, 'notify_props': {}}
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from mattermostdriver import AsyncDriver, Driver
+from mattermostdriver.compression import accept_encoding, supported_encodings, websocket_compression
+from mattermostdriver.fakeserver import GZIP_MIN_SIZE, FakeMattermost
+
+MESSAGE = 'compress me ' * GZIP_MIN_SIZE
+
+
+def _server_with_post():
+	server = FakeMattermost(gzip=True)
+	team = server.add_team('team')
+	channel = server.add_channel(team['id'], 'channel')
+	return server, server.add_post(channel['id'], MESSAGE)
+
+
+def test_accept_encoding():
+	assert accept_encoding(True) == ', '.join(supported_encodings())
+	assert accept_encoding(False) == 'identity'
+	assert accept_encoding('gzip, deflate') == 'gzip, deflate'
+	assert accept_encoding(['deflate']) == 'deflate'
+	with pytest.raises(ValueError):
+		accept_encoding('zstd')
+
+
+def test_websocket_compression():
+	assert websocket_compression(True) == {'compression': 'deflate'}
+	assert websocket_compression(False) == {'compression': None}
+	kwargs = websocket_compression({'client_max_window_bits': 12})
+	assert kwargs['compression'] is None
+	assert len(kwargs['extensions']) == 1
+
+
+def test_gzip_responses_are_decoded_and_counted():
+	server, post = _server_with_post()
+	with server:
+		driver = Driver(server.driver_options())
+		driver.login()
+		assert driver.posts.get_post(post['id'])['message'] == MESSAGE
+		gzip = driver.client.metrics.transfer()['by_encoding']['gzip']
+		assert gzip['responses'] == 1
+		# Repeated text compresses well
+		assert gzip['wire_bytes'] < gzip['decoded_bytes'] / 10
+
+
+def test_disabled_compression_asks_for_identity():
+	server, post = _server_with_post()
+	with server:
+		driver = Driver(server.driver_options(compression=False))
+		driver.login()
+		assert driver.posts.get_post(post['id'])['message'] == MESSAGE
+		transfer = driver.client.metrics.transfer()
+		assert list(transfer['by_encoding']) == ['identity']
+		assert transfer['wire_bytes'] == transfer['decoded_bytes']
+
+
+def test_async_gzip_responses_are_decoded_and_counted():
+	server, post = _server_with_post()
+
+	async def run():
+		driver = AsyncDriver(server.driver_options())
+		try:
+			await driver.login()
+			assert (await driver.posts.get_post(post['id']))['message'] == MESSAGE
+		finally:
+			await driver.client.close()
+		gzip = driver.client.metrics.transfer()['by_encoding']['gzip']
+		assert gzip['responses'] == 1
+		assert gzip['wire_bytes'] < gzip['decoded_bytes'] / 10
+
+	with server:
+		asyncio.run(run())
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from mattermostdriver.dispatch import EventDispatcher, channel_of
+from mattermostdriver.events import Event
+
+
+def _event(event_type, channel_id='channel1', user_id='user1', **data):
+	return Event({
+		'event': event_type,
+		'data': dict(data, user_id=user_id),
+		'broadcast': {'channel_id': channel_id},
+	})
+
+
+def _queue_then_handle(handle, events, **options):
+	"""
+	Queues the events before the workers start, then lets the workers handle them.
+
+	:return: The dispatcher
+	"""
+	async def run():
+		dispatcher = EventDispatcher(handle, **options)
+		await _handle_queued(dispatcher, events)
+		return dispatcher
+
+	return asyncio.run(run())
+
+
+async def _handle_queued(dispatcher, events):
+	# Every event is handled, dropped or replaced by a later one
+	for event in events:
+		await dispatcher.put(event)
+	dispatcher.start()
+	for _ in range(100):
+		stats = dispatcher.stats
+		if stats['handled'] + stats['dropped'] + stats['coalesced'] == len(events):
+			break
+		await asyncio.sleep(0.01)
+	await dispatcher.stop()
+
+
+def test_drop_oldest_evicts_the_oldest_events():
+	handled = []
+
+	async def handle(event):
+		handled.append(event.data['index'])
+
+	dispatcher = _queue_then_handle(
+		handle, [_event('posted', index=index) for index in range(5)], workers=1, queue_size=3, policy='drop_oldest')
+
+	assert handled == [2, 3, 4]
+	assert dispatcher.stats['dropped'] == 2
+
+
+def test_coalesce_replaces_queued_events_of_the_same_kind():
+	handled = []
+
+	async def handle(event):
+		handled.append((event.type, event.data['user_id'], event.data['index']))
+
+	dispatcher = _queue_then_handle(handle, [
+		_event('typing', user_id='user1', index=0),
+		_event('typing', user_id='user2', index=1),
+		_event('posted', index=2),
+		_event('typing', user_id='user1', index=3),
+		_event('posted', index=4),
+	], workers=1, queue_size=10, policy='coalesce')
+
+	# The typing event of user1 is replaced in its place, posts are never coalesced
+	assert handled == [('typing', 'user1', 3), ('typing', 'user2', 1), ('posted', 'user1', 2), ('posted', 'user1', 4)]
+	assert dispatcher.stats['coalesced'] == 1
+
+
+def test_block_waits_for_space_in_the_queue():
+	async def run():
+		release = asyncio.Event()
+		handled = []
+
+		async def handle(event):
+			await release.wait()
+			handled.append(event.data['index'])
+
+		dispatcher = EventDispatcher(handle, workers=1, queue_size=1, policy='block')
+		dispatcher.start()
+		await dispatcher.put(_event('posted', index=0))
+		await asyncio.sleep(0.01)
+		await dispatcher.put(_event('posted', index=1))
+		blocked = asyncio.ensure_future(dispatcher.put(_event('posted', index=2)))
+		await asyncio.sleep(0.05)
+		assert not blocked.done()
+		release.set()
+		await asyncio.wait_for(blocked, 1)
+		while len(handled) < 3:
+			await asyncio.sleep(0.01)
+		await dispatcher.stop()
+		return handled, dispatcher.stats
+
+	handled, stats = asyncio.run(run())
+	assert handled == [0, 1, 2]
+	assert stats['dropped'] == 0 and stats['handled'] == 3
+
+
+def test_ordered_events_of_a_channel_stay_in_order():
+	async def run():
+		handled = []
+
+		async def handle(event):
+			# Later events of other channels finish first
+			await asyncio.sleep(0.01 * (3 - event.data['index'] % 3))
+			handled.append((channel_of(event), event.data['index']))
+
+		dispatcher = EventDispatcher(handle, workers=3, ordered=True)
+		dispatcher.start()
+		for index in range(9):
+			await dispatcher.put(_event('posted', channel_id='channel{}'.format(index % 3), index=index))
+		while len(handled) < 9:
+			await asyncio.sleep(0.01)
+		await dispatcher.stop()
+		return handled
+
+	handled = asyncio.run(run())
+	for channel_id in ('channel0', 'channel1', 'channel2'):
+		indexes = [index for channel, index in handled if channel == channel_id]
+		assert indexes == sorted(indexes)
+
+
+def test_handler_errors_are_counted():
+	async def handle(event):
+		raise RuntimeError('broken handler')
+
+	dispatcher = _queue_then_handle(handle, [_event('posted', index=0)], workers=1)
+
+	assert dispatcher.stats['errors'] == 1 and dispatcher.stats['handled'] == 1
+
+
+def test_unknown_policy_is_rejected():
+	with pytest.raises(ValueError):
+		EventDispatcher(None, policy='drop_newest')
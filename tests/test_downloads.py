@@ -0,0 +1,21 @@
+import io
+
+from mattermostdriver import Driver
+from mattermostdriver.fakeserver import FakeMattermost
+
+
+def test_compressed_download_does_not_report_the_compressed_size():
+	content = b'a compressible line\n' * 1000
+	with FakeMattermost(gzip=True) as server:
+		driver = Driver(server.driver_options())
+		driver.login()
+		team = server.add_team('team')
+		channel = server.add_channel(team['id'], 'channel')
+		file_id = driver.files.upload_file(channel['id'], {'files': ('lines.txt', content)})['file_infos'][0]['id']
+		reported = []
+		destination = io.BytesIO()
+		size = driver.files.save_file(file_id, destination, progress=lambda written, total: reported.append(total))
+
+	assert size == len(content)
+	assert destination.getvalue() == content
+	assert set(reported) == {None}
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
+
+from mattermostdriver import Driver
+from mattermostdriver.exceptions import NoAccessTokenProvided
+from mattermostdriver.fakeserver import FakeMattermost, API
+
+
+def _connect(server, token):
+	return connect(
+		'ws://{host}:{port}{api}/websocket'.format(host=server.host, port=server.port, api=API),
+		additional_headers={'Authorization': 'Bearer ' + token})
+
+
+def _assert_closed(websocket):
+	assert json.loads(websocket.recv(timeout=5))['event'] == 'hello'
+	with pytest.raises(ConnectionClosed):
+		websocket.recv(timeout=5)
+
+
+def test_logout_ends_the_websocket_sessions():
+	with FakeMattermost() as server:
+		driver = Driver(server.driver_options(token=None, login_id='admin', password='admin'))
+		driver.login()
+		with _connect(server, driver.client.token) as websocket:
+			assert len(server._api.sessions) == 1
+			driver.logout()
+			assert not server._api.sessions
+			_assert_closed(websocket)
+
+
+def test_revoked_access_token_is_rejected():
+	with FakeMattermost() as server:
+		driver = Driver(server.driver_options())
+		driver.login()
+		access_token = driver.users.create_user_access_token('me', {'description': 'bot'})
+		with _connect(server, access_token['token']) as websocket:
+			driver.client.post('/users/tokens/revoke', options={'token_id': access_token['id']})
+			assert not server._api.sessions
+			_assert_closed(websocket)
+		with pytest.raises(NoAccessTokenProvided):
+			Driver(server.driver_options(token=access_token['token'])).login()
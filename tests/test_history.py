@@ -0,0 +1,15 @@
+from mattermostdriver import Driver
+from mattermostdriver.fakeserver import FakeMattermost, MAX_PER_PAGE
+
+
+def test_history_with_pages_larger_than_the_server_maximum():
+	with FakeMattermost() as server:
+		team = server.add_team('team')
+		channel = server.add_channel(team['id'], 'town')
+		for index in range(2 * MAX_PER_PAGE + 50):
+			server.add_post(channel['id'], 'post {index}'.format(index=index))
+		driver = Driver(server.driver_options())
+		driver.login()
+		posts = list(driver.posts.iter_channel_history(channel['id'], per_page=500))
+
+	assert [post['message'] for post in posts] == ['post {index}'.format(index=index) for index in range(2 * MAX_PER_PAGE + 50)]
@@ -0,0 +1,102 @@
+import asyncio
+
+from mattermostdriver import AsyncDriver, Driver
+from mattermostdriver.fakeserver import FakeMattermost
+from mattermostdriver.httpcache import CacheEntry, MemoryStorage
+
+
+def _driver(server, **options):
+	driver = Driver(server.driver_options(**options))
+	# Logging in gets the user of the token, which is cached too
+	driver.login()
+	return driver
+
+
+def test_not_modified_is_answered_from_the_cache():
+	with FakeMattermost() as server:
+		user = server.add_user('user')
+		driver = _driver(server, http_cache='memory')
+		first = driver.users.get_user(user['id'])
+		second = driver.users.get_user(user['id'])
+		assert second == first
+		assert server.stats['not_modified'] == 1
+		stats = driver.client.http_cache.stats
+		assert stats['hits'] == 1
+		assert stats['misses'] == 0
+		assert stats['bytes_saved'] > 0
+
+
+def test_changed_response_replaces_the_cached_one():
+	with FakeMattermost() as server:
+		user = server.add_user('user')
+		driver = _driver(server, http_cache='memory')
+		driver.users.get_user(user['id'])
+		driver.users.patch_user(user['id'], options={'nickname': 'changed'})
+		assert driver.users.get_user(user['id'])['nickname'] == 'changed'
+		assert server.stats['not_modified'] == 0
+		assert driver.client.http_cache.stats['misses'] == 1
+		# The new response is cached again
+		assert driver.users.get_user(user['id'])['nickname'] == 'changed'
+		assert server.stats['not_modified'] == 1
+
+
+def test_disk_cache_is_kept_between_drivers(tmp_path):
+	with FakeMattermost() as server:
+		user = server.add_user('user')
+		options = {'http_cache': 'disk', 'http_cache_dir': str(tmp_path)}
+		driver = _driver(server, **options)
+		first = driver.users.get_user(user['id'])
+		again = _driver(server, **options)
+		assert again.client.http_cache.stats['hits'] == 1
+		assert again.users.get_user(user['id']) == first
+		assert again.client.http_cache.stats['hits'] == 2
+		assert server.stats['not_modified'] == 2
+
+
+def test_tokens_do_not_share_cached_responses():
+	with FakeMattermost() as server:
+		# One storage for both, the responses are kept per Authorization header
+		storage = MemoryStorage()
+		admin = _driver(server, http_cache=storage)
+		user = Driver(server.driver_options(user_id=server.add_user('user')['id'], http_cache=storage))
+		user.login()
+		assert admin.users.get_user('me')['username'] == 'admin'
+		assert user.users.get_user('me')['username'] == 'user'
+		assert server.stats['not_modified'] == 0
+
+
+def test_async_not_modified_is_answered_from_the_cache():
+	async def run():
+		with FakeMattermost() as server:
+			user = server.add_user('user')
+			driver = AsyncDriver(server.driver_options(http_cache='memory'))
+			await driver.login()
+			try:
+				first = await driver.users.get_user(user['id'])
+				assert await driver.users.get_user(user['id']) == first
+			finally:
+				await driver.client.close()
+			assert server.stats['not_modified'] == 1
+			assert driver.client.http_cache.stats['hits'] == 1
+
+	asyncio.run(run())
+
+
+def test_memory_storage_evicts_the_least_recently_used():
+	storage = MemoryStorage(maxsize=25)
+	storage.put('first', CacheEntry('"1"', {}, b'0123456789'))
+	storage.put('second', CacheEntry('"2"', {}, b'0123456789'))
+	# Using the first entry keeps it, the second one is evicted instead
+	assert storage.get('first') is not None
+	storage.put('third', CacheEntry('"3"', {}, b'0123456789'))
+	assert storage.get('second') is None
+	assert storage.get('first') is not None
+	assert storage.evictions == 1
+	assert storage.size == 20
+
+
+def test_entries_larger_than_the_storage_are_not_stored():
+	storage = MemoryStorage(maxsize=5)
+	storage.put('key', CacheEntry('"1"', {}, b'0123456789'))
+	assert storage.get('key') is None
+	assert len(storage) == 0
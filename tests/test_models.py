@@ -0,0 +1,97 @@
+import asyncio
+import pickle
+
+import pytest
+
+from mattermostdriver import AsyncDriver, Driver
+from mattermostdriver.fakeserver import FakeMattermost
+from mattermostdriver.models import Channel, Post, Team, User, _Encoded, to_models
+
+
+def _driver(server, **options):
+	driver = Driver(server.driver_options(models=True, **options))
+	driver.login()
+	return driver
+
+
+def test_entities_are_returned_as_models():
+	with FakeMattermost() as server:
+		user = server.add_user('user', props={'owner': 'admin'}, custom='kept')
+		team = server.add_team('team', members=[user['id']])
+		channel = server.add_channel(team['id'], 'channel')
+		driver = _driver(server)
+		got = driver.users.get_user(user['id'])
+		assert isinstance(got, User)
+		assert got == user
+		assert got.username == got['username'] == 'user'
+		# Fields unknown to the model are kept
+		assert got['custom'] == 'kept'
+		assert isinstance(driver.teams.get_team(team['id']), Team)
+		assert isinstance(driver.channels.get_channel(channel['id']), Channel)
+		assert all(isinstance(team, Team) for team in driver.teams.get_user_teams(user['id']))
+
+
+def test_lazy_fields_are_decoded_on_access():
+	with FakeMattermost() as server:
+		user = server.add_user('user', props={'owner': 'admin'})
+		got = _driver(server).users.get_user(user['id'])
+		assert isinstance(got._props, _Encoded)
+		assert got.props == {'owner': 'admin'}
+		# Decoded only once
+		assert got._props is got.props
+		assert got.to_dict() == user
+
+
+def test_post_lists_hold_models():
+	with FakeMattermost() as server:
+		team = server.add_team('team')
+		channel = server.add_channel(team['id'], 'channel')
+		post = server.add_post(channel['id'], 'hello')
+		post_list = _driver(server).posts.get_posts_for_channel(channel['id'])
+		assert isinstance(post_list, dict)
+		assert isinstance(post_list['posts'][post['id']], Post)
+		assert post_list['posts'][post['id']].message == 'hello'
+
+
+def test_models_are_disabled_by_default():
+	with FakeMattermost() as server:
+		driver = Driver(server.driver_options())
+		driver.login()
+		assert type(driver.users.get_user('me')) is dict
+
+
+def test_async_entities_are_returned_as_models():
+	async def run():
+		with FakeMattermost() as server:
+			driver = AsyncDriver(server.driver_options(models=True))
+			try:
+				await driver.login()
+				me = await driver.users.get_user('me')
+			finally:
+				await driver.client.close()
+			assert isinstance(me, User)
+			assert me.username == 'admin'
+
+	asyncio.run(run())
+
+
+def test_to_models_matches_the_endpoint():
+	user = {'id': 'u1', 'username': 'user'}
+	assert isinstance(to_models('/users/4xp9fdt77pncbef59f4k1qe83o', dict(user)), User)
+	assert to_models('/users/4xp9fdt77pncbef59f4k1qe83o/status', dict(user)) == user
+	assert type(to_models('/users/4xp9fdt77pncbef59f4k1qe83o/status', dict(user))) is dict
+	users = to_models('/users', [dict(user), {'no': 'id'}])
+	assert isinstance(users[0], User)
+	assert users[1] == {'no': 'id'}
+
+
+def test_models_are_read_only_mappings():
+	user = User({'id': 'u1', 'username': 'user', 'notify_props': {'email': 'true'}})
+	with pytest.raises(KeyError):
+		user['first_name']
+	with pytest.raises(TypeError):
+		user['username'] = 'other'
+	assert set(user) == {'id', 'username', 'notify_props'}
+	copy = pickle.loads(pickle.dumps(user))
+	assert copy == user
+	assert copy.notify_props == {'email': 'true'}
@@ -0,0 +1,27 @@
+import asyncio
+
+from mattermostdriver import Driver, AsyncDriver
+from mattermostdriver.fakeserver import FakeMattermost, MAX_PER_PAGE
+
+
+def test_pages_larger_than_the_server_maximum_are_walked_completely():
+	with FakeMattermost() as server:
+		for index in range(MAX_PER_PAGE + 50):
+			server.add_user('user{index}'.format(index=index))
+		driver = Driver(server.driver_options())
+		driver.login()
+		users = list(driver.users.iter_users(per_page=500))
+
+		async def walk():
+			async_driver = AsyncDriver(server.driver_options())
+			await async_driver.login()
+			try:
+				return [user async for user in async_driver.users.iter_users(per_page=500)]
+			finally:
+				await async_driver.client.close()
+
+		async_users = asyncio.run(walk())
+
+	# The admin of the fake server is a user, too
+	assert len(users) == MAX_PER_PAGE + 51
+	assert len(async_users) == MAX_PER_PAGE + 51
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from mattermostdriver import EventRouter
+from mattermostdriver.fakeserver import FakeMattermost
+from mattermostdriver.pool import DriverPool
+
+
+def _pool(server):
+	return DriverPool(server.driver_options(token=None))
+
+
+def test_accounts_of_one_server_share_a_session():
+	with FakeMattermost() as server:
+		for name in ('bot1', 'bot2', 'bot3'):
+			server.add_user(name, password='secret')
+
+		async def run():
+			pool = _pool(server)
+			for name in ('bot1', 'bot2', 'bot3'):
+				pool.add(name, {'login_id': name, 'password': 'secret'})
+			async with pool:
+				sessions = {id(pool[name].client.session) for name in pool}
+				users = await asyncio.gather(*(pool[name].users.get_user('me') for name in pool))
+				return sessions, users, pool.stats
+
+		sessions, users, stats = asyncio.run(run())
+
+	assert len(sessions) == 1
+	# Every account is authenticated by its own token, not by the cookie of another one
+	assert [user['username'] for user in users] == ['bot1', 'bot2', 'bot3']
+	assert stats == {'accounts': 3, 'hosts': 1, 'websockets': 0}
+
+
+def test_accounts_of_two_servers_use_two_sessions():
+	with FakeMattermost() as first, FakeMattermost() as second:
+		async def run():
+			pool = DriverPool()
+			pool.add('first', first.driver_options())
+			pool.add('second', second.driver_options())
+			async with pool:
+				assert pool['first'].client.session is not pool['second'].client.session
+				return pool.stats
+
+		assert asyncio.run(run())['hosts'] == 2
+
+
+def test_failed_login_does_not_stop_the_others():
+	with FakeMattermost() as server:
+		server.add_user('bot', password='secret')
+
+		async def run():
+			pool = _pool(server)
+			pool.add('bot', {'login_id': 'bot', 'password': 'secret'})
+			pool.add('intruder', {'login_id': 'bot', 'password': 'wrong'})
+			try:
+				return await pool.login()
+			finally:
+				await pool.close()
+
+		results = asyncio.run(run())
+
+	assert results['bot']['username'] == 'bot'
+	assert isinstance(results['intruder'], Exception)
+
+
+def test_names_are_unique():
+	pool = DriverPool({'url': 'localhost'})
+	pool.add('bot')
+	with pytest.raises(ValueError):
+		pool.add('bot')
+
+
+def test_websockets_pass_events_to_their_accounts():
+	with FakeMattermost() as server:
+		members = [server.add_user(name, password='secret')['id'] for name in ('bot1', 'bot2')]
+		team = server.add_team('team', members=members)
+		channel = server.add_channel(team['id'], 'channel', members=members[:1])
+		received = []
+
+		def router_of(name):
+			router = EventRouter()
+
+			@router.on('posted')
+			async def posted(event):
+				received.append((name, event.post['message']))
+
+			return router
+
+		async def run():
+			pool = _pool(server)
+			for name in ('bot1', 'bot2'):
+				pool.add(name, {'login_id': name, 'password': 'secret'}, event_handler=router_of(name))
+			async with pool:
+				pool.start_websockets()
+				for _ in range(500):
+					if all(pool[name].websocket is not None and pool[name].websocket.connection_id for name in pool):
+						break
+					await asyncio.sleep(0.01)
+				running = pool.stats['websockets']
+				server.add_post(channel['id'], 'hello')
+				for _ in range(500):
+					if received:
+						break
+					await asyncio.sleep(0.01)
+				await asyncio.sleep(0.05)
+			return running, pool.stats
+
+		running, stats = asyncio.run(run())
+
+	assert running == 2
+	# Only bot1 is a member of the channel
+	assert received == [('bot1', 'hello')]
+	assert stats['websockets'] == 0
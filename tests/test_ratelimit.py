@@ -0,0 +1,26 @@
+import pytest
+
+from mattermostdriver.ratelimit import RateLimiter
+
+
+def _headers(limit, remaining, reset):
+	return {
+		'X-RateLimit-Limit': str(limit),
+		'X-RateLimit-Remaining': str(remaining),
+		'X-RateLimit-Reset': str(reset),
+	}
+
+
+def test_exhausted_burst_waits_for_one_token():
+	limiter = RateLimiter()
+	# 10 requests per second with a burst of 100, just used up
+	limiter.update(_headers(100, 0, 10))
+	assert limiter.reserve() == pytest.approx(0.1, abs=0.01)
+	assert limiter.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_retry_after_blocks():
+	limiter = RateLimiter()
+	limiter.update(_headers(100, 0, 10))
+	limiter.retry_after(5)
+	assert limiter.reserve() == pytest.approx(5, abs=0.01)
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+import requests
+
+from mattermostdriver import AsyncDriver, Driver
+from mattermostdriver.exceptions import TooManyRequests
+from mattermostdriver.fakeserver import FakeMattermost
+
+
+def _driver(server, **options):
+	driver = Driver(server.driver_options(retry_backoff=0.01, retry_jitter=False, **options))
+	driver.login()
+	return driver
+
+
+def test_failed_requests_are_retried():
+	with FakeMattermost() as server:
+		driver = _driver(server)
+		server.fail_next(2, 503)
+		assert driver.users.get_user('me')['username'] == 'admin'
+		assert server.stats['faults'] == 2
+		assert driver.client.retry_policy.stats == {'retries': 2, 'reasons': {'503': 2}, 'gave_up': 0}
+
+
+def test_retries_stop_after_retries():
+	with FakeMattermost() as server:
+		driver = _driver(server, retries=2)
+		server.fail_next(10, 503)
+		requests_before = server.stats['requests']
+		with pytest.raises(requests.HTTPError):
+			driver.users.get_user('me')
+		assert server.stats['requests'] - requests_before == 3
+		assert driver.client.retry_policy.stats['gave_up'] == 1
+
+
+def test_post_is_not_retried():
+	with FakeMattermost() as server:
+		team = server.add_team('team')
+		channel = server.add_channel(team['id'], 'channel')
+		driver = _driver(server)
+		server.fail_next(1, 503)
+		with pytest.raises(requests.HTTPError):
+			driver.posts.create_post({'channel_id': channel['id'], 'message': 'once'})
+		assert not server._api.channel_posts.get(channel['id'])
+		assert driver.client.retry_policy.stats['retries'] == 0
+
+
+def test_retry_after_is_honored(monkeypatch):
+	slept = []
+	monkeypatch.setattr('mattermostdriver.client.time.sleep', slept.append)
+	with FakeMattermost() as server:
+		driver = _driver(server, rate_limit=False)
+		server.fail_next(1, 429)
+		assert driver.users.get_user('me')['username'] == 'admin'
+		server.fail_next(10, 429)
+		with pytest.raises(TooManyRequests):
+			driver.users.get_user('me')
+
+	# The fake server asks to retry after a second, instead of the backoff of 0.01 seconds
+	assert slept == [1.0, 1.0, 1.0, 1.0]
+
+
+def test_async_requests_are_retried():
+	with FakeMattermost() as server:
+		async def run():
+			driver = AsyncDriver(server.driver_options(retry_backoff=0.01, retry_jitter=False))
+			await driver.login()
+			try:
+				server.fail_next(2, 502)
+				return await driver.users.get_user('me'), driver.client.retry_policy.stats
+			finally:
+				await driver.client.close()
+
+		user, stats = asyncio.run(run())
+
+	assert user['username'] == 'admin'
+	assert stats['retries'] == 2
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mattermostdriver import AsyncDriver, Driver
+from mattermostdriver.fakeserver import FakeMattermost
+from mattermostdriver.singleflight import SingleFlight, AsyncSingleFlight
+
+
+def test_concurrent_callers_get_independent_results():
+	with FakeMattermost(latency=0.2) as server:
+		user = server.add_user('bot', props={'owner': 'admin'})
+		driver = Driver(server.driver_options())
+		driver.login()
+		with ThreadPoolExecutor(max_workers=2) as executor:
+			futures = [executor.submit(driver.users.get_user, user['id']) for _ in range(2)]
+			first, second = [future.result() for future in futures]
+		stats = driver.client.single_flight.stats
+
+	assert stats['shared'] == 1
+	assert first == second and first is not second
+	first['props']['owner'] = 'someone else'
+	assert second['props'] == {'owner': 'admin'}
+
+
+def test_concurrent_tasks_get_independent_results():
+	with FakeMattermost(latency=0.2) as server:
+		async def run():
+			driver = AsyncDriver(server.driver_options())
+			await driver.login()
+			try:
+				results = await asyncio.gather(*(driver.users.get_user(server.admin['id']) for _ in range(2)))
+				return results, driver.client.single_flight.stats
+			finally:
+				await driver.client.close()
+
+		(first, second), stats = asyncio.run(run())
+
+	assert stats['shared'] == 1
+	assert first == second and first is not second
+
+
+def test_callers_share_one_call_and_its_exception():
+	flight = SingleFlight()
+	started = threading.Event()
+	release = threading.Event()
+	calls = []
+
+	def fail():
+		calls.append(1)
+		started.set()
+		release.wait(5)
+		raise ValueError('failed once')
+
+	with ThreadPoolExecutor(max_workers=3) as executor:
+		leader = executor.submit(flight.do, 'key', fail)
+		started.wait(5)
+		followers = [executor.submit(flight.do, 'key', fail) for _ in range(2)]
+		while flight.stats['shared'] < 2:
+			time.sleep(0.001)
+		release.set()
+		for future in [leader] + followers:
+			with pytest.raises(ValueError):
+				future.result()
+
+	assert calls == [1]
+	assert flight.stats == {'calls': 1, 'shared': 2}
+	# The call is forgotten once it finished
+	assert flight.do('key', lambda: 'again') == 'again'
+
+
+def test_cancelled_task_does_not_cancel_the_shared_call():
+	async def run():
+		flight = AsyncSingleFlight()
+
+		async def fetch():
+			await asyncio.sleep(0.05)
+			return 'result'
+
+		first = asyncio.ensure_future(flight.do('key', fetch))
+		second = asyncio.ensure_future(flight.do('key', fetch))
+		await asyncio.sleep(0)
+		first.cancel()
+		return await second, flight.stats
+
+	assert asyncio.run(run()) == ('result', {'calls': 1, 'shared': 1})
+
+
+def test_coalescing_can_be_disabled():
+	with FakeMattermost(latency=0.1) as server:
+		driver = Driver(server.driver_options(coalesce_requests=False))
+		driver.login()
+		requests_before = server.stats['requests']
+		with ThreadPoolExecutor(max_workers=2) as executor:
+			for future in [executor.submit(driver.users.get_user, 'me') for _ in range(2)]:
+				future.result()
+
+	assert driver.client.single_flight is None
+	assert server.stats['requests'] - requests_before == 2
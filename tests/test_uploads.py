@@ -0,0 +1,87 @@
+import asyncio
+import io
+
+from mattermostdriver import AsyncDriver, Driver
+from mattermostdriver.fakeserver import FakeMattermost, _parse_multipart
+from mattermostdriver.uploads import MultipartEncoder
+
+
+def _setup(server):
+	team = server.add_team('team')
+	return server.add_channel(team['id'], 'channel')
+
+
+def _content(server, file_id):
+	return server._api.files[file_id]['content']
+
+
+def test_encoder_streams_a_multipart_body():
+	encoder = MultipartEncoder({'channel_id': 'channel1'}, [
+		('files', ('a.txt', b'first file')),
+		('files', ('b.txt', io.BytesIO(b'second file'))),
+	], chunk_size=4)
+	body = b''.join(encoder)
+
+	assert int(encoder.headers['Content-Length']) == len(body) == encoder.sent
+	fields, files = _parse_multipart(body, encoder.content_type)
+	assert fields == {'channel_id': 'channel1'}
+	assert files == [('a.txt', b'first file'), ('b.txt', b'second file')]
+
+
+def test_body_of_unknown_size_has_no_length():
+	encoder = MultipartEncoder(files=[('files', ('lines.txt', (line for line in [b'a\n', b'b\n'])))])
+	assert 'Content-Length' not in encoder.headers
+	assert b'a\nb\n' in b''.join(encoder)
+
+
+def test_stream_upload_reports_progress():
+	content = b'x' * 100000
+	reported = []
+	with FakeMattermost() as server:
+		channel = _setup(server)
+		driver = Driver(server.driver_options())
+		driver.login()
+		result = driver.files.upload_file_stream(
+			channel['id'], {'files': ('big.bin', io.BytesIO(content))},
+			chunk_size=8192, progress=lambda sent, total: reported.append((sent, total)))
+		uploaded = _content(server, result['file_infos'][0]['id'])
+
+	assert uploaded == content
+	sent, total = reported[-1]
+	assert sent == total and total > len(content)
+	assert len(reported) > len(content) // 8192
+
+
+def test_upload_files_returns_ids_in_order(tmp_path):
+	paths = []
+	for index in range(6):
+		path = tmp_path / 'file{index}.txt'.format(index=index)
+		path.write_bytes('content {index}'.format(index=index).encode('utf8'))
+		paths.append(str(path))
+	with FakeMattermost(latency=(0, 0.05), seed=1) as server:
+		channel = _setup(server)
+		driver = Driver(server.driver_options())
+		driver.login()
+		file_ids = driver.files.upload_files(channel['id'], paths, workers=3)
+		uploaded = [_content(server, file_id) for file_id in file_ids]
+
+	assert uploaded == ['content {index}'.format(index=index).encode('utf8') for index in range(6)]
+
+
+def test_async_upload_files():
+	with FakeMattermost() as server:
+		channel = _setup(server)
+
+		async def run():
+			driver = AsyncDriver(server.driver_options())
+			await driver.login()
+			try:
+				return await driver.files.upload_files(
+					channel['id'], [('a.txt', b'first'), ('b.txt', io.BytesIO(b'second'))], workers=2)
+			finally:
+				await driver.client.close()
+
+		file_ids = asyncio.run(run())
+		uploaded = [_content(server, file_id) for file_id in file_ids]
+
+	assert uploaded == [b'first', b'second']
@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+from mattermostdriver import AsyncDriver, Driver, EventRouter
+from mattermostdriver.fakeserver import FakeMattermost
+from mattermostdriver.websocket import Websocket
+
+POSTED = json.dumps({
+	'event': 'posted',
+	'data': {'post': json.dumps({'id': 'post1', 'channel_id': 'channel1', 'create_at': 1, 'message': 'hi'})},
+	'broadcast': {'channel_id': 'channel1'},
+	'seq': 2,
+})
+
+
+def _receive(websocket, router):
+	websocket._wants = router.wants
+
+	async def handler(event):
+		pass
+
+	return asyncio.run(websocket._receive(POSTED, handler))
+
+
+def test_posts_are_not_decoded_without_handler():
+	websocket = Websocket(Driver({'url': 'localhost'}).options, 'token')
+	websocket.backfill = lambda channel_id, since: None
+	router = EventRouter()
+	router.on('typing')(lambda event: None)
+	event = _receive(websocket, router)
+	assert event._post is None
+	assert websocket.watched_channels == set()
+
+
+def test_posts_are_tracked_for_the_backfill():
+	websocket = Websocket(Driver({'url': 'localhost'}).options, 'token')
+	websocket.backfill = lambda channel_id, since: None
+	router = EventRouter()
+	router.on('posted')(lambda event: None)
+	event = _receive(websocket, router)
+	assert event._post is not None
+	assert websocket.watched_channels == {'channel1'}
+
+
+async def _until(condition, timeout=5):
+	for _ in range(int(timeout / 0.01)):
+		if condition():
+			return True
+		await asyncio.sleep(0.01)
+	return False
+
+
+def _listen(server, handle, scenario, **options):
+	"""
+	Runs `scenario(driver)` while the websocket of a driver passes the posted events to `handle`.
+	"""
+	async def run():
+		driver = AsyncDriver(server.driver_options(**options))
+		await driver.login()
+		router = EventRouter()
+		router.on('posted')(handle)
+		listening = asyncio.ensure_future(driver.init_websocket(router))
+		try:
+			assert await _until(lambda: driver.websocket is not None and driver.websocket.connection_id)
+			await scenario(driver)
+		finally:
+			listening.cancel()
+			await asyncio.gather(listening, return_exceptions=True)
+			await driver.client.close()
+
+	asyncio.run(run())
+
+
+def _server_with_channel():
+	server = FakeMattermost()
+	team = server.add_team('team')
+	return server, server.add_channel(team['id'], 'channel')
+
+
+def test_slow_worker_blocking_the_queue_loses_no_events():
+	server, channel = _server_with_channel()
+	received = []
+
+	async def handle(event):
+		# Slower than the heartbeat timeout, so the full queue blocks the websocket longer
+		await asyncio.sleep(0.1)
+		received.append(event.post['message'])
+
+	async def scenario(driver):
+		for index in range(5):
+			server.add_post(channel['id'], 'message {index}'.format(index=index))
+		await _until(lambda: len(received) == 5)
+
+	with server:
+		_listen(server, handle, scenario, timeout=0.05, event_workers=1, event_queue_size=1, event_queue_policy='block')
+
+	assert received == ['message {index}'.format(index=index) for index in range(5)]
+
+
+def test_reconnect_resumes_the_connection():
+	server, channel = _server_with_channel()
+	received = []
+
+	async def handle(event):
+		received.append((event.post['message'], event.data.get('backfilled', False)))
+
+	async def scenario(driver):
+		server.add_post(channel['id'], 'before')
+		await _until(lambda: len(received) == 1)
+		connection_id = driver.websocket.connection_id
+		server.drop_websockets()
+		server.add_post(channel['id'], 'while away')
+		await _until(lambda: len(received) == 2)
+		assert driver.websocket.reconnects == 1
+		assert driver.websocket.connection_id == connection_id
+
+	with server:
+		_listen(server, handle, scenario, websocket_reconnect_delay=0.05)
+
+	# The server replayed the missed event
+	assert received == [('before', False), ('while away', False)]
+
+
+def test_reconnect_backfills_posts_of_a_new_connection():
+	server, channel = _server_with_channel()
+	received = []
+
+	async def handle(event):
+		received.append((event.post['message'], event.data.get('backfilled', False)))
+
+	async def scenario(driver):
+		server.add_post(channel['id'], 'before')
+		await _until(lambda: len(received) == 1)
+		connection_id = driver.websocket.connection_id
+		server.drop_websockets()
+		# Like a restarted server, which can not resume the connection
+		server._api.sessions.clear()
+		server.add_post(channel['id'], 'while away')
+		await _until(lambda: len(received) == 2)
+		assert driver.websocket.reconnects == 1
+		assert driver.websocket.connection_id != connection_id
+
+	with server:
+		_listen(server, handle, scenario, websocket_reconnect_delay=0.3)
+
+	assert received == [('before', False), ('while away', True)]